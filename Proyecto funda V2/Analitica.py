@@ -0,0 +1,375 @@
+#===========================================================================
+# Analítica histórica (fuera de línea) sobre la bitácora de eventos
+#
+# Carga las estancias cerradas (eventos 'liberar') a arreglos de NumPy y
+# calcula con operaciones vectorizadas: curva de ocupación, mapa de horas
+# pico, rotación e ingresos por parqueo. Exporta CSV y columnas (.npz, y
+# .parquet si pyarrow está instalado). Los totales se comparan contra los
+# contadores de Parqueo restaurados de la misma bitácora.
+#
+#   python Analitica.py                       # resumen + verificación
+#   python Analitica.py --salida reportes     # exportar CSV/npz/parquet
+#   python Analitica.py --bench 2000000       # tiempos con 2M estancias
+#===========================================================================
+import argparse
+import os
+import pathlib
+import sqlite3
+import tempfile
+import time
+import numpy as np
+from Variables import CONFIG, RUTA_EVENTOS
+
+SEGUNDOS_DIA = 86400
+DIAS_SEMANA = ("Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom")
+
+_DTYPE_FILA = np.dtype([("parqueo", "i4"), ("espacio", "i4"), ("salida", "f8"),
+                        ("estancia", "f8"), ("costo", "f8")])
+
+
+def _conectar_solo_lectura(ruta):
+    """Conexión de solo lectura a la bitácora (la analítica nunca escribe)"""
+    # Sin el archivo, SQLite fallaría con "unable to open database file"
+    if not os.path.isfile(ruta):
+        raise FileNotFoundError(f"No existe la bitácora de eventos: {ruta}")
+    # as_uri() escapa '?', '#' y '%' de la ruta
+    uri = pathlib.Path(ruta).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+# ============================================================================
+# SESIONES EN COLUMNAS
+# ============================================================================
+class Sesiones:
+    """Una fila por estancia cerrada, guardada como columnas de NumPy"""
+
+    COLUMNAS = ("parqueo", "espacio", "entrada", "salida", "estancia", "costo")
+
+    def __init__(self, parqueo, espacio, salida, estancia, costo):
+        self.parqueo = np.asarray(parqueo, dtype=np.int32)
+        self.espacio = np.asarray(espacio, dtype=np.int32)
+        self.salida = np.asarray(salida, dtype=float)
+        self.estancia = np.asarray(estancia, dtype=float)
+        self.costo = np.asarray(costo, dtype=float)
+        self.entrada = self.salida - self.estancia
+
+    @classmethod
+    def desde_bd(cls, ruta=RUTA_EVENTOS, desde=None, hasta=None):
+        """Lee los eventos 'liberar' de la bitácora (opcionalmente [desde, hasta))"""
+        consulta = ("SELECT parqueo, espacio, ts, valor, costo FROM eventos "
+                    "WHERE tipo = 'liberar'")
+        parametros = []
+        if desde is not None:
+            consulta += " AND ts >= ?"
+            parametros.append(desde)
+        if hasta is not None:
+            consulta += " AND ts < ?"
+            parametros.append(hasta)
+
+        conexion = _conectar_solo_lectura(ruta)
+        try:
+            filas = np.fromiter(conexion.execute(consulta + " ORDER BY id", parametros),
+                                dtype=_DTYPE_FILA)
+        finally:
+            conexion.close()
+        return cls(filas["parqueo"], filas["espacio"], filas["salida"],
+                   filas["estancia"], filas["costo"])
+
+    def __len__(self):
+        return len(self.salida)
+
+    def filtrar(self, mascara):
+        return Sesiones(self.parqueo[mascara], self.espacio[mascara], self.salida[mascara],
+                        self.estancia[mascara], self.costo[mascara])
+
+    def columnas(self) -> dict:
+        return {nombre: getattr(self, nombre) for nombre in self.COLUMNAS}
+
+
+# ============================================================================
+# ANÁLISIS VECTORIZADOS
+# ============================================================================
+def curva_ocupacion(sesiones, paso: float = 300.0, inicio=None, fin=None):
+    """Vehículos presentes cada `paso` segundos: entradas - salidas hasta t"""
+    if not len(sesiones):
+        return np.empty(0), np.empty(0, dtype=int)
+    entradas = np.sort(sesiones.entrada)
+    salidas = np.sort(sesiones.salida)
+    inicio = entradas[0] if inicio is None else inicio
+    fin = salidas[-1] if fin is None else fin
+    tiempos = np.arange(inicio, fin + paso, paso)
+    ocupados = (np.searchsorted(entradas, tiempos, side="right")
+                - np.searchsorted(salidas, tiempos, side="right"))
+    return tiempos, ocupados
+
+
+def _dia_y_hora(ts, desfase_utc):
+    local = np.asarray(ts) + desfase_utc
+    dia = ((local // SEGUNDOS_DIA).astype(np.int64) + 3) % 7   # 1/1/1970 fue jueves
+    hora = ((local % SEGUNDOS_DIA) // 3600).astype(np.int64)
+    return dia, hora
+
+
+def mapa_horas_pico(sesiones, paso: float = 300.0, desfase_utc=None) -> dict:
+    """Matrices 7x24 (lunes..domingo x hora local): llegadas totales y
+    ocupación media según la curva de ocupación"""
+    desfase_utc = time.localtime().tm_gmtoff if desfase_utc is None else desfase_utc
+    dia, hora = _dia_y_hora(sesiones.entrada, desfase_utc)
+    llegadas = np.bincount(dia * 24 + hora, minlength=168).reshape(7, 24)
+
+    tiempos, ocupados = curva_ocupacion(sesiones, paso)
+    dia, hora = _dia_y_hora(tiempos, desfase_utc)
+    celda = dia * 24 + hora
+    muestras = np.bincount(celda, minlength=168)
+    suma = np.bincount(celda, weights=ocupados, minlength=168)
+    ocupacion = np.divide(suma, muestras, out=np.zeros(168), where=muestras > 0)
+    return {"llegadas": llegadas, "ocupacion": ocupacion.reshape(7, 24)}
+
+
+def resumen_por_parqueo(sesiones, tipo_cambio=None, num_espacios=None) -> dict:
+    """Vehículos, estancia, ingresos (₡ y $) y rotación diaria por parqueo"""
+    tipo_cambio = CONFIG['tipo_cambio'] if tipo_cambio is None else tipo_cambio
+    num_espacios = num_espacios or CONFIG['espacios_por_parqueo']
+    ids, indice = np.unique(sesiones.parqueo, return_inverse=True)
+    vehiculos = np.bincount(indice, minlength=len(ids))
+    tiempo_total = np.bincount(indice, weights=sesiones.estancia, minlength=len(ids))
+    ganancias = np.bincount(indice, weights=sesiones.costo, minlength=len(ids))
+    dias = ((sesiones.salida.max() - sesiones.entrada.min()) / SEGUNDOS_DIA
+            if len(sesiones) else 0.0)
+    return {
+        "parqueo": ids,
+        "vehiculos": vehiculos,
+        "tiempo_total": tiempo_total,
+        "promedio_estancia": np.divide(tiempo_total, vehiculos, out=np.zeros(len(ids)),
+                                       where=vehiculos > 0),
+        "ganancias_colones": ganancias,
+        "ganancias_dolares": ganancias / tipo_cambio,
+        # Estancias por espacio y por día
+        "rotacion": vehiculos / (num_espacios * max(dias, 1 / 24)),
+    }
+
+
+def recobrar(sesiones, motor=None):
+    """Precio de cada estancia con las tarifas actuales (auditoría)"""
+    from Tarifas import crear_motor
+
+    motor = motor or crear_motor()
+    return np.asarray(motor.precios(sesiones.parqueo, sesiones.entrada, sesiones.salida))
+
+
+# ============================================================================
+# VERIFICACIÓN CONTRA LOS CONTADORES DE Parqueo
+# ============================================================================
+def verificar_contadores(sesiones, ruta=RUTA_EVENTOS, tipo_cambio=None) -> list:
+    """Restaura los Parqueo de la bitácora (instantánea + cola) y compara sus
+    contadores con las sumas vectorizadas. Retorna las diferencias.
+
+    Si la bitácora no se puede leer lanza la excepción (FileNotFoundError o
+    sqlite3.Error) en vez de comparar contra parqueos vacíos.
+    """
+    from Modelo import Parqueo
+    from Persistencia import AlmacenEventos
+
+    tipo_cambio = CONFIG['tipo_cambio'] if tipo_cambio is None else tipo_cambio
+    resumen = resumen_por_parqueo(sesiones, tipo_cambio)
+    num_espacios = max(CONFIG['espacios_por_parqueo'],
+                       int(sesiones.espacio.max()) + 1 if len(sesiones) else 0)
+    parqueos = [Parqueo(int(pid), num_espacios=num_espacios) for pid in resumen["parqueo"]]
+    conexion = _conectar_solo_lectura(ruta)
+    try:
+        AlmacenEventos(ruta).restaurar(parqueos, conexion=conexion)
+    finally:
+        conexion.close()
+
+    diferencias = []
+    for k, parqueo in enumerate(parqueos):
+        esperado = {
+            "vehiculos": (parqueo.vehiculos_totales, resumen["vehiculos"][k]),
+            "tiempo_total": (parqueo.tiempo_total_estancia, resumen["tiempo_total"][k]),
+            "ganancias_colones": (parqueo.ganancias_colones, resumen["ganancias_colones"][k]),
+            # Misma conversión que la pantalla de estadísticas
+            "ganancias_dolares": (parqueo.ganancias_colones / tipo_cambio,
+                                  resumen["ganancias_dolares"][k]),
+        }
+        for campo, (contador, calculado) in esperado.items():
+            if not np.isclose(contador, calculado, rtol=1e-9, atol=1e-6):
+                diferencias.append(f"Parqueo {parqueo.id} {campo}: contador {contador} "
+                                   f"!= analítica {calculado}")
+    return diferencias
+
+
+# ============================================================================
+# EXPORTACIÓN
+# ============================================================================
+def _exportar_parquet(ruta, columnas) -> bool:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    pq.write_table(pa.table(columnas), ruta)
+    return True
+
+
+def _escribir_csv(ruta, columnas, encabezado, formato_fila, bloque=100_000):
+    """Como np.savetxt pero formatea bloques enteros con un solo `%`
+    (varias veces más rápido con millones de filas)"""
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(",".join(encabezado) + "\n")
+        for inicio in range(0, len(columnas[0]), bloque):
+            filas = zip(*(c[inicio:inicio + bloque].tolist() for c in columnas))
+            parte = [v for fila in filas for v in fila]
+            f.write(((formato_fila + "\n") * (len(parte) // len(columnas))) % tuple(parte))
+
+
+def exportar(sesiones, carpeta, formatos=("csv", "npz", "parquet"), paso=300.0,
+             tipo_cambio=None) -> list:
+    """Escribe sesiones y tablas de resumen en `carpeta`; retorna las rutas"""
+    os.makedirs(carpeta, exist_ok=True)
+    escritos = []
+    columnas = sesiones.columnas()
+    resumen = resumen_por_parqueo(sesiones, tipo_cambio)
+    tiempos, ocupados = curva_ocupacion(sesiones, paso)
+    mapa = mapa_horas_pico(sesiones, paso)
+
+    if "csv" in formatos:
+        ruta = os.path.join(carpeta, "sesiones.csv")
+        _escribir_csv(ruta, [columnas[c] for c in Sesiones.COLUMNAS], Sesiones.COLUMNAS,
+                      "%d,%d,%.3f,%.3f,%.3f,%.2f")
+        escritos.append(ruta)
+
+        ruta = os.path.join(carpeta, "resumen_parqueos.csv")
+        np.savetxt(ruta, np.column_stack(list(resumen.values())), fmt="%.6g", delimiter=",",
+                   header=",".join(resumen), comments="")
+        escritos.append(ruta)
+
+        ruta = os.path.join(carpeta, "ocupacion.csv")
+        np.savetxt(ruta, np.column_stack([tiempos, ocupados]), fmt=["%.0f", "%d"],
+                   delimiter=",", header="ts,ocupados", comments="")
+        escritos.append(ruta)
+
+        for nombre, matriz in mapa.items():
+            ruta = os.path.join(carpeta, f"horas_pico_{nombre}.csv")
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write("dia," + ",".join(f"{h:02d}h" for h in range(24)) + "\n")
+                for dia, fila in zip(DIAS_SEMANA, matriz):
+                    f.write(dia + "," + ",".join(f"{v:.4g}" for v in fila) + "\n")
+            escritos.append(ruta)
+
+    if "npz" in formatos:
+        ruta = os.path.join(carpeta, "sesiones.npz")
+        np.savez(ruta, **columnas)
+        escritos.append(ruta)
+
+    if "parquet" in formatos:
+        ruta = os.path.join(carpeta, "sesiones.parquet")
+        if _exportar_parquet(ruta, columnas):
+            escritos.append(ruta)
+        else:
+            print(" pyarrow no está instalado: se omite sesiones.parquet")
+    return escritos
+
+
+# ============================================================================
+# REPORTE EN CONSOLA Y BENCHMARK
+# ============================================================================
+def imprimir_resumen(sesiones, tipo_cambio=None):
+    resumen = resumen_por_parqueo(sesiones, tipo_cambio)
+    print(f"{len(sesiones):,} estancias cerradas")
+    print(f"{'parqueo':>8} | {'vehículos':>10} | {'prom (min)':>10} | "
+          f"{'ganancias ₡':>14} | {'ganancias $':>12} | {'rotación/día':>12}")
+    for k, parqueo_id in enumerate(resumen["parqueo"]):
+        print(f"{parqueo_id:>8} | {resumen['vehiculos'][k]:>10,} | "
+              f"{resumen['promedio_estancia'][k] / 60:>10.1f} | "
+              f"{resumen['ganancias_colones'][k]:>14,.0f} | "
+              f"{resumen['ganancias_dolares'][k]:>12,.2f} | {resumen['rotacion'][k]:>12.2f}")
+
+    mapa = mapa_horas_pico(sesiones)["llegadas"]
+    if mapa.any():
+        dia, hora = np.unravel_index(mapa.argmax(), mapa.shape)
+        print(f"Hora pico de llegadas: {DIAS_SEMANA[dia]} {hora:02d}:00 ({mapa[dia, hora]:,})")
+
+
+def _generar_bd(ruta, total, parqueos=2, num_espacios=200):
+    """Bitácora sintética con `total` salidas (sin instantáneas)"""
+    from Persistencia import ESQUEMA
+
+    azar = np.random.default_rng(total)
+    salida = time.time() - 90 * SEGUNDOS_DIA + np.sort(azar.uniform(0, 90 * SEGUNDOS_DIA, total))
+    estancia = azar.exponential(1800, total)
+    parqueo = azar.integers(1, parqueos + 1, total)
+    espacio = azar.integers(0, num_espacios, total)
+    costo = estancia * 100
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(ESQUEMA)
+    with conexion:
+        conexion.executemany(
+            "INSERT INTO eventos (ts, tipo, parqueo, espacio, valor, costo) "
+            "VALUES (?, 'liberar', ?, ?, ?, ?)",
+            zip(salida.tolist(), parqueo.tolist(), espacio.tolist(),
+                estancia.tolist(), costo.tolist())
+        )
+    conexion.close()
+
+
+def benchmark(total):
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "bench.db")
+        _generar_bd(ruta, total)
+
+        tiempos = []
+
+        def medir(nombre, funcion, *args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = funcion(*args, **kwargs)
+            tiempos.append((nombre, time.perf_counter() - inicio))
+            return resultado
+
+        sesiones = medir("cargar desde SQLite", Sesiones.desde_bd, ruta)
+        medir("curva de ocupación (5 min)", curva_ocupacion, sesiones)
+        medir("mapa de horas pico", mapa_horas_pico, sesiones)
+        medir("resumen por parqueo", resumen_por_parqueo, sesiones)
+        medir("recobrar con tarifas", recobrar, sesiones)
+        medir("exportar npz", exportar, sesiones, carpeta, ("npz",))
+        medir("exportar parquet", exportar, sesiones, carpeta, ("parquet",))
+        medir("exportar csv", exportar, sesiones, carpeta, ("csv",))
+        diferencias = medir("verificar contadores", verificar_contadores, sesiones, ruta)
+
+    print(f"{total:,} estancias")
+    for nombre, segundos in tiempos:
+        print(f"  {nombre:<28} {segundos:>7.2f} s")
+    print("  verificación:", "OK" if not diferencias else diferencias)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analítica histórica de CEstaciona")
+    parser.add_argument("--bd", default=RUTA_EVENTOS, help="bitácora SQLite de eventos")
+    parser.add_argument("--salida", help="carpeta donde exportar CSV/npz/parquet")
+    parser.add_argument("--formatos", default="csv,npz,parquet")
+    parser.add_argument("--paso", type=float, default=300.0,
+                        help="segundos entre muestras de la curva de ocupación")
+    parser.add_argument("--tipo-cambio", type=float, default=CONFIG['tipo_cambio'])
+    parser.add_argument("--bench", type=int, default=0,
+                        help="medir con N estancias sintéticas y salir")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+    else:
+        try:
+            sesiones = Sesiones.desde_bd(args.bd)
+            imprimir_resumen(sesiones, args.tipo_cambio)
+            diferencias = verificar_contadores(sesiones, args.bd, args.tipo_cambio)
+        except FileNotFoundError as e:
+            print(f" {e} (use --bd para indicar otra)")
+            raise SystemExit(1)
+        except sqlite3.Error as e:
+            print(f" No se pudo leer la bitácora {args.bd}: {e}")
+            raise SystemExit(1)
+        print("Contadores de Parqueo:", "coinciden" if not diferencias else "")
+        for diferencia in diferencias:
+            print("  " + diferencia)
+        if args.salida:
+            for ruta in exportar(sesiones, args.salida, args.formatos.split(","),
+                                 args.paso, args.tipo_cambio):
+                print(" ", ruta)
@@ -1,13 +1,127 @@
-import requests
+import random
 import time
-from typing import Optional, Dict
+import json
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List
 from Variables import logger_com
 
+# requests tarda en importarse: se carga al crear el primer ComunicadorPico
+requests = None
+
+
+def _importar_requests():
+    global requests
+    if requests is None:
+        import requests as modulo
+        requests = modulo
+    return requests
+
+
+# Comandos que fijan un valor absoluto: se pueden suprimir si no cambian nada
+# o descartar si un comando posterior del mismo lote pisa el mismo valor.
+COMANDOS_IDEMPOTENTES = ("set_led", "mover_servo", "mover_servo_boton", "actualizar_display")
+
+
+def _efectos_comando(comando: Dict) -> Optional[Dict]:
+    """Valores de hardware que deja fijados el comando, o None si es relativo"""
+    accion = comando.get("accion")
+    if accion == "set_led":
+        return {("led", int(comando.get("index", 0))): 1 if comando.get("valor") else 0}
+    if accion in ("mover_servo", "mover_servo_boton"):
+        return {"servo": int(comando.get("angulo", 0))}
+    if accion == "actualizar_display":
+        return {"display": int(comando.get("numero", 0)) % 10}
+    if accion == "ocupar":
+        return {("led", 0): 1, ("led", 1): 0}
+    if accion == "liberar":
+        return {("led", 0): 0, ("led", 1): 1}
+    return None
+
+
+def _claves_tocadas(comando: Dict) -> tuple:
+    """Claves de hardware que un comando relativo (toggle) deja indeterminadas"""
+    accion = comando.get("accion")
+    if accion == "toggle_led":
+        return (("led", int(comando.get("espacio", 0))),)
+    if accion == "toggle_aguja":
+        return ("servo",)
+    return ()
+
+
+class InterruptorCircuito:
+    """Circuit breaker para una Pico: cerrado -> abierto -> semiabierto.
+
+    Tras `umbral_fallos` fallos de red seguidos el circuito se abre y las
+    llamadas fallan al instante. Pasada la espera (exponencial con jitter)
+    se deja pasar una sola sonda: si responde se cierra, si no se reabre
+    con el doble de espera.
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    def __init__(self, umbral_fallos: int = 3, espera_base: float = 0.5,
+                 espera_max: float = 30.0, jitter: float = 0.2):
+        self.umbral_fallos = umbral_fallos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.jitter = jitter
+        self.estado = self.CERRADO
+        self.fallos = 0
+        self.aperturas = 0
+        self.proximo_intento = 0.0
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        """True si se puede intentar una petición ahora"""
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            ahora = time.monotonic()
+            if ahora < self.proximo_intento:
+                return False
+            # Solo esta llamada hace de sonda; si nunca informa su resultado
+            # se permite otra sonda tras espera_max.
+            self.estado = self.SEMIABIERTO
+            self.proximo_intento = ahora + self.espera_max
+            return True
+
+    def registrar_exito(self) -> bool:
+        """Cierra el circuito; retorna True si venía de abierto/semiabierto"""
+        with self._lock:
+            reabierto = self.estado != self.CERRADO
+            self.estado = self.CERRADO
+            self.fallos = 0
+            self.aperturas = 0
+            return reabierto
+
+    def registrar_fallo(self) -> bool:
+        """Cuenta un fallo; retorna True si el circuito acaba de abrirse"""
+        with self._lock:
+            self.fallos += 1
+            if self.estado == self.CERRADO and self.fallos < self.umbral_fallos:
+                return False
+            recien_abierto = self.estado == self.CERRADO
+            self.aperturas += 1
+            espera = min(self.espera_max, self.espera_base * 2 ** (self.aperturas - 1))
+            espera *= 1 + random.uniform(-self.jitter, self.jitter)
+            self.proximo_intento = time.monotonic() + espera
+            self.estado = self.ABIERTO
+            return recien_abierto
+
+    def segundos_para_reintento(self) -> float:
+        return max(0.0, self.proximo_intento - time.monotonic())
+
 
 class ComunicadorPico:
     """Maneja la comunicación HTTP con las Raspberry Pi Pico W"""
 
-    def __init__(self, ip: str, puerto: int = 8080, timeout: int = 2):
+    def __init__(self, ip: str, puerto: int = 8080, timeout: int = 2,
+                 pool_size: int = 2, reintentos: int = 1):
         self.ip = ip
         self.puerto = puerto
         self.timeout = timeout
@@ -17,6 +131,71 @@ class ComunicadorPico:
         self.ultimo_estado = None
         self.ultimo_error = None
         self.logger = logger_com
+        self.sesion = self._crear_sesion(pool_size, reintentos)
+        self.lote_pendiente = []
+        self.soporta_lotes = True
+        # Último estado de hardware confirmado por la Pico (None = desconocido)
+        self.hardware_conocido = {}
+        self.estadisticas_cola = {"enviados": 0, "suprimidos": 0, "coalescidos": 0}
+        self.circuito = InterruptorCircuito()
+        # Caché de /estado: con ETag la Pico responde 304 si nada cambió
+        self.etag_estado = None
+        self.estado_cambio = False
+        self.estadisticas_estado = {"completos": 0, "sin_cambios": 0}
+
+    # --------------------------------------------------------------
+    # SESIÓN HTTP PERSISTENTE
+    # --------------------------------------------------------------
+    def _crear_sesion(self, pool_size: int, reintentos: int) -> "requests.Session":
+        """Crea una sesión keep-alive con pool de conexiones hacia la Pico.
+
+        Solo se reintentan fallos de conexión (la petición nunca llegó),
+        así los comandos POST no se ejecutan dos veces.
+        """
+        _importar_requests()
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=reintentos,
+            connect=reintentos,
+            read=False,
+            status=False,
+            backoff_factor=0.1,
+        )
+        adaptador = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        sesion = requests.Session()
+        sesion.mount("http://", adaptador)
+        sesion.headers.update({"Connection": "keep-alive"})
+        return sesion
+
+    # --------------------------------------------------------------
+    # CIRCUIT BREAKER
+    # --------------------------------------------------------------
+    def _circuito_permite(self) -> bool:
+        """False (sin tocar la red) si el circuito está abierto"""
+        if self.circuito.permitir():
+            return True
+        self.ultimo_error = "Circuito abierto"
+        return False
+
+    def _registrar_red(self, exito: bool):
+        """Informa al circuito el resultado de una petición de red"""
+        if exito:
+            if self.circuito.registrar_exito():
+                self.logger.info(f"[BREAKER] {self.ip} responde de nuevo, circuito cerrado")
+            self.conectado = True
+        else:
+            if self.circuito.registrar_fallo():
+                self.logger.warning(
+                    f"[BREAKER] Circuito abierto para {self.ip} "
+                    f"(reintento en {self.circuito.segundos_para_reintento():.1f}s)"
+                )
+            self.conectado = False
 
     # --------------------------------------------------------------
     # ACTIVACIÓN
@@ -33,6 +212,9 @@ class ComunicadorPico:
     def desactivar(self):
         """Desactiva el comunicador"""
         self.activo = self.conectado = False
+        self.hardware_conocido.clear()
+        self.etag_estado = None
+        self.sesion.close()  # libera los sockets del pool; la sesión sigue siendo reutilizable
         self.logger.info(f"[STOP] Comunicador desactivado: {self.ip}:{self.puerto}")
 
     # --------------------------------------------------------------
@@ -40,14 +222,19 @@ class ComunicadorPico:
     # --------------------------------------------------------------
     def verificar_conexion(self) -> bool:
         """Verifica si el Pico está disponible"""
+        if not self._circuito_permite():
+            self.conectado = False
+            return False
+
         try:
-            response = requests.get(f"{self.base_url}/estado", timeout=self.timeout)
+            response = self.sesion.get(f"{self.base_url}/estado", timeout=self.timeout)
+            self._registrar_red(True)
             self.conectado = (response.status_code == 200 or response.ok)
             self.ultimo_error = None
             return self.conectado
 
         except Exception as e:
-            self.conectado = False
+            self._registrar_red(False)
             self.ultimo_error = str(e)
             self.logger.debug(f"Error al verificar conexión {self.ip}: {e}")
             return False
@@ -62,15 +249,30 @@ class ComunicadorPico:
             # Simulación consistente
             return {"status": "simulacion", "mensaje": "Modo simulación"}
 
-        try:
-            comando = {"accion": accion, **kwargs}
-            self.logger.registrar_comando(accion, kwargs)
+        comando = {"accion": accion, **kwargs}
+        if self._es_redundante(comando, self.hardware_conocido):
+            self.estadisticas_cola["suprimidos"] += 1
+            return {"status": "ok", "mensaje": "sin cambios"}
 
-            response = requests.post(
-                f"{self.base_url}/comando",
-                json=comando,
+        self.logger.registrar_comando(accion, kwargs)
+        self.estadisticas_cola["enviados"] += 1
+        resultado = self._post("/comando", comando, accion)
+        self._confirmar([comando], resultado)
+        return resultado
+
+    def _post(self, ruta: str, cuerpo: dict, descripcion: str) -> Dict:
+        """POST JSON a la Pico con el manejo de errores común a comandos y lotes"""
+        if not self._circuito_permite():
+            return {"status": "error", "mensaje": self.ultimo_error}
+
+        try:
+            response = self.sesion.post(
+                f"{self.base_url}{ruta}",
+                json=cuerpo,
                 timeout=self.timeout
             )
+            # Cualquier respuesta HTTP (aunque sea error) prueba que la Pico vive
+            self._registrar_red(True)
 
             if response.status_code == 200 or response.ok:
                 self.ultimo_error = None
@@ -84,40 +286,235 @@ class ComunicadorPico:
             return {"status": "error", "mensaje": self.ultimo_error}
 
         except requests.exceptions.Timeout:
+            self._registrar_red(False)
             self.ultimo_error = "Timeout"
-            self.logger.warning(f"Timeout en {self.ip} (acción: {accion})")
+            self.logger.warning(f"Timeout en {self.ip} (acción: {descripcion})")
 
         except requests.exceptions.ConnectionError:
+            self._registrar_red(False)
             self.ultimo_error = "Sin conexión"
             self.logger.error(f"Sin conexión con {self.ip}")
-            self.conectado = False
 
         except Exception as e:
+            # También libera la prueba del circuito si estaba medio abierto
+            self._registrar_red(False)
             self.ultimo_error = str(e)
-            self.logger.error(f"Error al enviar comando '{accion}': {e}")
+            self.logger.error(f"Error al enviar comando '{descripcion}': {e}")
 
         return {"status": "error", "mensaje": self.ultimo_error}
 
+    # --------------------------------------------------------------
+    # LOTES DE COMANDOS (UN SOLO VIAJE DE RED)
+    # --------------------------------------------------------------
+    def agregar_a_lote(self, accion: str, **kwargs):
+        """Acumula un comando para el próximo enviar_lote()"""
+        self.lote_pendiente.append({"accion": accion, **kwargs})
+
+    def enviar_lote(self, acciones: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """Envía varias acciones en un solo POST /comandos.
+
+        Sin argumentos vacía y envía lo acumulado con agregar_a_lote().
+        La Pico aplica el lote completo o ninguna acción.
+        """
+        if acciones is None:
+            acciones, self.lote_pendiente = self.lote_pendiente, []
+        if not acciones:
+            return {"status": "ok", "resultados": []}
+
+        if not self.activo:
+            return {"status": "simulacion", "mensaje": "Modo simulación"}
+
+        acciones = self._compactar(acciones)
+        if not acciones:
+            return {"status": "ok", "mensaje": "sin cambios", "resultados": []}
+
+        if not self.soporta_lotes:
+            return self._enviar_uno_a_uno(acciones)
+
+        for comando in acciones:
+            self.logger.registrar_comando(comando["accion"], {
+                k: v for k, v in comando.items() if k != "accion"
+            })
+        self.estadisticas_cola["enviados"] += len(acciones)
+        resultado = self._post("/comandos", {"acciones": acciones}, f"lote x{len(acciones)}")
+        if self.ultimo_error != "HTTP 404":
+            self._confirmar(acciones, resultado)
+
+        if self.ultimo_error == "HTTP 404":
+            # Firmware anterior sin /comandos: degradar a comandos sueltos
+            self.logger.warning(f"{self.ip} no soporta /comandos, enviando uno a uno")
+            self.soporta_lotes = False
+            return self._enviar_uno_a_uno(acciones)
+        return resultado
+
+    def _enviar_uno_a_uno(self, acciones: List[Dict]) -> Dict:
+        resultados = []
+        for comando in acciones:
+            parametros = {k: v for k, v in comando.items() if k != "accion"}
+            resultado = self.enviar_comando(comando["accion"], **parametros)
+            resultados.append(resultado)
+            if not resultado or resultado.get("status") != "ok":
+                return {"status": "error", "mensaje": self.ultimo_error, "resultados": resultados}
+        return {"status": "ok", "resultados": resultados}
+
+    # --------------------------------------------------------------
+    # COALESCENCIA Y DEDUPLICACIÓN
+    # --------------------------------------------------------------
+    @staticmethod
+    def _es_redundante(comando: Dict, conocido: Dict) -> bool:
+        if comando.get("accion") not in COMANDOS_IDEMPOTENTES:
+            return False
+        efectos = _efectos_comando(comando)
+        return all(conocido.get(clave) == valor for clave, valor in efectos.items())
+
+    def _compactar(self, acciones: List[Dict]) -> List[Dict]:
+        """Elimina del lote los comandos que no cambiarían el hardware"""
+        # 1) De atrás hacia adelante: un valor fijado más tarde pisa los anteriores
+        fijados = set()
+        vigentes = []
+        for comando in reversed(acciones):
+            efectos = _efectos_comando(comando)
+            if (comando.get("accion") in COMANDOS_IDEMPOTENTES
+                    and fijados.issuperset(efectos)):
+                self.estadisticas_cola["coalescidos"] += 1
+                continue
+            vigentes.append(comando)
+            if efectos:
+                fijados.update(efectos)
+            fijados.difference_update(_claves_tocadas(comando))
+        vigentes.reverse()
+
+        # 2) De adelante hacia atrás: simular el estado conocido y descartar no-cambios
+        simulado = dict(self.hardware_conocido)
+        salida = []
+        for comando in vigentes:
+            if self._es_redundante(comando, simulado):
+                self.estadisticas_cola["suprimidos"] += 1
+                continue
+            salida.append(comando)
+            simulado.update(_efectos_comando(comando) or {})
+            for clave in _claves_tocadas(comando):
+                simulado.pop(clave, None)
+        return salida
+
+    def _confirmar(self, acciones: List[Dict], resultado: Optional[Dict]):
+        """Actualiza el hardware conocido según la respuesta de la Pico"""
+        exito = bool(resultado) and resultado.get("status") == "ok"
+        for comando in acciones:
+            efectos = _efectos_comando(comando) or {}
+            if exito:
+                self.hardware_conocido.update(efectos)
+            else:
+                # Sin confirmación el valor real es incierto
+                for clave in efectos:
+                    self.hardware_conocido.pop(clave, None)
+            for clave in _claves_tocadas(comando):
+                self.hardware_conocido.pop(clave, None)
+
+    def _sincronizar_hardware(self, estado: Dict):
+        """Toma como verdad el hardware reportado por /estado"""
+        leds = estado.get("leds")
+        if isinstance(leds, list):
+            for i, valor in enumerate(leds):
+                self.hardware_conocido[("led", i)] = 1 if valor else 0
+        if "servo" in estado:
+            self.hardware_conocido["servo"] = estado["servo"]
+        if "display" in estado:
+            self.hardware_conocido["display"] = estado["display"]
+
+    def obtener_estadisticas_cola(self) -> Dict:
+        """Contadores de comandos enviados, suprimidos y coalescidos"""
+        return self.estadisticas_cola.copy()
+
     # --------------------------------------------------------------
     # OBTENER ESTADO
     # --------------------------------------------------------------
     def obtener_estado(self) -> Optional[Dict]:
-        """Obtiene el estado actual del parqueo desde la Pico"""
-        if not self.activo:
+        """Obtiene el estado actual del parqueo desde la Pico.
+
+        Envía el ETag de la última respuesta; si la Pico contesta 304 se
+        retorna el estado en caché sin parsear JSON (estado_cambio=False).
+        """
+        if not self.activo or not self._circuito_permite():
             return None
 
-        try:
-            response = requests.get(f"{self.base_url}/estado", timeout=self.timeout)
-            if response.status_code == 200 or response.ok:
-                self.ultimo_estado = response.json()
-                self.ultimo_error = None
-                return self.ultimo_estado
+        headers = {}
+        if self.etag_estado and self.ultimo_estado is not None:
+            headers["If-None-Match"] = self.etag_estado
 
+        try:
+            response = self.sesion.get(
+                f"{self.base_url}/estado", headers=headers, timeout=self.timeout
+            )
         except Exception as e:
+            self._registrar_red(False)
             self.ultimo_error = str(e)
             self.logger.debug(f"Error al obtener estado de {self.ip}: {e}")
+            return None
 
-        return None
+        # Cualquier respuesta HTTP prueba que la Pico vive, aunque el cuerpo no sirva
+        self._registrar_red(True)
+        if response.status_code == 304:
+            self.estadisticas_estado["sin_cambios"] += 1
+            self.estado_cambio = False
+            self.ultimo_error = None
+            return self.ultimo_estado
+        if not (response.status_code == 200 or response.ok):
+            self.ultimo_error = f"HTTP {response.status_code}"
+            return None
+
+        # JSONDecodeError hereda de RequestException: se parsea aparte para
+        # no contar un cuerpo inválido como caída de red
+        try:
+            estado = response.json()
+            if not isinstance(estado, dict):
+                raise ValueError(f"se esperaba un objeto, llegó {type(estado).__name__}")
+        except ValueError as e:
+            self.ultimo_error = "JSON inválido"
+            self.logger.warning(f"Estado inválido de {self.ip}: {e}")
+            return None
+
+        self.ultimo_estado = estado
+        self.etag_estado = response.headers.get("ETag")
+        self.estadisticas_estado["completos"] += 1
+        self.estado_cambio = True
+        self.ultimo_error = None
+        self._sincronizar_hardware(estado)
+        return estado
+
+    # --------------------------------------------------------------
+    # EVENTOS DE BOTONES
+    # --------------------------------------------------------------
+    def suscribir_eventos(self, puerto: int) -> Optional[Dict]:
+        """Pide a la Pico que empuje sus eventos por UDP a este equipo"""
+        return self.enviar_comando("suscribir_eventos", puerto=puerto)
+
+    def obtener_eventos(self, desde: int = 0) -> Optional[Dict]:
+        """Eventos con seq > desde guardados en la Pico (recupera UDP perdidos)"""
+        if not self.activo or not self._circuito_permite():
+            return None
+
+        try:
+            response = self.sesion.get(
+                f"{self.base_url}/eventos", params={"desde": desde}, timeout=self.timeout
+            )
+        except Exception as e:
+            self._registrar_red(False)
+            self.ultimo_error = str(e)
+            self.logger.debug(f"Error al obtener eventos de {self.ip}: {e}")
+            return None
+
+        self._registrar_red(True)
+        if response.status_code != 200:
+            return None
+
+        # Igual que en obtener_estado: un cuerpo inválido no es una caída de red
+        try:
+            return response.json()
+        except ValueError as e:
+            self.ultimo_error = "JSON inválido"
+            self.logger.warning(f"Eventos inválidos de {self.ip}: {e}")
+            return None
 
     # --------------------------------------------------------------
     # MÉTODO AUXILIAR
@@ -156,6 +553,10 @@ class ComunicadorPico:
         """Retorna el estado de conexión como texto"""
         if not self.activo:
             return "Inactivo"
+        if self.circuito.estado == InterruptorCircuito.ABIERTO:
+            return f"Sin respuesta (reintento en {self.circuito.segundos_para_reintento():.0f}s)"
+        if self.circuito.estado == InterruptorCircuito.SEMIABIERTO:
+            return "Reconectando..."
         if self.conectado:
             return "Conectado"
         if self.ultimo_error:
@@ -169,36 +570,61 @@ class ComunicadorPico:
 class GestorComunicaciones:
     """Gestiona múltiples comunicadores"""
 
-    def __init__(self, ips: list, puerto: int = 8080):
+    def __init__(self, ips: list, puerto: int = 8080, max_hilos: int = 16):
         self.comunicadores = [ComunicadorPico(ip, puerto) for ip in ips]
         self.activo = False
         self.logger = logger_com
+        self.max_hilos = max_hilos
+        self._pool = None   # se crea al primer uso y se cierra en desactivar_todos()
+
+    def _en_paralelo(self, funcion) -> Dict[int, object]:
+        """Ejecuta funcion(com) en todas las Picos a la vez; retorna {indice: resultado}"""
+        if self._pool is None:
+            # Un hilo por Pico (con tope): la latencia total es la de la Pico más lenta
+            self._pool = ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_hilos, len(self.comunicadores))),
+                thread_name_prefix="Gestor",
+            )
+        futuros = {
+            i: self._pool.submit(funcion, com)
+            for i, com in enumerate(self.comunicadores)
+        }
+        resultados = {}
+        for i, futuro in futuros.items():
+            try:
+                resultados[i] = futuro.result()
+            except Exception as e:
+                self.logger.error(f"Error en {self.comunicadores[i].ip}: {e}")
+                resultados[i] = None
+        return resultados
 
     def activar_todos(self) -> Dict[int, bool]:
         self.activo = True
         self.logger.info("Activando todos los comunicadores...")
-        resultados = {}
-
-        for i, com in enumerate(self.comunicadores):
-            resultados[i] = com.activar()
-            time.sleep(0.2)
-
-        return resultados
+        return {
+            i: bool(ok)
+            for i, ok in self._en_paralelo(ComunicadorPico.activar).items()
+        }
 
     def desactivar_todos(self):
         self.activo = False
         self.logger.info("Desactivando todos los comunicadores...")
         for com in self.comunicadores:
             com.desactivar()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
 
     def verificar_conexiones(self) -> Dict[int, bool]:
         return {
-            i: com.verificar_conexion() if com.activo else False
-            for i, com in enumerate(self.comunicadores)
+            i: bool(ok)
+            for i, ok in self._en_paralelo(
+                lambda com: com.verificar_conexion() if com.activo else False
+            ).items()
         }
 
     def obtener_estados(self) -> Dict[int, Optional[Dict]]:
-        return {i: com.obtener_estado() for i, com in enumerate(self.comunicadores)}
+        return self._en_paralelo(ComunicadorPico.obtener_estado)
 
     def get_comunicador(self, index: int) -> Optional[ComunicadorPico]:
         return (
@@ -206,3 +632,313 @@ class GestorComunicaciones:
             if 0 <= index < len(self.comunicadores)
             else None
         )
+
+
+
+# ================================================================
+# RECEPTOR DE EVENTOS PUSH (UDP)
+# ================================================================
+class ReceptorEventos:
+    """Recibe por UDP los flancos de botones que empujan las Picos.
+
+    Cada evento trae (arranque, seq); los duplicados y los ya vistos se
+    descartan, así el mismo evento puede llegar por UDP y por la
+    recuperación vía GET /eventos sin dispararse dos veces.
+    """
+
+    def __init__(self, ips: list, puerto: int = 8090):
+        self.puerto = puerto
+        self.indices = {ip: i for i, ip in enumerate(ips)}
+        self.eventos = queue.Queue()
+        self.al_recibir = None
+        self.logger = logger_com
+        self._posicion = {}  # indice -> (arranque, último seq entregado)
+        self._lock = threading.Lock()
+        self._socket = None
+        self._hilo = None
+        self._detener = threading.Event()
+
+    def iniciar(self) -> bool:
+        """Abre el socket UDP y arranca el hilo receptor"""
+        try:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind(("0.0.0.0", self.puerto))
+            self._socket.settimeout(0.5)
+        except OSError as e:
+            self.logger.error(f"[EVENTOS] No se pudo abrir UDP {self.puerto}: {e}")
+            self._socket = None
+            return False
+
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._bucle, name="ReceptorEventos", daemon=True
+        )
+        self._hilo.start()
+        self.logger.info(f"[EVENTOS] Escuchando eventos UDP en puerto {self.puerto}")
+        return True
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(2.0)
+            self._hilo = None
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                datos, (ip, _) = self._socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            indice = self.indices.get(ip)
+            if indice is None:
+                self.logger.debug(f"[EVENTOS] Evento de IP desconocida {ip}")
+                continue
+            try:
+                evento = json.loads(datos)
+            except ValueError:
+                continue
+            self.inyectar(indice, [evento])
+
+    # --------------------------------------------------------------
+    # SECUENCIA Y DEDUPLICACIÓN
+    # --------------------------------------------------------------
+    def fijar_base(self, indice: int, arranque, seq: int):
+        """Punto de partida tras suscribirse: lo anterior no se reprocesa"""
+        with self._lock:
+            if indice not in self._posicion:
+                self._posicion[indice] = (arranque, seq)
+
+    def posicion(self, indice: int):
+        with self._lock:
+            return self._posicion.get(indice)
+
+    def inyectar(self, indice: int, eventos: list) -> int:
+        """Entrega los eventos nuevos (UDP o recuperados); retorna cuántos"""
+        nuevos = 0
+        with self._lock:
+            for evento in sorted(eventos, key=lambda e: e.get("seq", 0)):
+                arranque, seq = evento.get("arranque"), evento.get("seq", 0)
+                previo = self._posicion.get(indice)
+                if previo and previo[0] == arranque and seq <= previo[1]:
+                    continue
+                self._posicion[indice] = (arranque, seq)
+                self.eventos.put((indice, evento))
+                nuevos += 1
+        if nuevos and self.al_recibir:
+            self.al_recibir()
+        return nuevos
+
+    def obtener_eventos(self) -> list:
+        """Retorna (y consume) los eventos [(indice, evento)] pendientes"""
+        pendientes = []
+        while True:
+            try:
+                pendientes.append(self.eventos.get_nowait())
+            except queue.Empty:
+                return pendientes
+
+
+# ================================================================
+# POLLER DE HARDWARE (HILO DE FONDO)
+# ================================================================
+class PollerHardware:
+    """Hilo de fondo dueño de toda la E/S con las Picos.
+
+    La interfaz nunca llama a la red: encola comandos con
+    `encolar_comando()` y recoge los estados publicados con
+    `obtener_snapshots()`, ambos sin bloquear.
+
+    Solo se publican los snapshots que cambiaron y la cola guarda como
+    mucho `max_snapshots` (al llenarse se descarta el más viejo), así una
+    interfaz dormida no acumula estados repetidos.
+    """
+
+    def __init__(self, gestor: GestorComunicaciones, intervalo: float = 0.05,
+                 receptor: Optional[ReceptorEventos] = None,
+                 intervalo_eventos: float = 1.0, intervalo_suscripcion: float = 30.0,
+                 max_snapshots: int = 8, max_comandos: int = 1024):
+        self.gestor = gestor
+        self.intervalo = intervalo
+        self.receptor = receptor
+        self.intervalo_eventos = intervalo_eventos
+        self.intervalo_suscripcion = intervalo_suscripcion
+        self.comandos = queue.Queue(maxsize=max_comandos)
+        self.snapshots = queue.Queue(maxsize=max_snapshots)
+        self.ultimo_snapshot = {}
+        self.al_publicar = None   # se llama solo si el snapshot cambió
+        self.logger = logger_com
+        self._detener = threading.Event()
+        self._hilo = None
+
+    # --------------------------------------------------------------
+    # CICLO DE VIDA
+    # --------------------------------------------------------------
+    def iniciar(self):
+        """Arranca el hilo de sondeo"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._bucle, name="PollerHardware", daemon=True
+        )
+        self._hilo.start()
+        self.logger.info(f"[POLL] Poller iniciado (intervalo {self.intervalo}s)")
+
+    def detener(self, timeout: float = 3.0):
+        """Detiene el hilo y espera a que termine"""
+        self._detener.set()
+        try:
+            self.comandos.put_nowait(None)  # despertar al hilo si está esperando
+        except queue.Full:
+            pass  # la cola llena ya lo despierta
+        if self._hilo:
+            self._hilo.join(timeout)
+            self._hilo = None
+        self.logger.info("[POLL] Poller detenido")
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    # --------------------------------------------------------------
+    # API PARA LA INTERFAZ (NO BLOQUEANTE)
+    # --------------------------------------------------------------
+    def encolar_comando(self, indice: int, accion: str, **kwargs) -> bool:
+        """Encola un comando para la Pico `indice`; retorna de inmediato.
+
+        False si la cola está llena (la Pico no responde y se acumularon).
+        """
+        try:
+            self.comandos.put_nowait((indice, accion, kwargs))
+            return True
+        except queue.Full:
+            self.logger.warning(f"[POLL] Cola de comandos llena: se descarta '{accion}'")
+            return False
+
+    def obtener_snapshots(self) -> List[Dict[int, Dict]]:
+        """Retorna (y consume) los snapshots publicados desde la última llamada"""
+        pendientes = []
+        while True:
+            try:
+                pendientes.append(self.snapshots.get_nowait())
+            except queue.Empty:
+                return pendientes
+
+    # --------------------------------------------------------------
+    # HILO DE FONDO
+    # --------------------------------------------------------------
+    def _bucle(self):
+        proximo_sondeo = time.monotonic()
+        proximo_eventos = proximo_suscripcion = time.monotonic()
+        while not self._detener.is_set():
+            espera = max(0.0, proximo_sondeo - time.monotonic())
+            try:
+                item = self.comandos.get(timeout=espera)
+                if item is not None:
+                    self._procesar_comandos(item)
+            except queue.Empty:
+                pass
+
+            if time.monotonic() >= proximo_sondeo:
+                self._sondear()
+                proximo_sondeo = time.monotonic() + self.intervalo
+
+            if self.receptor:
+                # Las Picos pierden la suscripción al reiniciarse: se renueva
+                if time.monotonic() >= proximo_suscripcion:
+                    self._suscribir()
+                    proximo_suscripcion = time.monotonic() + self.intervalo_suscripcion
+                if time.monotonic() >= proximo_eventos:
+                    self._recuperar_eventos()
+                    proximo_eventos = time.monotonic() + self.intervalo_eventos
+
+    def _procesar_comandos(self, primero):
+        """Vacía la cola y agrupa por Pico: varios comandos viajan en un solo lote"""
+        por_pico = {}
+        item = primero
+        while item is not None:
+            indice, accion, kwargs = item
+            por_pico.setdefault(indice, []).append({"accion": accion, **kwargs})
+            try:
+                item = self.comandos.get_nowait()
+            except queue.Empty:
+                item = None
+
+        for indice, acciones in por_pico.items():
+            self._enviar(indice, acciones)
+
+    def _enviar(self, indice: int, acciones: List[Dict]):
+        comunicador = self.gestor.get_comunicador(indice)
+        if not comunicador or not comunicador.activo:
+            return
+        descripcion = ", ".join(c["accion"] for c in acciones)
+        try:
+            if len(acciones) == 1:
+                parametros = {k: v for k, v in acciones[0].items() if k != "accion"}
+                resultado = comunicador.enviar_comando(acciones[0]["accion"], **parametros)
+            else:
+                resultado = comunicador.enviar_lote(acciones)
+            if not resultado or resultado.get("status") not in ("ok", "simulacion"):
+                self.logger.warning(f"[POLL] Comando(s) '{descripcion}' falló en {comunicador.ip}")
+        except Exception as e:
+            self.logger.error(f"[POLL] Error enviando '{descripcion}' a {comunicador.ip}: {e}")
+
+    def _suscribir(self):
+        for i, com in enumerate(self.gestor.comunicadores):
+            if not com.activo:
+                continue
+            resultado = com.suscribir_eventos(self.receptor.puerto)
+            if resultado and resultado.get("status") == "ok":
+                self.receptor.fijar_base(i, resultado.get("arranque"), resultado.get("seq", 0))
+
+    def _recuperar_eventos(self):
+        """Pide a cada Pico los eventos que el UDP pudo haber perdido"""
+        for i, com in enumerate(self.gestor.comunicadores):
+            base = self.receptor.posicion(i)
+            if not com.activo or base is None:
+                continue
+            arranque, seq = base
+            respuesta = com.obtener_eventos(desde=seq)
+            if respuesta and respuesta.get("arranque") != arranque:
+                # La Pico se reinició: su secuencia volvió a empezar
+                respuesta = com.obtener_eventos(desde=0)
+            if respuesta and respuesta.get("eventos"):
+                self.receptor.inyectar(i, respuesta["eventos"])
+
+    def _sondear(self):
+        try:
+            estados = self.gestor.obtener_estados()
+        except Exception as e:
+            self.logger.error(f"[POLL] Error al sondear estados: {e}")
+            return
+
+        snapshot = {i: e for i, e in estados.items() if e is not None}
+        if not snapshot:
+            return
+
+        if snapshot == self.ultimo_snapshot:
+            return  # nada nuevo: no despertar ni encolar
+        # Asignación atómica: la interfaz puede leerlo sin bloqueo
+        self.ultimo_snapshot = snapshot
+        self._publicar(snapshot)
+        if self.al_publicar:
+            self.al_publicar()
+
+    def _publicar(self, snapshot):
+        """Encola sin bloquear; si la interfaz no consume se pierde el más viejo"""
+        while True:
+            try:
+                self.snapshots.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
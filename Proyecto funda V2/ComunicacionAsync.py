@@ -0,0 +1,334 @@
+import asyncio
+import json
+from typing import Optional, Dict, List, Tuple
+from Variables import logger_com
+
+
+class AsyncComunicadorPico:
+    """Versión asyncio de ComunicadorPico (mismos contratos de retorno).
+
+    Habla HTTP/1.1 directamente sobre asyncio con una conexión keep-alive
+    por Pico, así un solo event loop maneja decenas de parqueos sin hilos.
+    """
+
+    def __init__(self, ip: str, puerto: int = 8080, timeout: float = 2):
+        self.ip = ip
+        self.puerto = puerto
+        self.timeout = timeout
+        self.base_url = f"http://{ip}:{puerto}"
+        self.conectado = False
+        self.activo = False
+        self.ultimo_estado = None
+        self.ultimo_error = None
+        self.logger = logger_com
+        self.lote_pendiente = []
+        self.soporta_lotes = True
+        self._lector = None
+        self._escritor = None
+        self._lock = None
+
+    # --------------------------------------------------------------
+    # CONEXIÓN HTTP PERSISTENTE
+    # --------------------------------------------------------------
+    async def _abrir(self):
+        self._lector, self._escritor = await asyncio.wait_for(
+            asyncio.open_connection(self.ip, self.puerto), self.timeout
+        )
+
+    async def _cerrar(self):
+        escritor, self._lector, self._escritor = self._escritor, None, None
+        if escritor:
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except Exception:
+                pass
+
+    async def _leer_respuesta(self) -> Tuple[int, Dict[str, str], bytes]:
+        linea = await self._lector.readline()
+        if not linea:
+            raise asyncio.IncompleteReadError(b"", None)
+        partes = linea.decode("latin-1").split(" ", 2)
+        status = int(partes[1])
+        headers = {}
+        while True:
+            linea = await self._lector.readline()
+            if linea in (b"\r\n", b"\n", b""):
+                break
+            clave, _, valor = linea.decode("latin-1").partition(":")
+            headers[clave.strip().lower()] = valor.strip()
+        largo = int(headers.get("content-length", 0) or 0)
+        cuerpo = await self._lector.readexactly(largo) if largo else b""
+        return status, headers, cuerpo
+
+    async def _peticion(self, metodo: str, ruta: str,
+                        datos: Optional[Dict] = None) -> Tuple[int, bytes]:
+        """Envía una petición reutilizando la conexión; retorna (status, cuerpo)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+        cabecera = (
+            f"{metodo} {ruta} HTTP/1.1\r\n"
+            f"Host: {self.ip}:{self.puerto}\r\n"
+            "Connection: keep-alive\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n\r\n"
+        ).encode("latin-1")
+
+        async with self._lock:
+            for intento in range(2):
+                reutilizada = self._escritor is not None
+                if not reutilizada:
+                    await self._abrir()
+                try:
+                    self._escritor.write(cabecera + cuerpo)
+                    await self._escritor.drain()
+                    status, headers, respuesta = await asyncio.wait_for(
+                        self._leer_respuesta(), self.timeout
+                    )
+                except asyncio.IncompleteReadError as e:
+                    await self._cerrar()
+                    # La Pico cerró una conexión keep-alive inactiva antes de
+                    # responder: la petición no se procesó, se puede repetir.
+                    if reutilizada and intento == 0 and not e.partial:
+                        continue
+                    raise ConnectionError("Conexión cerrada por la Pico")
+                except BaseException:
+                    await self._cerrar()
+                    raise
+
+                if headers.get("connection", "").lower() == "close":
+                    await self._cerrar()
+                return status, respuesta
+
+    # --------------------------------------------------------------
+    # ACTIVACIÓN
+    # --------------------------------------------------------------
+    async def activar(self) -> bool:
+        """Activa el comunicador y verifica conexión"""
+        if await self.verificar_conexion():
+            self.activo = True
+            self.logger.registrar_conexion_exitosa(self.ip, self.puerto)
+            return True
+        self.logger.registrar_conexion_fallida(self.ip, self.puerto, "No responde")
+        return False
+
+    async def desactivar(self):
+        """Desactiva el comunicador"""
+        self.activo = self.conectado = False
+        await self._cerrar()
+        self.logger.info(f"[STOP] Comunicador desactivado: {self.ip}:{self.puerto}")
+
+    # --------------------------------------------------------------
+    # VERIFICAR CONEXIÓN
+    # --------------------------------------------------------------
+    async def verificar_conexion(self) -> bool:
+        """Verifica si el Pico está disponible"""
+        try:
+            status, _ = await self._peticion("GET", "/estado")
+            self.conectado = status == 200
+            self.ultimo_error = None
+            return self.conectado
+
+        except Exception as e:
+            self.conectado = False
+            self.ultimo_error = str(e) or type(e).__name__
+            self.logger.debug(f"Error al verificar conexión {self.ip}: {self.ultimo_error}")
+            return False
+
+    # --------------------------------------------------------------
+    # ENVÍO DE COMANDOS
+    # --------------------------------------------------------------
+    async def enviar_comando(self, accion: str, **kwargs) -> Optional[Dict]:
+        """Envía un comando al Pico"""
+
+        if not self.activo:
+            # Simulación consistente
+            return {"status": "simulacion", "mensaje": "Modo simulación"}
+
+        comando = {"accion": accion, **kwargs}
+        self.logger.registrar_comando(accion, kwargs)
+        return await self._post("/comando", comando, accion)
+
+    async def _post(self, ruta: str, cuerpo: dict, descripcion: str) -> Dict:
+        """POST JSON a la Pico con el manejo de errores común a comandos y lotes"""
+        try:
+            status, respuesta = await self._peticion("POST", ruta, cuerpo)
+
+            if 200 <= status < 300:
+                self.ultimo_error = None
+                try:
+                    return json.loads(respuesta)
+                except ValueError:
+                    return {"status": "ok", "mensaje": "ok"}
+
+            # Error HTTP
+            self.ultimo_error = f"HTTP {status}"
+            return {"status": "error", "mensaje": self.ultimo_error}
+
+        except asyncio.TimeoutError:
+            self.ultimo_error = "Timeout"
+            self.logger.warning(f"Timeout en {self.ip} (acción: {descripcion})")
+
+        except (ConnectionError, OSError):
+            self.ultimo_error = "Sin conexión"
+            self.logger.error(f"Sin conexión con {self.ip}")
+            self.conectado = False
+
+        except Exception as e:
+            self.ultimo_error = str(e)
+            self.logger.error(f"Error al enviar comando '{descripcion}': {e}")
+
+        return {"status": "error", "mensaje": self.ultimo_error}
+
+    # --------------------------------------------------------------
+    # LOTES DE COMANDOS (UN SOLO VIAJE DE RED)
+    # --------------------------------------------------------------
+    def agregar_a_lote(self, accion: str, **kwargs):
+        """Acumula un comando para el próximo enviar_lote()"""
+        self.lote_pendiente.append({"accion": accion, **kwargs})
+
+    async def enviar_lote(self, acciones: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """Envía varias acciones en un solo POST /comandos (ver ComunicadorPico)"""
+        if acciones is None:
+            acciones, self.lote_pendiente = self.lote_pendiente, []
+        if not acciones:
+            return {"status": "ok", "resultados": []}
+
+        if not self.activo:
+            return {"status": "simulacion", "mensaje": "Modo simulación"}
+
+        if self.soporta_lotes:
+            resultado = await self._post(
+                "/comandos", {"acciones": acciones}, f"lote x{len(acciones)}"
+            )
+            if self.ultimo_error != "HTTP 404":
+                return resultado
+            self.logger.warning(f"{self.ip} no soporta /comandos, enviando uno a uno")
+            self.soporta_lotes = False
+
+        resultados = []
+        for comando in acciones:
+            parametros = {k: v for k, v in comando.items() if k != "accion"}
+            resultado = await self.enviar_comando(comando["accion"], **parametros)
+            resultados.append(resultado)
+            if not resultado or resultado.get("status") != "ok":
+                return {"status": "error", "mensaje": self.ultimo_error, "resultados": resultados}
+        return {"status": "ok", "resultados": resultados}
+
+    # --------------------------------------------------------------
+    # OBTENER ESTADO
+    # --------------------------------------------------------------
+    async def obtener_estado(self) -> Optional[Dict]:
+        """Obtiene el estado actual del parqueo desde la Pico"""
+        if not self.activo:
+            return None
+
+        try:
+            status, respuesta = await self._peticion("GET", "/estado")
+            if status == 200:
+                self.ultimo_estado = json.loads(respuesta)
+                self.ultimo_error = None
+                return self.ultimo_estado
+
+        except Exception as e:
+            self.ultimo_error = str(e) or type(e).__name__
+            self.logger.debug(f"Error al obtener estado de {self.ip}: {self.ultimo_error}")
+
+        return None
+
+    # --------------------------------------------------------------
+    # MÉTODO AUXILIAR
+    # --------------------------------------------------------------
+    async def _ejecutar_comando(self, accion: str, **kwargs) -> bool:
+        resultado = await self.enviar_comando(accion, **kwargs)
+        return bool(resultado) and resultado.get("status") in ("ok", "simulacion")
+
+    # --------------------------------------------------------------
+    # MÉTODOS ESPECÍFICOS (MISMOS NOMBRES QUE ComunicadorPico)
+    # --------------------------------------------------------------
+    async def ocupar_espacio(self, num_espacio: int) -> bool:
+        return await self._ejecutar_comando("ocupar", espacio=num_espacio)
+
+    async def liberar_espacio(self, num_espacio: int) -> bool:
+        return await self._ejecutar_comando("liberar", espacio=num_espacio)
+
+    async def toggle_led(self, num_espacio: int, color: str = "verde") -> bool:
+        return await self._ejecutar_comando("toggle_led", espacio=num_espacio, color=color)
+
+    async def toggle_aguja(self) -> bool:
+        return await self._ejecutar_comando("toggle_aguja")
+
+    async def actualizar_display(self, numero: int) -> bool:
+        return await self._ejecutar_comando("actualizar_display", numero=numero)
+
+    async def mover_servo(self, angulo: int) -> bool:
+        return await self._ejecutar_comando("mover_servo", angulo=angulo)
+
+    async def mover_servo_boton(self, angulo: int) -> bool:
+        return await self._ejecutar_comando("mover_servo_boton", angulo=angulo)
+
+    # --------------------------------------------------------------
+    def get_estado_conexion(self) -> str:
+        """Retorna el estado de conexión como texto"""
+        if not self.activo:
+            return "Inactivo"
+        if self.conectado:
+            return "Conectado"
+        if self.ultimo_error:
+            return f"Error: {self.ultimo_error}"
+        return "Desconectado"
+
+
+# ================================================================
+# GESTOR DE COMUNICACIONES ASÍNCRONO
+# ================================================================
+class AsyncGestorComunicaciones:
+    """Gestiona múltiples AsyncComunicadorPico desde un solo event loop"""
+
+    def __init__(self, ips: list, puerto: int = 8080):
+        self.comunicadores = [AsyncComunicadorPico(ip, puerto) for ip in ips]
+        self.activo = False
+        self.logger = logger_com
+
+    async def _en_paralelo(self, funcion) -> Dict[int, object]:
+        resultados = await asyncio.gather(
+            *(funcion(com) for com in self.comunicadores),
+            return_exceptions=True,
+        )
+        salida = {}
+        for i, resultado in enumerate(resultados):
+            if isinstance(resultado, Exception):
+                self.logger.error(f"Error en {self.comunicadores[i].ip}: {resultado}")
+                resultado = None
+            salida[i] = resultado
+        return salida
+
+    async def activar_todos(self) -> Dict[int, bool]:
+        self.activo = True
+        self.logger.info("Activando todos los comunicadores...")
+        resultados = await self._en_paralelo(lambda com: com.activar())
+        return {i: bool(ok) for i, ok in resultados.items()}
+
+    async def desactivar_todos(self):
+        self.activo = False
+        self.logger.info("Desactivando todos los comunicadores...")
+        await self._en_paralelo(lambda com: com.desactivar())
+
+    async def verificar_conexiones(self) -> Dict[int, bool]:
+        async def verificar(com):
+            return await com.verificar_conexion() if com.activo else False
+
+        resultados = await self._en_paralelo(verificar)
+        return {i: bool(ok) for i, ok in resultados.items()}
+
+    async def obtener_estados(self) -> Dict[int, Optional[Dict]]:
+        return await self._en_paralelo(lambda com: com.obtener_estado())
+
+    def get_comunicador(self, index: int) -> Optional[AsyncComunicadorPico]:
+        return (
+            self.comunicadores[index]
+            if 0 <= index < len(self.comunicadores)
+            else None
+        )
@@ -0,0 +1,321 @@
+#===========================================================================
+# Controlador del parqueo: comandos, botones físicos y comunicación.
+# No depende de pygame; lo usan la interfaz (main.py) y el servicio
+# sin pantalla (Servicio.py).
+#===========================================================================
+from datetime import datetime
+from Variables import logger_com, CONFIG
+from Modelo import Parqueo
+from Persistencia import AlmacenEventos
+from Tarifas import crear_motor
+from Estadisticas import AgregadorEstadisticas
+from Comunicacion import GestorComunicaciones, PollerHardware, ReceptorEventos
+# ============================================================================
+# CLASE BASE CON LA LÓGICA DEL PARQUEO
+# ============================================================================
+class ControladorParqueo:
+    def __init__(self):
+        self.running = True
+        self.config = CONFIG.copy()
+        
+        # Tarifa de cada parqueo (CONFIG['tarifa_por_10seg'] y 'tarifas_parqueo')
+        self.tarifas = crear_motor(self.config)
+        # Parqueos con comunicación remota (uno por IP en CONFIG['parqueos'])
+        self.parqueos = [
+            Parqueo(i + 1, ip_pico=ip, puerto=self.config['puerto'],
+                    num_espacios=self.config['espacios_por_parqueo'],
+                    tarifa=self.tarifas.tarifa(i + 1))
+            for i, ip in enumerate(self.config['parqueos'])
+        ]
+        for parqueo in self.parqueos:
+            parqueo.al_cambiar_libres(self.al_cambiar_libres)
+        # Estado del sistema
+        self.logger = logger_com
+        self.historial_comandos = []
+        self.max_historial = 10
+        self.comunicadores_activos = False
+        self.gestor_comunicaciones = None
+        self.poller = None
+        self.receptor_eventos = None
+        # Se llama desde los hilos de comunicación cuando llega algo nuevo
+        self.al_despertar = None
+        # Bitácora de eventos: recupera ocupación y totales del arranque anterior
+        self.almacen = None
+        if self.config.get('persistencia'):
+            almacen = AlmacenEventos()
+            if almacen.iniciar():
+                self.almacen = almacen
+                self.historial_comandos = almacen.restaurar(self.parqueos, self.max_historial)
+        # Ventanas móviles de llegadas, ocupación, estancia e ingresos
+        self.agregador = AgregadorEstadisticas(self.parqueos)
+
+    def registrar_evento(self, tipo, parqueo_id=None, **datos):
+        """Encola el evento para el escritor (no toca el disco en este hilo)"""
+        if self.almacen:
+            parqueo = self.parqueos[parqueo_id].id if parqueo_id is not None else None
+            self.almacen.registrar(tipo, parqueo, **datos)
+            if self.almacen.toca_instantanea:
+                self.guardar_instantanea()
+
+    def guardar_instantanea(self):
+        """Acota la cola de eventos a re-aplicar en el próximo arranque"""
+        if self.almacen:
+            self.almacen.guardar_instantanea([p.instantanea() for p in self.parqueos])
+
+    def quit(self):
+        self.running = False
+
+    # ========================================================================
+    # COMUNICACIÓN CON RASPBERRY PI
+    # ========================================================================
+    # Inicializar comunicadores
+    def inicializar_comunicadores(self):
+        try:
+            print("\n" + "="*60)
+            print(" INICIALIZANDO COMUNICACIÓN CON RASPBERRY PI PICO W")
+            print("="*60)
+            
+            ips = list(self.config['parqueos'])
+            
+            self.gestor_comunicaciones = GestorComunicaciones(
+                ips=ips,
+                puerto=self.config['puerto']
+            )
+            
+            resultados = self.gestor_comunicaciones.activar_todos()
+            
+            print("\n Resultados de conexión:")
+            for parqueo_id, conectado in resultados.items():
+                ip = ips[parqueo_id]
+                estado = "CONECTADO" if conectado else "NO DISPONIBLE"
+                if conectado:
+                    print(f"   Parqueo {parqueo_id + 1} ({ip}): {estado}")
+                    self.logger.registrar_conexion_exitosa(ip, 8080)
+                    self.parqueos[parqueo_id].activo = True
+                else:
+                    print(f"  Parqueo {parqueo_id + 1} ({ip}): {estado}")
+                    self.logger.registrar_conexion_fallida(ip, 8080, "No responde")
+            
+            self.comunicadores_activos = any(resultados.values())
+            
+            if self.comunicadores_activos:
+                # Botones por push UDP (si el puerto está libre)
+                if self.config.get('puerto_eventos'):
+                    self.receptor_eventos = ReceptorEventos(ips, self.config['puerto_eventos'])
+                    self.receptor_eventos.al_recibir = self.al_despertar
+                    if not self.receptor_eventos.iniciar():
+                        self.receptor_eventos = None
+                
+                # Desde aquí toda la E/S con las Picos ocurre en el poller
+                self.poller = PollerHardware(
+                    self.gestor_comunicaciones, receptor=self.receptor_eventos
+                )
+                self.poller.al_publicar = self.al_despertar
+                self.poller.iniciar()
+                print("\n Sistema en MODO COMUNICACIÓN REAL")
+            else:
+                print("\n  Sistema en MODO SIMULACIÓN (sin conexión)")
+            
+            print("="*60 + "\n")
+            
+        except Exception as e:
+            print(f"\n Error al inicializar comunicadores: {e}")
+            print("  Sistema operará en MODO SIMULACIÓN\n")
+            self.logger.error(f"Inicialización: {e}")
+            self.comunicadores_activos = False
+    
+    def enviar_a_pico(self, parqueo_id, accion, **kwargs):
+        """Encola un comando para la Pico del parqueo sin bloquear el render"""
+        if not self.poller or not self.gestor_comunicaciones:
+            return False
+        comunicador = self.gestor_comunicaciones.get_comunicador(parqueo_id)
+        if not comunicador or not comunicador.activo:
+            return False
+        return self.poller.encolar_comando(parqueo_id, accion, **kwargs)
+
+    def agregar_a_historial(self, comando_texto):
+        self.registrar_evento("historial", detalle=comando_texto)
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.historial_comandos.append(f"[{timestamp}] {comando_texto}")
+        
+        if len(self.historial_comandos) > self.max_historial:
+            self.historial_comandos.pop(0)
+
+    # ========================================================================
+    # COMANDOS CON COMUNICACIÓN 
+    # ========================================================================
+    
+    def toggle_led(self, parqueo_id, espacio_id):
+        print(f"\n [COMANDO] Toggle LED - Parqueo {parqueo_id + 1}, Espacio {espacio_id + 1}")
+        
+        self.parqueos[parqueo_id].espacios[espacio_id].toggle_led()
+        nuevo_estado = self.parqueos[parqueo_id].espacios[espacio_id].led_encendido
+        self.registrar_evento("led", parqueo_id, espacio=espacio_id, valor=int(nuevo_estado))
+        
+        self.agregar_a_historial(f"LED P{parqueo_id+1} E{espacio_id+1}: {'ON' if nuevo_estado else 'OFF'}")
+        # La Pico no tiene un LED por espacio (sus LEDs siguen al parqueo
+        # completo, ver sincronizar_leds): este LED vive solo en pantalla
+        print("     LED del espacio solo en pantalla")
+    
+    def toggle_aguja(self, parqueo_id):
+        print(f"\n [COMANDO] Toggle Aguja - Parqueo {parqueo_id + 1}")
+        
+        self.parqueos[parqueo_id].toggle_aguja()
+        nuevo_estado = self.parqueos[parqueo_id].aguja_abierta
+        self.registrar_evento("aguja", parqueo_id, valor=int(nuevo_estado))
+        
+        self.agregar_a_historial(f"Aguja P{parqueo_id+1}: {'ABIERTA' if nuevo_estado else 'CERRADA'}")
+        
+        if self.comunicadores_activos and self.gestor_comunicaciones:
+            if self.enviar_a_pico(parqueo_id, "toggle_aguja"):
+                print(f"  Comando encolado")
+                self.logger.registrar_comando("toggle_aguja", {"parqueo": parqueo_id})
+    
+    def ocupar_espacio(self, parqueo_id, espacio_id):
+        print(f"\n [COMANDO] Ocupar Espacio - Parqueo {parqueo_id + 1}, Espacio {espacio_id + 1}")
+        
+        resultado = self.parqueos[parqueo_id].espacios[espacio_id].ocupar()
+        
+        if resultado:
+            entrada = self.parqueos[parqueo_id].espacios[espacio_id].hora_entrada
+            self.registrar_evento("ocupar", parqueo_id, espacio=espacio_id, ts=entrada.timestamp())
+            self.agregador.registrar_entrada(self.parqueos[parqueo_id].id, entrada.timestamp())
+            print(f" Espacio marcado como OCUPADO")
+            self.agregar_a_historial(f"Ocupar P{parqueo_id+1} E{espacio_id+1}")
+            # Display y LEDs de la Pico los actualiza al_cambiar_libres
+    
+    def liberar_espacio(self, parqueo_id, espacio_id):
+        print(f"\n [COMANDO] Liberar Espacio - Parqueo {parqueo_id + 1}, Espacio {espacio_id + 1}")
+        
+        tiempo = self.parqueos[parqueo_id].espacios[espacio_id].liberar()
+        
+        if tiempo > 0:
+            costo = self.parqueos[parqueo_id].registrar_salida(tiempo)
+            self.registrar_evento("liberar", parqueo_id, espacio=espacio_id, valor=tiempo, costo=costo)
+            self.agregador.registrar_salida(self.parqueos[parqueo_id].id, tiempo, costo)
+            
+            print(f"   Espacio liberado")
+            print(f"     Tiempo: {tiempo:.1f}s")
+            print(f"    Costo: ₡{costo:.0f}")
+            
+            self.agregar_a_historial(f"Liberar P{parqueo_id+1} E{espacio_id+1} - ₡{costo:.0f}")
+
+    def al_cambiar_libres(self, parqueo, libres):
+        """El display de 7 segmentos y los LEDs solo se actualizan cuando el conteo cambia"""
+        if self.comunicadores_activos:
+            self.enviar_a_pico(parqueo.id - 1, "actualizar_display", numero=libres)
+            self.sincronizar_leds(parqueo.id - 1)
+
+    def detener_comunicaciones(self):
+        if self.poller:
+            self.poller.detener()
+        if self.receptor_eventos:
+            self.receptor_eventos.detener()
+        if self.gestor_comunicaciones:
+            self.gestor_comunicaciones.desactivar_todos()
+        if self.almacen:
+            self.guardar_instantanea()   # arranque siguiente sin eventos que re-aplicar
+            self.almacen.detener()
+
+    # ========================================================================
+    # TIPO DE CAMBIO
+    # ========================================================================
+
+    def actualizar_tipo_cambio(self):
+        import requests  # solo hace falta al pulsar "Actualizar Tipo Cambio"
+
+        print("\n[TC] Actualizando tipo de cambio...")
+        try:
+            resp = requests.get('https://api.exchangerate.host/latest?base=USD&symbols=CRC', timeout=6)
+            if resp.status_code == 200:
+                j = resp.json()
+                if 'rates' in j and 'CRC' in j['rates']:
+                    rate = float(j['rates']['CRC'])
+                    self.config['tipo_cambio'] = rate
+                    print(f" Tipo de cambio actualizado: ₡{rate}")
+                    self.agregar_a_historial(f"TC actualizado: ₡{rate:.2f}")
+                    return
+        except:
+            pass
+
+        try:
+            response = requests.get('https://api.hacienda.go.cr/indicadores/tc/dolar', timeout=6)
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data, dict) and 'venta' in data:
+                    self.config['tipo_cambio'] = float(data['venta'])
+                    print(f"  Tipo de cambio actualizado: ₡{self.config['tipo_cambio']}")
+                    self.agregar_a_historial(f"TC actualizado: ₡{self.config['tipo_cambio']:.2f}")
+                    return
+        except Exception as e:
+            print(f"   Error: {e}")
+
+        print(f"  No se pudo actualizar, usando: ₡{self.config['tipo_cambio']}")
+
+    # ========================================================================
+    # INTEGRACIÓN CON HARDWARE (BOTONES FÍSICOS)
+    # ========================================================================
+    
+    def leer_hardware_raspberry(self):
+        """Procesa eventos de botones y estados publicados por el poller (no bloquea)"""
+        if not self.comunicadores_activos or not self.poller:
+            return
+        
+        # Con eventos push cada pulsación llega una sola vez; el nivel
+        # btn1/btn2 de /estado solo se usa si no hay receptor.
+        usar_eventos = self.receptor_eventos is not None
+        if usar_eventos:
+            for parqueo_id, evento in self.receptor_eventos.obtener_eventos():
+                if evento.get("tipo") == "presionado":
+                    self.procesar_boton(parqueo_id, evento.get("boton"))
+        
+        for snapshot in self.poller.obtener_snapshots():
+            for parqueo_id, estado in snapshot.items():
+                if not usar_eventos:
+                    if estado.get("btn1", 0) == 1:
+                        self.procesar_boton(parqueo_id, 1)
+                    if estado.get("btn2", 0) == 1:
+                        self.procesar_boton(parqueo_id, 2)
+                
+                self.sincronizar_leds(parqueo_id)
+    
+    def procesar_boton(self, parqueo_id, boton):
+        """Acciones de un botón físico de la Pico.
+
+        El botón 1 ocupa el primer espacio libre y el 2 libera el espacio
+        ocupado hace más tiempo. El parqueo 1 además mueve la aguja; los
+        LEDs siguen al conteo de libres (al_cambiar_libres).
+        """
+        if not 0 <= parqueo_id < len(self.parqueos):
+            return
+        parqueo = self.parqueos[parqueo_id]
+
+        # BOTÓN 1 = OCUPAR ESPACIO + ABRIR BARRERA
+        if boton == 1:
+            espacio = parqueo.primer_libre()
+            if espacio is not None:
+                self.ocupar_espacio(parqueo_id, espacio)
+            if parqueo_id == 0:
+                self.toggle_aguja(0)
+            self.enviar_a_pico(parqueo_id, "mover_servo", angulo=90)
+        
+        # BOTÓN 2 = LIBERAR ESPACIO + CERRAR BARRERA
+        elif boton == 2:
+            espacio = parqueo.ocupado_mas_antiguo()
+            if espacio is not None:
+                self.liberar_espacio(parqueo_id, espacio)
+            if parqueo_id == 0:
+                self.toggle_aguja(0)
+            self.enviar_a_pico(parqueo_id, "mover_servo", angulo=0)
+    
+    def sincronizar_leds(self, parqueo_id):
+        """LEDs de la Pico según el parqueo completo: rojo = lleno, verde = hay espacio.
+
+        Cada Pico tiene un solo par rojo/verde, así que refleja el parqueo y
+        no un espacio. Los set_led repetidos los suprime el comunicador.
+        """
+        if not 0 <= parqueo_id < len(self.parqueos):
+            return
+        lleno = self.parqueos[parqueo_id].espacios_disponibles() == 0
+        self.enviar_a_pico(parqueo_id, "set_led", index=0, valor=int(lleno))      # Rojo
+        self.enviar_a_pico(parqueo_id, "set_led", index=1, valor=int(not lleno))  # Verde
@@ -0,0 +1,268 @@
+#===========================================================================
+# Estadísticas en streaming: ventanas móviles por parqueo (hora/día/semana)
+#
+# Cada entrada o salida actualiza contadores en O(1): la cubeta de tiempo
+# actual de cada ventana y los totales de la ventana. Al caducar una
+# cubeta se restan sus valores de los totales. La pantalla de estadísticas
+# lee `resumen()`, que se recalcula solo si hubo eventos o cambió la
+# cubeta; si no, retorna el mismo diccionario.
+#
+# Las ventanas empiezan vacías al arrancar; los totales históricos siguen
+# saliendo de los contadores de cada Parqueo.
+#===========================================================================
+import math
+import time
+from collections import deque
+
+# nombre -> (duración en segundos, cantidad de cubetas)
+VENTANAS = {
+    "hora": (3600, 60),          # cubetas de 1 min
+    "dia": (86400, 96),          # cubetas de 15 min
+    "semana": (7 * 86400, 168),  # cubetas de 1 h
+}
+ETIQUETAS = {"hora": "Última hora", "dia": "Último día", "semana": "Última semana"}
+
+CUANTILES = (0.5, 0.9)
+
+
+# ============================================================================
+# BOSQUEJO DE CUANTILES (HISTOGRAMA LOGARÍTMICO)
+# ============================================================================
+class BosquejoCuantiles:
+    """Histograma con cubetas de tamaño geométrico (estilo DDSketch).
+
+    Agregar es O(1) y cualquier cuantil sale con error relativo menor a
+    `precision`. Dos bosquejos con la misma precisión se suman o restan
+    cubeta a cubeta, así una ventana puede descartar lo que caducó.
+    """
+    __slots__ = ("_log_gamma", "conteos", "ceros", "total")
+
+    def __init__(self, precision: float = 0.02):
+        self._log_gamma = math.log((1 + precision) / (1 - precision))
+        self.conteos = {}
+        self.ceros = 0
+        self.total = 0
+
+    def agregar(self, valor: float):
+        self.total += 1
+        if valor <= 0:
+            self.ceros += 1
+            return
+        indice = math.ceil(math.log(valor) / self._log_gamma)
+        self.conteos[indice] = self.conteos.get(indice, 0) + 1
+
+    def sumar(self, otro, signo: int = 1):
+        self.total += signo * otro.total
+        self.ceros += signo * otro.ceros
+        for indice, n in otro.conteos.items():
+            restante = self.conteos.get(indice, 0) + signo * n
+            if restante:
+                self.conteos[indice] = restante
+            else:
+                del self.conteos[indice]
+
+    def cuantil(self, q: float) -> float:
+        if not self.total:
+            return 0.0
+        rango = q * (self.total - 1)
+        visto = self.ceros
+        if rango < visto:
+            return 0.0
+        for indice in sorted(self.conteos):
+            visto += self.conteos[indice]
+            if rango < visto:
+                # Punto medio (relativo) de la cubeta
+                gamma = math.exp(self._log_gamma)
+                return 2 * gamma ** indice / (gamma + 1)
+        return 0.0
+
+
+# ============================================================================
+# VENTANA MÓVIL POR CUBETAS
+# ============================================================================
+class _Cubeta:
+    __slots__ = ("indice", "llegadas", "salidas", "estancia", "ingresos",
+                 "ocupacion_seg", "bosquejo")
+
+    def __init__(self, indice=None):
+        self.indice = indice
+        self.llegadas = 0
+        self.salidas = 0
+        self.estancia = 0.0
+        self.ingresos = 0.0
+        self.ocupacion_seg = 0.0
+        self.bosquejo = BosquejoCuantiles()
+
+
+class VentanaMovil:
+    """Últimos `duracion` segundos divididos en `cubetas` cubetas.
+
+    `totales` es la suma de las cubetas vivas y se mantiene al día al
+    agregar (suma) y al caducar (resta), sin recorrer la ventana.
+    """
+
+    def __init__(self, duracion: float, cubetas: int):
+        self.duracion = duracion
+        self.cubetas = cubetas
+        self.ancho = duracion / cubetas
+        self._cola = deque()
+        self.totales = _Cubeta()
+
+    def indice(self, ts: float) -> int:
+        return int(ts // self.ancho)
+
+    def expirar(self, ts: float):
+        limite = self.indice(ts) - self.cubetas
+        while self._cola and self._cola[0].indice <= limite:
+            vieja = self._cola.popleft()
+            t = self.totales
+            t.llegadas -= vieja.llegadas
+            t.salidas -= vieja.salidas
+            t.estancia -= vieja.estancia
+            t.ingresos -= vieja.ingresos
+            t.ocupacion_seg -= vieja.ocupacion_seg
+            t.bosquejo.sumar(vieja.bosquejo, -1)
+
+    def _cubeta(self, ts: float) -> _Cubeta:
+        self.expirar(ts)
+        indice = self.indice(ts)
+        if not self._cola or self._cola[-1].indice < indice:
+            self._cola.append(_Cubeta(indice))
+        return self._cola[-1]
+
+    def llegada(self, ts):
+        self._cubeta(ts).llegadas += 1
+        self.totales.llegadas += 1
+
+    def salida(self, ts, estancia, costo):
+        for c in (self._cubeta(ts), self.totales):
+            c.salidas += 1
+            c.estancia += estancia
+            c.ingresos += costo
+            c.bosquejo.agregar(estancia)
+
+    def ocupacion(self, desde, hasta, ocupados):
+        """Suma ocupados * segundos de [desde, hasta) repartido por cubeta"""
+        if ocupados <= 0:
+            return
+        desde = max(desde, hasta - self.duracion)   # lo anterior ya caducó
+        while desde < hasta:
+            fin = min(hasta, (self.indice(desde) + 1) * self.ancho)
+            segundos = ocupados * (fin - desde)
+            self._cubeta(desde).ocupacion_seg += segundos
+            self.totales.ocupacion_seg += segundos
+            desde = fin
+
+
+# ============================================================================
+# ESTADÍSTICAS DE UN PARQUEO
+# ============================================================================
+class EstadisticasParqueo:
+    """Ventanas de un parqueo (o del sistema completo) y su resumen en caché"""
+
+    def __init__(self, num_espacios, ocupados=0, ahora=None):
+        self.num_espacios = num_espacios
+        self.ocupados = ocupados
+        self.inicio = self._ultimo = time.time() if ahora is None else ahora
+        self.ventanas = {nombre: VentanaMovil(*spec) for nombre, spec in VENTANAS.items()}
+        self.version = 0
+        self._resumenes = {}    # ventana -> (clave, resumen)
+
+    def _avanzar(self, ts):
+        """Acredita la ocupación desde el último evento hasta `ts`"""
+        if ts > self._ultimo:
+            for ventana in self.ventanas.values():
+                ventana.ocupacion(self._ultimo, ts, self.ocupados)
+            self._ultimo = ts
+
+    def entrada(self, ts):
+        self._avanzar(ts)
+        for ventana in self.ventanas.values():
+            ventana.llegada(ts)
+        self.ocupados += 1
+        self.version += 1
+
+    def salida(self, ts, estancia, costo):
+        self._avanzar(ts)
+        for ventana in self.ventanas.values():
+            ventana.salida(ts, estancia, costo)
+        self.ocupados = max(0, self.ocupados - 1)
+        self.version += 1
+
+    def resumen(self, nombre: str, ahora=None) -> dict:
+        ahora = time.time() if ahora is None else ahora
+        ventana = self.ventanas[nombre]
+        clave = (self.version, ventana.indice(ahora))
+        guardado = self._resumenes.get(nombre)
+        if guardado and guardado[0] == clave:
+            return guardado[1]
+
+        self._avanzar(ahora)
+        ventana.expirar(ahora)
+        t = ventana.totales
+        cubierto = min(ventana.duracion, ahora - self.inicio)
+        resumen = {
+            "llegadas": t.llegadas,
+            "salidas": t.salidas,
+            "ingresos": t.ingresos,
+            "promedio_estancia": t.estancia / t.salidas if t.salidas else 0.0,
+            "ocupacion": (t.ocupacion_seg / (cubierto * self.num_espacios)
+                          if cubierto > 0 and self.num_espacios else 0.0),
+            "rotacion": t.salidas / self.num_espacios if self.num_espacios else 0.0,
+        }
+        for q in CUANTILES:
+            resumen[f"p{int(q * 100)}"] = t.bosquejo.cuantil(q)
+        self._resumenes[nombre] = (clave, resumen)
+        return resumen
+
+
+# ============================================================================
+# AGREGADOR DE TODOS LOS PARQUEOS
+# ============================================================================
+class AgregadorEstadisticas:
+    """Estadísticas por parqueo y del sistema, alimentadas por el controlador.
+
+    También lleva los totales históricos del sistema (vehículos, estancia,
+    ganancias) para no sumar los parqueos en cada frame.
+    """
+
+    def __init__(self, parqueos):
+        ahora = time.time()
+        self.por_parqueo = {
+            p.id: EstadisticasParqueo(p.num_espacios, p.num_espacios - p.espacios_disponibles(), ahora)
+            for p in parqueos
+        }
+        self.sistema = EstadisticasParqueo(
+            sum(p.num_espacios for p in parqueos),
+            sum(e.ocupados for e in self.por_parqueo.values()), ahora
+        )
+        self.vehiculos_totales = sum(p.vehiculos_totales for p in parqueos)
+        self.tiempo_total_estancia = sum(p.tiempo_total_estancia for p in parqueos)
+        self.ganancias_colones = sum(p.ganancias_colones for p in parqueos)
+
+    @property
+    def version(self) -> int:
+        return self.sistema.version
+
+    def registrar_entrada(self, parqueo_id, ts=None):
+        ts = time.time() if ts is None else ts
+        self.por_parqueo[parqueo_id].entrada(ts)
+        self.sistema.entrada(ts)
+
+    def registrar_salida(self, parqueo_id, estancia, costo, ts=None):
+        ts = time.time() if ts is None else ts
+        self.por_parqueo[parqueo_id].salida(ts, estancia, costo)
+        self.sistema.salida(ts, estancia, costo)
+        self.vehiculos_totales += 1
+        self.tiempo_total_estancia += estancia
+        self.ganancias_colones += costo
+
+    def promedio_estancia(self) -> float:
+        if self.vehiculos_totales > 0:
+            return self.tiempo_total_estancia / self.vehiculos_totales
+        return 0
+
+    def resumen(self, parqueo_id, ventana: str, ahora=None) -> dict:
+        """Resumen en caché; `parqueo_id=None` para el sistema completo"""
+        estadisticas = self.sistema if parqueo_id is None else self.por_parqueo[parqueo_id]
+        return estadisticas.resumen(ventana, ahora)
@@ -0,0 +1,301 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+import pygame
+from Variables import NEGRO, RUTA_CACHE_FONDO
+
+VERSION_CACHE = 2  # subir si cambia la forma de componer los frames
+
+
+class ReproductorFondo:
+    """Reproduce el GIF de fondo decodificando frames bajo demanda.
+
+    Un hilo decodifica y pre-compone (alpha + capa oscura) solo los
+    `ventana` frames siguientes a la posición actual; los ya mostrados se
+    descartan. Mientras el primer frame no esté listo se pinta un color
+    sólido, así el menú aparece de inmediato.
+
+    La primera pasada guarda los frames ya compuestos en `dir_cache` a la
+    resolución del GIF (no de la pantalla); los arranques siguientes los
+    leen con mmap sin tocar PIL y los escalan al convertirlos a Surface.
+    """
+
+    def __init__(self, ruta_gif, tamano, color_base=NEGRO, alpha=200,
+                 oscurecer=120, ventana=8, delay_ms=50, dir_cache=RUTA_CACHE_FONDO):
+        self.ruta_gif = ruta_gif
+        self.tamano = tamano
+        self.tamano_frames = None     # resolución del GIF (la de los frames guardados)
+        self.color_base = color_base
+        self.alpha = alpha
+        self.oscurecer = oscurecer
+        self.ventana = ventana
+        self.delay_ms = delay_ms
+
+        self.dir_cache = dir_cache
+        self.frame_actual = 0
+        self.total_frames = None      # se conoce al terminar la primera pasada
+        self.error = None
+        self.desde_cache = False
+        self._mmap = None
+        self._archivo_cache = None
+        self._decodificados = OrderedDict()   # indice -> bytes RGB (hilo -> UI)
+        self._superficies = OrderedDict()     # indice -> Surface ya convertida
+        self._reciclada = None                # Surface descartada, destino del próximo escalado
+        self._ultimo_cambio = 0
+        self._cond = threading.Condition()
+        self._detener = False
+        self._hilo = None
+
+    # --------------------------------------------------------------
+    # CICLO DE VIDA
+    # --------------------------------------------------------------
+    def iniciar(self):
+        if self._abrir_cache():
+            self.desde_cache = True
+            print(f" GIF desde caché: {self.total_frames} frames")
+            return
+        self._hilo = threading.Thread(
+            target=self._decodificar, name="ReproductorFondo", daemon=True
+        )
+        self._hilo.start()
+
+    def detener(self):
+        with self._cond:
+            self._detener = True
+            self._cond.notify_all()
+        self._superficies.clear()
+        self._reciclada = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._archivo_cache.close()
+            self._mmap = None
+
+    @property
+    def listo(self) -> bool:
+        """True cuando ya hay al menos un frame para mostrar"""
+        return self._mmap is not None or bool(self._superficies) or bool(self._decodificados)
+
+    # --------------------------------------------------------------
+    # CACHÉ EN DISCO (FRAMES RGB CRUDOS + MMAP)
+    # --------------------------------------------------------------
+    @property
+    def _bytes_por_frame(self) -> int:
+        return self.tamano_frames[0] * self.tamano_frames[1] * 3
+
+    @property
+    def _nombre_gif(self) -> str:
+        return os.path.splitext(os.path.basename(self.ruta_gif))[0]
+
+    def _clave_cache(self):
+        """Hash del GIF + parámetros de composición (no depende de la pantalla)"""
+        try:
+            with open(self.ruta_gif, "rb") as f:
+                contenido = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+        parametros = f"a{self.alpha}-o{self.oscurecer}-" \
+                     f"{'_'.join(map(str, self.color_base))}-v{VERSION_CACHE}"
+        return f"{self._nombre_gif}-{contenido[:16]}-{parametros}"
+
+    def _es_cache_propio(self, nombre) -> bool:
+        """Archivos de caché de este GIF (cualquier versión); nunca los .tmp"""
+        patron = rf"{re.escape(self._nombre_gif)}-[0-9a-f]{{16}}-.+\.(frames|json)"
+        return re.fullmatch(patron, nombre) is not None
+
+    def _rutas_cache(self, clave):
+        base = os.path.join(self.dir_cache, clave)
+        return base + ".frames", base + ".json"
+
+    def _abrir_cache(self) -> bool:
+        clave = self._clave_cache()
+        if not clave:
+            return False
+        ruta_frames, ruta_meta = self._rutas_cache(clave)
+        try:
+            with open(ruta_meta, encoding="utf-8") as f:
+                meta = json.load(f)
+            archivo = open(ruta_frames, "rb")
+        except (OSError, ValueError):
+            return False
+
+        total = int(meta.get("frames", 0))
+        tamano = meta.get("tamano")
+        if (total <= 0 or not isinstance(tamano, list) or len(tamano) != 2
+                or os.fstat(archivo.fileno()).st_size != total * tamano[0] * tamano[1] * 3):
+            archivo.close()
+            return False
+
+        self.tamano_frames = (int(tamano[0]), int(tamano[1]))
+        self._archivo_cache = archivo
+        self._mmap = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.total_frames = total
+        return True
+
+    def _guardar_cache(self, ruta_tmp, total):
+        """Publica el caché escrito en la primera pasada y borra los obsoletos"""
+        clave = self._clave_cache()
+        if not clave:
+            return
+        ruta_frames, ruta_meta = self._rutas_cache(clave)
+        try:
+            os.replace(ruta_tmp, ruta_frames)
+            ruta_meta_tmp = f"{ruta_meta}.{os.getpid()}.tmp"
+            with open(ruta_meta_tmp, "w", encoding="utf-8") as f:
+                json.dump({"frames": total, "tamano": list(self.tamano_frames),
+                           "gif": self.ruta_gif}, f)
+            os.replace(ruta_meta_tmp, ruta_meta)  # el .json marca el caché como completo
+            # Solo cachés viejos de este mismo GIF: lo demás (incluidos los
+            # .tmp que otro proceso esté escribiendo) no es nuestro
+            for nombre in os.listdir(self.dir_cache):
+                if self._es_cache_propio(nombre) and not nombre.startswith(clave + "."):
+                    os.remove(os.path.join(self.dir_cache, nombre))
+        except OSError as e:
+            print(f" No se pudo guardar caché del GIF: {e}")
+
+    # --------------------------------------------------------------
+    # HILO DECODIFICADOR
+    # --------------------------------------------------------------
+    def _distancia(self, indice: int) -> int:
+        """Frames que faltan para que la reproducción llegue a `indice`"""
+        if self.total_frames:
+            return (indice - self.frame_actual) % self.total_frames
+        return indice - self.frame_actual
+
+    def _componer(self, frame) -> bytes:
+        from PIL import Image
+
+        # Se compone a la resolución del GIF; el escalado a pantalla es en _superficie
+        frame_rgba = frame.convert("RGBA")
+        mascara = frame_rgba.getchannel("A").point(lambda a: a * self.alpha // 255)
+        compuesto = Image.new("RGB", frame_rgba.size, self.color_base)
+        compuesto.paste(frame_rgba.convert("RGB"), mask=mascara)
+        luz = 255 - self.oscurecer
+        return compuesto.point(lambda v: v * luz // 255).tobytes()
+
+    def _decodificar(self):
+        try:
+            from PIL import Image, ImageSequence
+            gif = Image.open(self.ruta_gif)
+            self.tamano_frames = gif.size
+        except Exception as e:
+            self.error = str(e)
+            print(f" Error al cargar GIF: {e}")
+            return
+
+        # La primera pasada escribe cada frame compuesto al caché en disco
+        ruta_tmp = None
+        salida = None
+        try:
+            os.makedirs(self.dir_cache, exist_ok=True)
+            ruta_tmp = os.path.join(self.dir_cache, f"escribiendo-{os.getpid()}.tmp")
+            salida = open(ruta_tmp, "wb")
+        except OSError as e:
+            print(f" Caché de GIF deshabilitado: {e}")
+
+        while not self._detener:
+            total = 0
+            for indice, frame in enumerate(ImageSequence.Iterator(gif)):
+                total = indice + 1
+                with self._cond:
+                    # Esperar a que la reproducción consuma la ventana
+                    while (not self._detener and indice not in self._decodificados
+                           and self._distancia(indice) >= self.ventana):
+                        self._cond.wait(0.5)
+                    if self._detener:
+                        if salida:
+                            salida.close()
+                            os.remove(ruta_tmp)
+                        return
+                    if indice in self._decodificados or indice in self._superficies:
+                        continue
+                datos = self._componer(frame)
+                if salida:
+                    salida.write(datos)
+                with self._cond:
+                    self._decodificados[indice] = datos
+
+            if self.total_frames is None:
+                self.total_frames = total
+                print(f" GIF en streaming: {total} frames (ventana {self.ventana})")
+                if salida:
+                    salida.close()
+                    salida = None
+                    self._guardar_cache(ruta_tmp, total)
+            if total <= self.ventana:
+                return  # todos los frames caben en la ventana: no hace falta re-decodificar
+
+    # --------------------------------------------------------------
+    # REPRODUCCIÓN (HILO DE LA UI)
+    # --------------------------------------------------------------
+    def actualizar(self, ahora_ms: int, delay_ms=None) -> bool:
+        """Avanza al siguiente frame si ya pasó el delay y está decodificado.
+
+        `delay_ms` reemplaza al del GIF (p.ej. más lento en reposo).
+        """
+        delay_ms = self.delay_ms if delay_ms is None else delay_ms
+        if ahora_ms - self._ultimo_cambio <= delay_ms:
+            return False
+
+        siguiente = self.frame_actual + 1
+        if self.total_frames:
+            siguiente %= self.total_frames
+        if (self._mmap is None and siguiente not in self._superficies
+                and siguiente not in self._decodificados):
+            return False  # el decodificador va atrasado: repetir el frame actual
+
+        with self._cond:
+            self.frame_actual = siguiente
+            self._ultimo_cambio = ahora_ms
+            self._descartar_viejos()
+            self._cond.notify_all()
+        return True
+
+    def ms_para_siguiente(self, ahora_ms: int, delay_ms=None) -> int:
+        """Milisegundos hasta que toque mostrar el próximo frame"""
+        delay_ms = self.delay_ms if delay_ms is None else delay_ms
+        if not self.listo:
+            return delay_ms
+        # Si el decodificador va atrasado no tiene sentido girar a 1 ms
+        return max(delay_ms // 4, delay_ms + 1 - (ahora_ms - self._ultimo_cambio))
+
+    def _descartar_viejos(self):
+        for cache in (self._decodificados, self._superficies):
+            for indice in [i for i in cache if self._distancia(i) > self.ventana or self._distancia(i) < 0]:
+                descartado = cache.pop(indice)
+                if cache is self._superficies:
+                    self._reciclada = descartado
+
+    def _superficie(self, indice: int):
+        superficie = self._superficies.get(indice)
+        if superficie is not None:
+            return superficie
+        if self._mmap is not None:
+            inicio = indice * self._bytes_por_frame
+            datos = memoryview(self._mmap)[inicio:inicio + self._bytes_por_frame]
+        else:
+            with self._cond:
+                datos = self._decodificados.pop(indice, None)
+        if datos is None:
+            return None
+        superficie = pygame.image.frombuffer(datos, self.tamano_frames, "RGB").convert()
+        if self.tamano_frames != tuple(self.tamano):
+            # Escalado simple (smoothscale cuesta ~3x más por frame); se
+            # escribe sobre la Surface del frame descartado para no reservar otra
+            destino, self._reciclada = self._reciclada, None
+            if destino is not None and destino.get_size() == tuple(self.tamano):
+                superficie = pygame.transform.scale(superficie, self.tamano, destino)
+            else:
+                superficie = pygame.transform.scale(superficie, self.tamano)
+        self._superficies[indice] = superficie
+        return superficie
+
+    def dibujar(self, screen):
+        superficie = self._superficie(self.frame_actual)
+        if superficie is None:
+            screen.fill(self.color_base)
+        else:
+            screen.blit(superficie, (0, 0))
@@ -0,0 +1,201 @@
+#===========================================================================
+# Modelo del parqueo (sin pygame ni red): espacios, parqueos y sus
+# estadísticas. Los comandos a la Pico los envía el controlador.
+#===========================================================================
+import time
+from array import array
+from datetime import datetime
+from Variables import logger_com, CONFIG
+from Tarifas import crear_motor
+# ============================================================================
+# CLASE ESPACIO DEL PARQUEO (VISTA SOBRE LOS ARREGLOS DEL PARQUEO)
+# ============================================================================
+class EspacioParqueo:
+    """Un espacio del parqueo; su estado vive en los bitsets de `Parqueo`"""
+    __slots__ = ("parqueo", "id")
+
+    def __init__(self, parqueo, id_espacio):
+        self.parqueo = parqueo
+        self.id = id_espacio
+
+    @property
+    def ocupado(self) -> bool:
+        return bool(self.parqueo._ocupados >> self.id & 1)
+
+    @property
+    def led_encendido(self) -> bool:
+        return bool(self.parqueo._leds >> self.id & 1)
+
+    @property
+    def hora_entrada(self):
+        entrada = self.parqueo._entradas[self.id]
+        return datetime.fromtimestamp(entrada) if self.ocupado else None
+        # Ocupar y Liberar espacio
+    def ocupar(self):
+        return self.parqueo.ocupar(self.id)
+        # Liberar espacio
+    def liberar(self):
+        return self.parqueo.liberar(self.id)
+        # Alternar estado del LED
+    def toggle_led(self):
+        self.parqueo.toggle_led(self.id)
+# ============================================================================
+# CLASE PARQUEO CON SU CONFIGURACION Y CARACTERISTICAS 
+# ============================================================================
+class Parqueo:
+    """Parqueo de `num_espacios` espacios.
+
+    Ocupación y LEDs se guardan como bitsets (bit i = espacio i) y las horas
+    de entrada en un array('d'). El conteo de libres se mantiene al ocupar y
+    liberar, y cada cambio se avisa a los suscritos con `al_cambiar_libres`.
+    """
+
+    def __init__(self, id_parqueo, ip_pico=None, puerto=8080, num_espacios=None, tarifa=None):
+        self.id = id_parqueo
+        self.tarifa = tarifa or crear_motor().tarifa(id_parqueo)
+        self.num_espacios = num_espacios or CONFIG['espacios_por_parqueo']
+        self._ocupados = 0
+        self._leds = (1 << self.num_espacios) - 1       # LED encendido = libre
+        self._entradas = array('d', bytes(8 * self.num_espacios))
+        self._libres = self.num_espacios
+        self._oyentes = []          # callbacks (parqueo, libres) al moverse el conteo
+        self.verificar = CONFIG.get('verificar_contadores', False)
+        self.espacios = [EspacioParqueo(self, i) for i in range(self.num_espacios)]
+        self.aguja_abierta = False
+        self.vehiculos_totales = 0
+        self.tiempo_total_estancia = 0
+        self.ganancias_colones = 0
+        self.activo = False         # la Pico respondió al activar (lo marca el controlador)
+        
+        self.ip_pico = ip_pico
+        self.puerto = puerto
+        # Ocupar espacio
+    def ocupar(self, espacio):
+        bit = 1 << espacio
+        if self._ocupados & bit:
+            return False
+        self._ocupados |= bit
+        self._leds &= ~bit
+        self._entradas[espacio] = time.time()
+        self._libres -= 1
+        self._notificar()
+        return True
+        # Liberar espacio; retorna los segundos de estancia (0 si ya estaba libre)
+    def liberar(self, espacio):
+        bit = 1 << espacio
+        if not self._ocupados & bit:
+            return 0
+        self._ocupados &= ~bit
+        self._leds |= bit
+        self._libres += 1
+        self._notificar()
+        return time.time() - self._entradas[espacio]
+        # Alternar LED de un espacio
+    def toggle_led(self, espacio):
+        self._leds ^= 1 << espacio
+        # Primer espacio libre (None si está lleno)
+    def primer_libre(self):
+        libre = (~self._ocupados & (self._ocupados + 1)).bit_length() - 1
+        return libre if libre < self.num_espacios else None
+        # Espacio ocupado hace más tiempo (None si está vacío)
+    def ocupado_mas_antiguo(self):
+        ocupados = [i for i in range(self.num_espacios) if self._ocupados >> i & 1]
+        return min(ocupados, key=self._entradas.__getitem__, default=None)
+        # Resumen comparable del estado (para saber si hay que redibujar)
+    def firma(self):
+        return self._ocupados, self._leds, self.aguja_abierta
+        # Espacios disponibles (contador incremental)
+    def espacios_disponibles(self):
+        if self.verificar:
+            self.verificar_contador()
+        return self._libres
+        # Comparar el contador con el bitset (modo de verificación)
+    def verificar_contador(self):
+        real = self.num_espacios - self._ocupados.bit_count()
+        if real != self._libres:
+            raise AssertionError(
+                f"Parqueo {self.id}: contador de libres {self._libres} != {real}"
+            )
+        # Suscribirse a los cambios del número de espacios libres
+    def al_cambiar_libres(self, callback):
+        self._oyentes.append(callback)
+
+    def _notificar(self):
+        if self.verificar:
+            self.verificar_contador()
+        for callback in self._oyentes:
+            try:
+                callback(self, self._libres)
+            except Exception as e:
+                logger_com.error(f"Parqueo {self.id} | Error en aviso de cambio: {e}")
+        # Alternar aguja (no cambia los libres: el display no se toca)
+    def toggle_aguja(self):
+        self.aguja_abierta = not self.aguja_abierta
+        # Registrar salida de vehículo (cobra con la tarifa del parqueo)
+    def registrar_salida(self, tiempo_estancia):
+        self.vehiculos_totales += 1
+        self.tiempo_total_estancia += tiempo_estancia
+        salida = time.time()
+        costo = self.tarifa.precio(salida - tiempo_estancia, salida)
+        self.ganancias_colones += costo
+        return costo
+        # Re-aplicar un evento guardado (restauración: sin avisos ni display)
+    def aplicar_evento(self, tipo, espacio, ts, valor=None, costo=None):
+        if espacio is not None and not 0 <= espacio < self.num_espacios:
+            return  # el parqueo tenía más espacios cuando se guardó
+        if tipo == "ocupar":
+            bit = 1 << espacio
+            if not self._ocupados & bit:
+                self._libres -= 1
+            self._ocupados |= bit
+            self._leds &= ~bit
+            self._entradas[espacio] = ts
+        elif tipo == "liberar":
+            bit = 1 << espacio
+            if self._ocupados & bit:
+                self._libres += 1
+            self._ocupados &= ~bit
+            self._leds |= bit
+            self.vehiculos_totales += 1
+            self.tiempo_total_estancia += valor or 0
+            self.ganancias_colones += costo or 0
+        elif tipo == "aguja":
+            self.aguja_abierta = bool(valor)
+        elif tipo == "led":
+            if valor:
+                self._leds |= 1 << espacio
+            else:
+                self._leds &= ~(1 << espacio)
+        # Estado compacto para las instantáneas de la bitácora
+    def instantanea(self):
+        return {
+            "parqueo": self.id,
+            "num_espacios": self.num_espacios,
+            "ocupados": format(self._ocupados, "x"),
+            "leds": format(self._leds, "x"),
+            "entradas": self._entradas.tobytes(),
+            "aguja": int(self.aguja_abierta),
+            "vehiculos": self.vehiculos_totales,
+            "tiempo_total": self.tiempo_total_estancia,
+            "ganancias": self.ganancias_colones,
+        }
+        # Cargar una instantánea (si cambió num_espacios se recorta o se completa libre)
+    def restaurar_instantanea(self, datos):
+        mascara = (1 << self.num_espacios) - 1
+        nuevos = mascara & ~((1 << datos["num_espacios"]) - 1)
+        self._ocupados = int(datos["ocupados"], 16) & mascara
+        self._leds = (int(datos["leds"], 16) | nuevos) & mascara
+        entradas = array('d')
+        entradas.frombytes(datos["entradas"])
+        n = min(len(entradas), self.num_espacios)
+        self._entradas[:n] = entradas[:n]
+        self._libres = self.num_espacios - self._ocupados.bit_count()
+        self.aguja_abierta = bool(datos["aguja"])
+        self.vehiculos_totales = datos["vehiculos"]
+        self.tiempo_total_estancia = datos["tiempo_total"]
+        self.ganancias_colones = datos["ganancias"]
+        # Promedio de estancia
+    def promedio_estancia(self):
+        if self.vehiculos_totales > 0:
+            return self.tiempo_total_estancia / self.vehiculos_totales
+        return 0
@@ -0,0 +1,369 @@
+#===========================================================================
+# Persistencia: bitácora de eventos del parqueo en SQLite (modo WAL)
+#
+# Cada ocupar/liberar/aguja/LED se agrega a una tabla solo-anexar desde un
+# hilo escritor que agrupa los eventos en un commit por lote. El hilo de la
+# UI solo encola una tupla, así ocupar_espacio/liberar_espacio no esperan
+# al disco. Cada tanto se guarda una instantánea compacta de cada parqueo;
+# al arrancar se carga la última y se re-aplican solo los eventos
+# posteriores, así la restauración no crece con el historial.
+#
+#   python Persistencia.py --bench          # restauración vs. tamaño del historial
+#===========================================================================
+import argparse
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from Variables import logger_com, RUTA_EVENTOS
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL    NOT NULL,
+    tipo     TEXT    NOT NULL,
+    parqueo  INTEGER,
+    espacio  INTEGER,
+    valor    REAL,
+    costo    REAL,
+    detalle  TEXT
+);
+CREATE INDEX IF NOT EXISTS eventos_tipo ON eventos (tipo, id);
+CREATE TABLE IF NOT EXISTS instantaneas (
+    parqueo      INTEGER PRIMARY KEY,
+    evento_id    INTEGER NOT NULL,
+    ts           REAL    NOT NULL,
+    num_espacios INTEGER NOT NULL,
+    ocupados     TEXT    NOT NULL,
+    leds         TEXT    NOT NULL,
+    entradas     BLOB    NOT NULL,
+    aguja        INTEGER NOT NULL,
+    vehiculos    INTEGER NOT NULL,
+    tiempo_total REAL    NOT NULL,
+    ganancias    REAL    NOT NULL
+);
+"""
+
+COLUMNAS_INSTANTANEA = ("parqueo", "num_espacios", "ocupados", "leds", "entradas",
+                        "aguja", "vehiculos", "tiempo_total", "ganancias")
+
+_FIN = object()   # marca en la cola para que el escritor termine
+
+
+class _Instantanea:
+    """Entrada de la cola: estado de todos los parqueos tras los eventos previos"""
+    __slots__ = ("parqueos", "ts")
+
+    def __init__(self, parqueos):
+        self.parqueos = parqueos
+        self.ts = time.time()
+
+
+# ============================================================================
+# ALMACÉN DE EVENTOS
+# ============================================================================
+class AlmacenEventos:
+    """Log solo-anexar de eventos con commits agrupados en un hilo aparte.
+
+    Tipos de evento:
+      ocupar    espacio, ts = hora de entrada
+      liberar   espacio, valor = segundos de estancia, costo = colones
+      aguja     valor = 1 abierta / 0 cerrada
+      led       espacio, valor = 1 encendido / 0 apagado
+      historial detalle = texto mostrado en el historial de comandos
+
+    El escritor espera hasta `intervalo_commit` segundos (o `lote_max`
+    eventos) antes de hacer commit; ante un corte se pierde como mucho ese
+    intervalo.
+
+    Cada `cada_eventos` eventos `toca_instantanea` pasa a True y el dueño
+    de los parqueos llama `guardar_instantanea()`. La instantánea viaja por
+    la misma cola, así queda anclada al último evento escrito antes que
+    ella y se guarda en la misma transacción.
+    """
+
+    def __init__(self, ruta=RUTA_EVENTOS, intervalo_commit: float = 0.25,
+                 lote_max: int = 512, cada_eventos: int = 1000):
+        self.ruta = ruta
+        self.intervalo_commit = intervalo_commit
+        self.lote_max = lote_max
+        self.cada_eventos = cada_eventos
+        self.logger = logger_com
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._sin_instantanea = 0
+        self.estadisticas = {"eventos": 0, "commits": 0, "instantaneas": 0, "errores": 0}
+
+    # --------------------------------------------------------------
+    # CICLO DE VIDA
+    # --------------------------------------------------------------
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=5.0)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")   # en WAL sigue siendo seguro ante cortes
+        return conexion
+
+    def iniciar(self) -> bool:
+        """Crea el esquema y arranca el escritor; False si no se pudo abrir"""
+        try:
+            conexion = self._conectar()
+            conexion.executescript(ESQUEMA)
+            conexion.close()
+        except sqlite3.Error as e:
+            self.logger.error(f"Persistencia | No se pudo abrir {self.ruta}: {e}")
+            return False
+
+        self._hilo = threading.Thread(
+            target=self._escribir, name="AlmacenEventos", daemon=True
+        )
+        self._hilo.start()
+        self.logger.info(f"Persistencia | Eventos en {self.ruta} (WAL)")
+        return True
+
+    def detener(self):
+        """Escribe lo pendiente y cierra el hilo escritor"""
+        if self._hilo is None:
+            return
+        self._cola.put(_FIN)
+        self._hilo.join(timeout=5.0)
+        self._hilo = None
+        self.logger.info(
+            f"Persistencia | {self.estadisticas['eventos']} eventos en "
+            f"{self.estadisticas['commits']} commits"
+        )
+
+    # --------------------------------------------------------------
+    # REGISTRO (HILO DE LA UI: SOLO ENCOLA)
+    # --------------------------------------------------------------
+    def registrar(self, tipo, parqueo=None, espacio=None, valor=None,
+                  costo=None, detalle=None, ts=None):
+        if self._hilo is None:
+            return
+        self._cola.put((ts if ts is not None else time.time(),
+                        tipo, parqueo, espacio, valor, costo, detalle))
+        self._sin_instantanea += 1
+
+    @property
+    def toca_instantanea(self) -> bool:
+        return self._sin_instantanea >= self.cada_eventos
+
+    def guardar_instantanea(self, parqueos: list):
+        """`parqueos`: lista de Parqueo.instantanea() tomada en este hilo"""
+        if self._hilo is None:
+            return
+        self._cola.put(_Instantanea(parqueos))
+        self._sin_instantanea = 0
+
+    # --------------------------------------------------------------
+    # HILO ESCRITOR
+    # --------------------------------------------------------------
+    def _escribir(self):
+        try:
+            conexion = self._conectar()
+        except sqlite3.Error as e:
+            self.logger.error(f"Persistencia | Escritor sin conexión: {e}")
+            return
+
+        terminar = False
+        while not terminar:
+            item = self._cola.get()
+            if item is _FIN:
+                break
+            lote = [item]
+            limite = time.monotonic() + self.intervalo_commit
+            # Juntar lo que llegue durante el intervalo en un solo commit
+            while len(lote) < self.lote_max:
+                restante = limite - time.monotonic()
+                try:
+                    item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _FIN:
+                    terminar = True
+                    break
+                lote.append(item)
+            self._guardar_lote(conexion, lote)
+
+        conexion.close()
+
+    def _guardar_lote(self, conexion, lote):
+        instantaneas = sum(isinstance(item, _Instantanea) for item in lote)
+        eventos = len(lote) - instantaneas
+        pendientes = []
+        try:
+            with conexion:
+                for item in lote:
+                    if isinstance(item, _Instantanea):
+                        # Primero los eventos anteriores: la instantánea ya los incluye
+                        _insertar_eventos(conexion, pendientes)
+                        pendientes = []
+                        _insertar_instantanea(conexion, item)
+                    else:
+                        pendientes.append(item)
+                _insertar_eventos(conexion, pendientes)
+            self.estadisticas["eventos"] += eventos
+            self.estadisticas["instantaneas"] += instantaneas
+            self.estadisticas["commits"] += 1
+        except sqlite3.Error as e:
+            self.estadisticas["errores"] += 1
+            self.logger.error(f"Persistencia | Se perdieron {eventos} eventos: {e}")
+
+    # --------------------------------------------------------------
+    # RESTAURACIÓN (AL ARRANCAR)
+    # --------------------------------------------------------------
+    def restaurar(self, parqueos, max_historial: int = 10, usar_instantaneas: bool = True,
+                  conexion=None) -> list:
+        """Carga la última instantánea de cada parqueo y re-aplica los eventos
+        posteriores; retorna el historial reciente.
+
+        Con `usar_instantaneas=False` re-aplica toda la bitácora (benchmark).
+        Con `conexion` (p.ej. de solo lectura) se lee por ella sin tocar los
+        PRAGMA, y los errores de SQLite se propagan en vez de registrarse.
+        """
+        inicio = time.perf_counter()
+        por_id = {parqueo.id: parqueo for parqueo in parqueos}
+        propia = conexion is None
+        if propia:
+            try:
+                conexion = self._conectar()
+            except sqlite3.Error as e:
+                self.logger.error(f"Persistencia | No se pudo restaurar: {e}")
+                return []
+
+        try:
+            # Último evento incluido en la instantánea de cada parqueo
+            desde = dict.fromkeys(por_id, 0)
+            if usar_instantaneas:
+                for fila in conexion.execute(
+                        f"SELECT evento_id, {', '.join(COLUMNAS_INSTANTANEA)} FROM instantaneas"):
+                    datos = dict(zip(COLUMNAS_INSTANTANEA, fila[1:]))
+                    parqueo = por_id.get(datos["parqueo"])
+                    if parqueo is not None:
+                        parqueo.restaurar_instantanea(datos)
+                        desde[parqueo.id] = fila[0]
+
+            total = 0
+            for id_evento, ts, tipo, parqueo_id, espacio, valor, costo in conexion.execute(
+                    "SELECT id, ts, tipo, parqueo, espacio, valor, costo FROM eventos "
+                    "WHERE id > ? AND tipo != 'historial' ORDER BY id",
+                    (min(desde.values(), default=0),)):
+                parqueo = por_id.get(parqueo_id)
+                if parqueo is not None and id_evento > desde[parqueo_id]:
+                    parqueo.aplicar_evento(tipo, espacio, ts, valor, costo)
+                    total += 1
+
+            recientes = conexion.execute(
+                "SELECT ts, detalle FROM eventos WHERE tipo = 'historial' "
+                "ORDER BY id DESC LIMIT ?", (max_historial,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            if not propia:
+                raise
+            self.logger.error(f"Persistencia | Error al restaurar: {e}")
+            return []
+        finally:
+            if propia:
+                conexion.close()
+
+        self.ultima_restauracion = {"eventos": total, "ms": (time.perf_counter() - inicio) * 1000}
+        if total or any(desde.values()):
+            self.logger.info(
+                f"Persistencia | Restaurado: instantánea + {total} eventos "
+                f"en {self.ultima_restauracion['ms']:.1f} ms"
+            )
+        return [f"[{datetime.fromtimestamp(ts).strftime('%H:%M:%S')}] {detalle}"
+                for ts, detalle in reversed(recientes)]
+
+
+def _insertar_eventos(conexion, eventos):
+    if eventos:
+        conexion.executemany(
+            "INSERT INTO eventos (ts, tipo, parqueo, espacio, valor, costo, detalle) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", eventos
+        )
+
+
+def _insertar_instantanea(conexion, instantanea):
+    (ultimo,) = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()
+    conexion.executemany(
+        f"INSERT OR REPLACE INTO instantaneas (evento_id, ts, {', '.join(COLUMNAS_INSTANTANEA)}) "
+        f"VALUES (?, ?, {', '.join('?' * len(COLUMNAS_INSTANTANEA))})",
+        [(ultimo, instantanea.ts, *(datos[c] for c in COLUMNAS_INSTANTANEA))
+         for datos in instantanea.parqueos]
+    )
+
+
+# ============================================================================
+# BENCHMARK: RESTAURACIÓN VS. TAMAÑO DEL HISTORIAL
+# ============================================================================
+def _generar_historial(ruta, total, parqueos, cada_eventos):
+    """Escribe `total` eventos sintéticos (entradas y salidas al azar) con
+    instantáneas cada `cada_eventos`, como lo haría el controlador"""
+    azar = random.Random(total)
+    almacen = AlmacenEventos(ruta, cada_eventos=cada_eventos)
+    conexion = almacen._conectar()
+    conexion.executescript(ESQUEMA)
+    ts = time.time() - total * 30
+    lote = []
+    for i in range(1, total + 1):
+        ts += azar.expovariate(1 / 30)
+        parqueo = azar.choice(parqueos)
+        espacio = azar.randrange(parqueo.num_espacios)
+        if parqueo.espacios[espacio].ocupado:
+            estancia = ts - parqueo._entradas[espacio]
+            evento = (ts, "liberar", parqueo.id, espacio, estancia, estancia * 100, None)
+        else:
+            evento = (ts, "ocupar", parqueo.id, espacio, None, None, None)
+        parqueo.aplicar_evento(evento[1], espacio, ts, evento[4], evento[5])
+        lote.append(evento)
+        # Desfasada media vuelta para que siempre quede una cola que re-aplicar
+        if i % cada_eventos == cada_eventos // 2:
+            with conexion:
+                _insertar_eventos(conexion, lote)
+                _insertar_instantanea(conexion, _Instantanea([p.instantanea() for p in parqueos]))
+            lote = []
+    with conexion:
+        _insertar_eventos(conexion, lote)   # cola sin instantánea, como tras un corte
+    conexion.close()
+    return almacen
+
+
+def benchmark(tamanos, num_espacios=200, cada_eventos=1000):
+    from Modelo import Parqueo
+
+    print(f"{'eventos':>10} | {'completa (ms)':>14} | {'instantánea + cola (ms)':>24} | cola")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for total in tamanos:
+            ruta = os.path.join(carpeta, f"bench-{total}.db")
+            originales = [Parqueo(i + 1, num_espacios=num_espacios) for i in range(2)]
+            almacen = _generar_historial(ruta, total, originales, cada_eventos)
+
+            tiempos = {}
+            for usar in (False, True):
+                parqueos = [Parqueo(i + 1, num_espacios=num_espacios) for i in range(2)]
+                almacen.restaurar(parqueos, usar_instantaneas=usar)
+                tiempos[usar] = dict(almacen.ultima_restauracion)
+                for original, restaurado in zip(originales, parqueos):
+                    assert original.firma() == restaurado.firma()
+                    assert original.vehiculos_totales == restaurado.vehiculos_totales
+                    assert abs(original.ganancias_colones - restaurado.ganancias_colones) < 1e-3
+            print(f"{total:>10,} | {tiempos[False]['ms']:>14.1f} | "
+                  f"{tiempos[True]['ms']:>24.1f} | {tiempos[True]['eventos']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bitácora de eventos de CEstaciona")
+    parser.add_argument("--bench", action="store_true",
+                        help="medir la restauración con historiales de distinto tamaño")
+    parser.add_argument("--tamanos", default="1000,10000,100000,1000000",
+                        help="cantidades de eventos separadas por coma")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark([int(t) for t in args.tamanos.split(",")])
+    else:
+        parser.print_help()
@@ -0,0 +1,206 @@
+import time
+from collections import OrderedDict
+import pygame
+
+# Evento que los hilos de comunicación publican para despertar el loop
+EVENTO_HARDWARE = pygame.USEREVENT + 1
+
+
+# ================================================================
+# CACHÉ DE TEXTOS RENDERIZADOS
+# ================================================================
+class CacheTextos:
+    """Guarda las superficies de font.render() para no rasterizar cada frame.
+
+    La clave es (fuente, texto, antialias, color); al pasar de `capacidad`
+    se descarta el texto usado hace más tiempo. Las superficies devueltas
+    son compartidas: solo deben usarse para blit.
+    """
+
+    def __init__(self, capacidad: int = 512):
+        self.capacidad = capacidad
+        self._superficies = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def render(self, font, texto, antialias, color):
+        """Mismo contrato que font.render()"""
+        clave = (font, texto, antialias, tuple(color))
+        superficie = self._superficies.get(clave)
+        if superficie is not None:
+            self._superficies.move_to_end(clave)
+            self.aciertos += 1
+            return superficie
+
+        self.fallos += 1
+        superficie = font.render(texto, antialias, color)
+        self._superficies[clave] = superficie
+        if len(self._superficies) > self.capacidad:
+            self._superficies.popitem(last=False)
+        return superficie
+
+    def limpiar(self):
+        self._superficies.clear()
+
+    def obtener_estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._superficies),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+# Instancia compartida por la aplicación y los botones
+textos = CacheTextos()
+
+
+# ================================================================
+# RENDER POR REGIONES SUCIAS
+# ================================================================
+class Panel:
+    """Región de pantalla que se redibuja solo cuando cambia su firma.
+
+    `firma()` retorna un valor comparable que resume lo que el panel
+    muestra; `dibujar()` debe pintar únicamente dentro de `rect`.
+    """
+
+    def __init__(self, rect, dibujar, firma=lambda: None):
+        self.rect = pygame.Rect(rect)
+        self.dibujar = dibujar
+        self.firma = firma
+
+
+class RenderizadorPaneles:
+    """Redibuja solo los paneles cuya firma cambió y envía esos rects.
+
+    Al cambiar de escena o cuando `completo=True` (p.ej. avanzó el frame
+    del fondo animado) repinta todo y hace flip(), como el loop original.
+    """
+
+    def __init__(self, screen, dibujar_fondo):
+        self.screen = screen
+        self.dibujar_fondo = dibujar_fondo
+        self._escena = None
+        self._firmas = []
+        self.estadisticas = {"completos": 0, "parciales": 0, "sin_cambios": 0}
+
+    def invalidar(self):
+        """Fuerza un repintado completo en el próximo frame"""
+        self._escena = None
+
+    def dibujar(self, escena, paneles, completo=False) -> list:
+        """Dibuja la escena; retorna los rects enviados a la pantalla"""
+        firmas = [panel.firma() for panel in paneles]
+
+        if completo or escena != self._escena or len(firmas) != len(self._firmas):
+            self.dibujar_fondo()
+            for panel in paneles:
+                panel.dibujar()
+            pygame.display.flip()
+            self._escena, self._firmas = escena, firmas
+            self.estadisticas["completos"] += 1
+            return [self.screen.get_rect()]
+
+        sucios = [panel.rect for panel, firma, anterior in zip(paneles, firmas, self._firmas)
+                  if firma != anterior]
+        self._firmas = firmas
+        if not sucios:
+            self.estadisticas["sin_cambios"] += 1
+            return []
+
+        for rect in sucios:
+            # Fondo + todos los paneles que tocan la región, en orden de capas
+            self.screen.set_clip(rect)
+            self.dibujar_fondo()
+            for panel in paneles:
+                if panel.rect.colliderect(rect):
+                    panel.dibujar()
+        self.screen.set_clip(None)
+        pygame.display.update(sucios)
+        self.estadisticas["parciales"] += 1
+        return sucios
+
+
+# ================================================================
+# FRECUENCIA DE FRAMES ADAPTATIVA
+# ================================================================
+class PlanificadorFrames:
+    """Corre a `fps_activo` mientras hay interacción y baja a `fps_reposo`
+    cuando no la hay.
+
+    En reposo el loop duerme en pygame.event.wait(), así cualquier evento
+    (mouse, teclado o EVENTO_HARDWARE) lo despierta al instante; con
+    `fps_reposo=0` solo despierta un evento (o `limite_ms`). Mide los FPS
+    reales y el tiempo de CPU que consume cada frame.
+    """
+
+    def __init__(self, fps_activo: int, fps_reposo: int = 5, gracia_ms: int = 1500):
+        self.fps_activo = fps_activo
+        self.fps_reposo = fps_reposo
+        self.gracia_ms = gracia_ms
+        self.clock = pygame.time.Clock()
+        self.fps_efectivo = 0.0
+        self.cpu_ms_por_frame = 0.0
+        self._ultima_actividad = pygame.time.get_ticks()
+        self._inicio_frame = time.perf_counter()
+        self._cpu_inicio = time.process_time()
+
+    @staticmethod
+    def despertar():
+        """Seguro de llamar desde otros hilos"""
+        try:
+            pygame.event.post(pygame.event.Event(EVENTO_HARDWARE))
+        except pygame.error:
+            pass  # pygame ya se cerró
+
+    def marcar_actividad(self):
+        self._ultima_actividad = pygame.time.get_ticks()
+
+    @property
+    def en_reposo(self) -> bool:
+        return pygame.time.get_ticks() - self._ultima_actividad > self.gracia_ms
+
+    def esperar_eventos(self, limite_ms=None) -> list:
+        """Cierra el frame actual, duerme lo necesario y retorna los eventos.
+
+        `limite_ms` acota la espera en reposo (p.ej. el próximo frame del GIF).
+        """
+        # Tiempo de CPU del frame que termina (sin contar la espera)
+        cpu_ms = (time.process_time() - self._cpu_inicio) * 1000
+        self.cpu_ms_por_frame += (cpu_ms - self.cpu_ms_por_frame) * 0.1
+
+        eventos = []
+        if self.en_reposo:
+            espera = 1000 // self.fps_reposo if self.fps_reposo > 0 else None
+            if limite_ms is not None:
+                espera = limite_ms if espera is None else min(espera, limite_ms)
+            if espera is None:
+                primero = pygame.event.wait()
+            else:
+                primero = pygame.event.wait(max(1, int(espera)))
+            if primero.type != pygame.NOEVENT:
+                eventos.append(primero)
+        else:
+            self.clock.tick(self.fps_activo)
+        eventos.extend(pygame.event.get())
+        # Los avisos del hardware despiertan el loop pero no son interacción:
+        # no sacan de reposo (ni reactivan la animación del fondo)
+        if any(evento.type != EVENTO_HARDWARE for evento in eventos):
+            self.marcar_actividad()
+
+        ahora = time.perf_counter()
+        intervalo = ahora - self._inicio_frame
+        if intervalo > 0:
+            self.fps_efectivo += (1 / intervalo - self.fps_efectivo) * 0.1
+        self._inicio_frame = ahora
+        self._cpu_inicio = time.process_time()
+        return eventos
+
+    def obtener_estadisticas(self) -> dict:
+        return {
+            "fps_efectivo": self.fps_efectivo,
+            "cpu_ms_por_frame": self.cpu_ms_por_frame,
+            "en_reposo": self.en_reposo,
+        }
@@ -0,0 +1,78 @@
+#===========================================================================
+# Servicio sin pantalla: mismo control de parqueos que main.py, sin pygame
+#
+#   python Servicio.py                 # procesa botones de las Picos
+#   python Servicio.py --resumen 300   # resumen de ocupación cada 5 min
+#===========================================================================
+import argparse
+import signal
+import sys
+import threading
+import time
+from Controlador import ControladorParqueo
+# ============================================================================
+# SERVICIO (DAEMON DE EVENTOS)
+# ============================================================================
+class ServicioParqueo(ControladorParqueo):
+    """Procesa botones físicos y estados de las Picos sin interfaz gráfica"""
+
+    def __init__(self, intervalo_resumen: float = 60.0):
+        super().__init__()
+        self.intervalo_resumen = intervalo_resumen
+        # El poller y el receptor lo activan al publicar algo nuevo
+        self._despertar = threading.Event()
+        self.al_despertar = self._despertar.set
+
+    def quit(self):
+        super().quit()
+        self._despertar.set()
+
+    def agregar_a_historial(self, comando_texto):
+        super().agregar_a_historial(comando_texto)
+        self.logger.info(f"[SERVICIO] {comando_texto}")
+
+    def registrar_resumen(self):
+        for parqueo in self.parqueos:
+            hora = self.agregador.resumen(parqueo.id, "hora")
+            self.logger.info(
+                f"[SERVICIO] Parqueo {parqueo.id}: "
+                f"{parqueo.espacios_disponibles()}/{parqueo.num_espacios} libres | "
+                f"vehículos {parqueo.vehiculos_totales} | "
+                f"₡{parqueo.ganancias_colones:,.0f} | "
+                f"última hora: {hora['llegadas']} llegadas, "
+                f"ocupación {hora['ocupacion']:.0%}, ₡{hora['ingresos']:,.0f}"
+            )
+
+    def run(self) -> int:
+        self.inicializar_comunicadores()
+        if not self.comunicadores_activos:
+            self.logger.error("[SERVICIO] Ninguna Pico disponible, nada que procesar")
+            return 1
+
+        proximo_resumen = time.monotonic() + self.intervalo_resumen
+        while self.running:
+            # Timeout corto por si un snapshot llega sin aviso
+            self._despertar.wait(0.5)
+            self._despertar.clear()
+            self.leer_hardware_raspberry()
+
+            if time.monotonic() >= proximo_resumen:
+                self.registrar_resumen()
+                proximo_resumen += self.intervalo_resumen
+
+        self.registrar_resumen()
+        self.detener_comunicaciones()
+        return 0
+# ============================================================================
+# EJECUTAR SERVICIO
+# ============================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CEstaciona sin interfaz gráfica")
+    parser.add_argument("--resumen", type=float, default=60.0,
+                        help="segundos entre resúmenes de ocupación en el log")
+    args = parser.parse_args()
+
+    servicio = ServicioParqueo(args.resumen)
+    signal.signal(signal.SIGINT, lambda *_: servicio.quit())
+    signal.signal(signal.SIGTERM, lambda *_: servicio.quit())
+    sys.exit(servicio.run())
@@ -0,0 +1,355 @@
+# SimuladorPico.py - Simulador en CPython del firmware de la Pico W (mian_ras.py)
+#
+# Carga mian_ras.py con `machine`, `network`, `ujson`, `select` y `time`
+# simulados y levanta su servidor HTTP en localhost. Cada instancia es un
+# módulo independiente, así se pueden lanzar decenas en un mismo proceso
+# (una IP de loopback por Pico: 127.0.1.1, 127.0.1.2, ...).
+#
+#   python SimuladorPico.py --n 50                 # 50 Picos en 127.0.1.x:8080
+#   python SimuladorPico.py --n 1 --guion 2:1,6:2  # botón 1 a los 2s, botón 2 a los 6s
+#   python SimuladorPico.py --n 50 --bench 20      # benchmark de GestorComunicaciones
+
+import argparse
+import builtins
+import binascii
+import importlib.util
+import json
+import os
+import random
+import select as _select
+import socket as _socket
+import statistics
+import sys
+import threading
+import time as _time
+import types
+
+RUTA_FIRMWARE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mian_ras.py")
+
+
+# ================================================================
+# HARDWARE SIMULADO (machine / network)
+# ================================================================
+class Pin:
+    IN, OUT = 0, 1
+    PULL_UP, PULL_DOWN = 1, 2
+
+    def __init__(self, numero, modo=OUT, pull=None):
+        self.numero = numero
+        self._valor = 0
+
+    def value(self, valor=None):
+        if valor is None:
+            return self._valor
+        self._valor = 1 if valor else 0
+
+
+class ADC:
+    def __init__(self, pin):
+        self.pin = pin
+        self.valor = 32768  # luz ambiente a media escala
+
+    def read_u16(self):
+        return self.valor
+
+
+class PWM:
+    def __init__(self, pin):
+        self.pin = pin
+        self.duty = 0
+
+    def freq(self, hz):
+        self.hz = hz
+
+    def duty_u16(self, duty):
+        self.duty = duty
+
+
+class WLAN:
+    def __init__(self, modo):
+        self._activa = False
+
+    def active(self, activa=None):
+        if activa is not None:
+            self._activa = activa
+        return self._activa
+
+    def isconnected(self):
+        return True
+
+    def connect(self, ssid, password):
+        pass
+
+    def ifconfig(self):
+        return ("127.0.0.1", "255.0.0.0", "127.0.0.1", "127.0.0.1")
+
+
+def _modulo(nombre, **atributos):
+    modulo = types.ModuleType(nombre)
+    modulo.__dict__.update(atributos)
+    return modulo
+
+
+# ================================================================
+# RED Y TIEMPO ESTILO MICROPYTHON
+# ================================================================
+def _crear_socket_modulo(simulador):
+    """Módulo `socket` que acepta str en send() y enlaza a la IP del simulador"""
+
+    class SocketSim(_socket.socket):
+        def __init__(self, family=_socket.AF_INET, type=_socket.SOCK_STREAM, proto=0, fileno=None):
+            super().__init__(family, type, proto, fileno)
+            if fileno is None and type == _socket.SOCK_DGRAM:
+                # los eventos UDP salen desde la IP de esta Pico
+                self.bind((simulador.host, 0))
+
+        def send(self, datos):
+            if isinstance(datos, str):
+                datos = datos.encode("utf-8")
+            elif isinstance(datos, memoryview):
+                datos = datos.tobytes()
+            if datos.startswith(b"HTTP/") and simulador.perder_respuesta():
+                # Pérdida simulada: la conexión se corta sin responder
+                self.shutdown(_socket.SHUT_RDWR)
+                raise OSError("paquete perdido (simulado)")
+            self.sendall(datos)
+            return len(datos)
+
+        def sendto(self, datos, destino):
+            if simulador.perder_evento():
+                return len(datos)
+            return super().sendto(datos, destino)
+
+        def accept(self):
+            fd, direccion = self._accept()
+            cl = SocketSim(self.family, self.type, self.proto, fileno=fd)
+            return cl, direccion
+
+    def getaddrinfo(host, puerto, *args):
+        if host == "0.0.0.0":
+            host = simulador.host
+        return _socket.getaddrinfo(host, puerto, _socket.AF_INET, _socket.SOCK_STREAM)
+
+    return _modulo(
+        "socket",
+        socket=SocketSim,
+        getaddrinfo=getaddrinfo,
+        AF_INET=_socket.AF_INET,
+        SOCK_STREAM=_socket.SOCK_STREAM,
+        SOCK_DGRAM=_socket.SOCK_DGRAM,
+        SOL_SOCKET=_socket.SOL_SOCKET,
+        SO_REUSEADDR=_socket.SO_REUSEADDR,
+    )
+
+
+class _Poll:
+    """select.poll() que, como en MicroPython, retorna objetos y no descriptores"""
+
+    def __init__(self):
+        self._poll = _select.poll()
+        self._objetos = {}
+
+    def register(self, obj, mascara=_select.POLLIN):
+        self._objetos[obj.fileno()] = obj
+        self._poll.register(obj, mascara)
+
+    def unregister(self, obj):
+        fd = obj.fileno()
+        self._objetos.pop(fd, None)
+        self._poll.unregister(fd)
+
+    def poll(self, timeout=-1):
+        return [(self._objetos.get(fd, fd), ev) for fd, ev in self._poll.poll(timeout)]
+
+
+_INICIO = _time.monotonic()
+
+_time_mp = _modulo(
+    "time",
+    ticks_ms=lambda: int((_time.monotonic() - _INICIO) * 1000),
+    ticks_diff=lambda a, b: a - b,
+    sleep=_time.sleep,
+    time=_time.time,
+)
+
+_select_mp = _modulo(
+    "select",
+    poll=_Poll,
+    POLLIN=_select.POLLIN,
+    POLLHUP=_select.POLLHUP,
+    POLLERR=_select.POLLERR,
+)
+
+
+# ================================================================
+# SIMULADOR
+# ================================================================
+class SimuladorPico:
+    """Una Pico W simulada ejecutando el firmware real en un hilo"""
+
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 8080,
+                 latencia: float = 0.0, jitter: float = 0.0,
+                 perdida: float = 0.0, semilla=None):
+        self.host = host
+        self.puerto = puerto
+        self.latencia = latencia
+        self.jitter = jitter
+        self.perdida = perdida
+        self._azar = random.Random(semilla)
+        self._hilo = None
+        self.firmware = self._cargar_firmware()
+
+    def _cargar_firmware(self):
+        stubs = {
+            "machine": _modulo("machine", Pin=Pin, ADC=ADC, PWM=PWM),
+            "network": _modulo("network", WLAN=WLAN, STA_IF=0, AP_IF=1),
+            "ujson": json,
+            "ubinascii": binascii,
+            "socket": _crear_socket_modulo(self),
+            "select": _select_mp,
+            "time": _time_mp,
+        }
+
+        def importar(nombre, *args, **kwargs):
+            if nombre in stubs:
+                return stubs[nombre]
+            return builtins.__import__(nombre, *args, **kwargs)
+
+        nombre = f"pico_sim_{self.host.replace('.', '_')}_{self.puerto}"
+        spec = importlib.util.spec_from_file_location(nombre, RUTA_FIRMWARE)
+        firmware = importlib.util.module_from_spec(spec)
+        firmware.__builtins__ = dict(vars(builtins), __import__=importar)
+        spec.loader.exec_module(firmware)
+
+        # Latencia de red simulada antes de cada respuesta
+        handle_request = firmware.handle_request
+
+        def handle_request_lento(*args, **kwargs):
+            demora = self.latencia + self._azar.uniform(0, self.jitter)
+            if demora > 0:
+                _time.sleep(demora)
+            return handle_request(*args, **kwargs)
+
+        firmware.handle_request = handle_request_lento
+        return firmware
+
+    # --------------------------------------------------------------
+    def perder_respuesta(self) -> bool:
+        return self.perdida > 0 and self._azar.random() < self.perdida
+
+    def perder_evento(self) -> bool:
+        return self.perder_respuesta()
+
+    def iniciar(self):
+        """Inicializa el hardware como el __main__ del firmware y arranca el servidor"""
+        fw = self.firmware
+        fw.set_led(0, fw.estado["leds"][0])
+        fw.set_led(1, fw.estado["leds"][1])
+        fw.set_display_num(fw.estado["display"])
+        fw.mover_servo(fw.estado["servo"])
+        self._hilo = threading.Thread(
+            target=fw.start_server, args=(self.puerto,),
+            name=f"Pico {self.host}:{self.puerto}", daemon=True,
+        )
+        self._hilo.start()
+
+    def presionar(self, boton: int, duracion: float = 0.3):
+        """Pulsa un botón físico durante `duracion` segundos"""
+        pin = self.firmware.btn1 if boton == 1 else self.firmware.btn2
+        pin.value(1)
+        threading.Timer(duracion, pin.value, args=(0,)).start()
+
+    def ejecutar_guion(self, guion):
+        """guion: [(segundos_desde_ahora, boton), ...]"""
+        for segundos, boton in guion:
+            threading.Timer(segundos, self.presionar, args=(boton,)).start()
+
+    def fijar_luz(self, valor_u16: int):
+        self.firmware.ldr.valor = valor_u16
+
+
+def lanzar(n: int, puerto: int = 8080, red: str = "127.0.1.", **opciones) -> list:
+    """Lanza n simuladores en red+1 .. red+n, todos en el mismo puerto"""
+    simuladores = []
+    for i in range(n):
+        sim = SimuladorPico(host=f"{red}{i + 1}", puerto=puerto, **opciones)
+        sim.iniciar()
+        simuladores.append(sim)
+    _time.sleep(0.2)  # dar tiempo a que los servidores escuchen
+    return simuladores
+
+
+# ================================================================
+# BENCHMARK DE GestorComunicaciones
+# ================================================================
+def benchmark(simuladores: list, rondas: int):
+    from Comunicacion import GestorComunicaciones
+
+    ips = [sim.host for sim in simuladores]
+    gestor = GestorComunicaciones(ips, simuladores[0].puerto)
+
+    t0 = _time.perf_counter()
+    activos = gestor.activar_todos()
+    print(f"activar_todos: {(_time.perf_counter() - t0) * 1000:.1f} ms "
+          f"({sum(activos.values())}/{len(ips)} activas)")
+
+    tiempos = []
+    for _ in range(rondas):
+        t0 = _time.perf_counter()
+        gestor.obtener_estados()
+        tiempos.append((_time.perf_counter() - t0) * 1000)
+    print(f"obtener_estados x{rondas}: p50 {statistics.median(tiempos):.1f} ms | "
+          f"max {max(tiempos):.1f} ms")
+
+    tiempos = []
+    for ronda in range(rondas):
+        t0 = _time.perf_counter()
+        for com in gestor.comunicadores:
+            com.enviar_lote([
+                {"accion": "set_led", "index": 0, "valor": ronda % 2},
+                {"accion": "actualizar_display", "numero": ronda},
+            ])
+        tiempos.append((_time.perf_counter() - t0) * 1000)
+    print(f"enviar_lote secuencial x{rondas}: p50 {statistics.median(tiempos):.1f} ms | "
+          f"max {max(tiempos):.1f} ms")
+
+    gestor.desactivar_todos()
+
+
+def _parsear_guion(texto: str):
+    guion = []
+    for paso in filter(None, texto.split(",")):
+        segundos, boton = paso.split(":")
+        guion.append((float(segundos), int(boton)))
+    return guion
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulador de Picos W para CEstaciona")
+    parser.add_argument("--n", type=int, default=1, help="cantidad de Picos simuladas")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--red", default="127.0.1.", help="prefijo de IP (se agrega 1..n)")
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos por respuesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latencia extra aleatoria")
+    parser.add_argument("--perdida", type=float, default=0.0, help="probabilidad 0..1")
+    parser.add_argument("--guion", default="", help="pulsaciones 'seg:boton,...' (todas las Picos)")
+    parser.add_argument("--bench", type=int, default=0, help="rondas de benchmark y salir")
+    args = parser.parse_args()
+
+    sims = lanzar(args.n, args.puerto, args.red, latencia=args.latencia,
+                  jitter=args.jitter, perdida=args.perdida)
+    print(f"{len(sims)} Pico(s) simulada(s) en {args.red}1..{args.n}:{args.puerto}")
+
+    if args.bench:
+        benchmark(sims, args.bench)
+        sys.exit(0)
+
+    guion = _parsear_guion(args.guion)
+    for sim in sims:
+        sim.ejecutar_guion(guion)
+
+    try:
+        while True:
+            _time.sleep(1)
+    except KeyboardInterrupt:
+        pass
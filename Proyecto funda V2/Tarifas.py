@@ -0,0 +1,226 @@
+#===========================================================================
+# Tarifas: cálculo del cobro por estancia
+#
+# Cada tarifa se compila una sola vez a una tabla de cortes + sumas
+# acumuladas (costo total hasta cada corte). Cobrar una estancia es buscar
+# con bisect el tramo de la entrada y el de la salida: O(log n) sin importar
+# cuántos tramos o días cubra. Para auditorías, `precios()` cobra miles de
+# estancias de una vez con NumPy (si está instalado) o con bisect.
+#
+#   escalonada  el precio por 10 s depende de cuánto lleva la estancia
+#   horaria     el precio por 10 s depende de la hora del día
+#===========================================================================
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from Variables import CONFIG
+
+SEGUNDOS_DIA = 86400
+
+np = None   # numpy se importa solo al cobrar en lote
+
+
+def _importar_numpy():
+    """NumPy o None si no está instalado (se usa el cálculo con bisect)"""
+    global np
+    if np is None:
+        try:
+            import numpy as modulo
+        except ImportError:
+            return None
+        np = modulo
+    return np
+
+
+# ============================================================================
+# TABLA COMPILADA (FUNCIÓN ACUMULADA LINEAL POR TRAMOS)
+# ============================================================================
+class TablaAcumulada:
+    """Costo acumulado desde 0 hasta x con tasa constante en cada tramo.
+
+    `cortes[i]` es el inicio del tramo i (cortes[0] = 0), `tasas[i]` los
+    colones por segundo dentro de él y `acumulado[i]` el costo de 0 a
+    cortes[i]. El último tramo sigue hasta el infinito.
+    """
+    __slots__ = ("cortes", "tasas", "acumulado")
+
+    def __init__(self, cortes, tasas):
+        self.cortes = list(cortes)
+        self.tasas = list(tasas)
+        anchos = [b - a for a, b in zip(self.cortes, self.cortes[1:])]
+        self.acumulado = [0.0, *accumulate(t * w for t, w in zip(self.tasas, anchos))]
+
+    def valor(self, x: float) -> float:
+        i = bisect_right(self.cortes, x) - 1
+        return self.acumulado[i] + (x - self.cortes[i]) * self.tasas[i]
+
+    def valores(self, x):
+        """`valor` sobre un arreglo de NumPy"""
+        cortes = np.asarray(self.cortes)
+        i = np.searchsorted(cortes, x, side="right") - 1
+        return np.asarray(self.acumulado)[i] + (x - cortes[i]) * np.asarray(self.tasas)[i]
+
+
+def _compilar(tramos, tope=None) -> TablaAcumulada:
+    """tramos: [(inicio_seg, colones_por_10seg), ...] ordenables por inicio"""
+    tramos = sorted((float(inicio), float(precio)) for inicio, precio in tramos)
+    if not tramos:
+        raise ValueError("La tarifa necesita al menos un tramo")
+    if tramos[0][0] > 0:
+        if tope is None:
+            raise ValueError("El primer tramo debe empezar en 0")
+        # Tarifa cíclica: antes del primer tramo rige el último del día anterior
+        tramos.insert(0, (0.0, tramos[-1][1]))
+    cortes = [inicio for inicio, _ in tramos]
+    tasas = [precio / 10 for _, precio in tramos]
+    if tope is not None:
+        cortes.append(float(tope))
+        tasas.append(tasas[-1])
+    return TablaAcumulada(cortes, tasas)
+
+
+# ============================================================================
+# TIPOS DE TARIFA
+# ============================================================================
+class Tarifa:
+    """Interfaz: precio(entrada, salida) con marcas de tiempo en segundos"""
+
+    def precio(self, entrada: float, salida: float) -> float:
+        raise NotImplementedError
+
+    def precios(self, entradas, salidas) -> list:
+        """Cobra muchas estancias; usa NumPy si está disponible"""
+        if _importar_numpy() is None:
+            return [self.precio(e, s) for e, s in zip(entradas, salidas)]
+        return self._precios_np(np.asarray(entradas, dtype=float),
+                                np.asarray(salidas, dtype=float))
+
+    def _precios_np(self, entradas, salidas):
+        return np.fromiter(map(self.precio, entradas, salidas), float, len(entradas))
+
+
+class TarifaEscalonada(Tarifa):
+    """El precio por 10 s cambia según la duración de la estancia.
+
+    tramos = [(0, 1000), (3600, 500)]  ->  ₡1000/10s la primera hora y
+    ₡500/10s desde ahí. Un solo tramo (0, tarifa) es la tarifa lineal.
+    """
+
+    def __init__(self, tramos):
+        self.tramos = list(tramos)
+        self.tabla = _compilar(self.tramos)
+
+    def precio(self, entrada, salida):
+        return self.tabla.valor(max(0.0, salida - entrada))
+
+    def _precios_np(self, entradas, salidas):
+        return self.tabla.valores(np.maximum(0.0, salidas - entradas))
+
+
+class TarifaHoraria(Tarifa):
+    """El precio por 10 s depende de la hora local en que transcurre.
+
+    franjas = [("06:00", 1000), ("22:00", 300)]  ->  ₡1000/10s de día y
+    ₡300/10s de noche. Antes de la primera franja rige la última. El costo
+    es F(salida) - F(entrada), con F = días completos * costo del día +
+    acumulado dentro del día, así una estancia de varios días cuesta lo
+    mismo que una de minutos.
+    """
+
+    def __init__(self, franjas, desfase_utc=None):
+        self.franjas = [(_segundo_del_dia(inicio), precio) for inicio, precio in franjas]
+        self.tabla = _compilar(self.franjas, tope=SEGUNDOS_DIA)
+        self.costo_dia = self.tabla.valor(SEGUNDOS_DIA)
+        # Costa Rica no cambia de horario: un desfase fijo sirve para todo el historial
+        self.desfase_utc = time.localtime().tm_gmtoff if desfase_utc is None else desfase_utc
+
+    def _acumulado(self, ts):
+        local = ts + self.desfase_utc
+        dias, segundo = divmod(local, SEGUNDOS_DIA)
+        return dias * self.costo_dia + self.tabla.valor(segundo)
+
+    def precio(self, entrada, salida):
+        if salida <= entrada:
+            return 0.0
+        return self._acumulado(salida) - self._acumulado(entrada)
+
+    def _precios_np(self, entradas, salidas):
+        salidas = np.maximum(entradas, salidas)
+
+        def acumulado(ts):
+            dias, segundo = np.divmod(ts + self.desfase_utc, SEGUNDOS_DIA)
+            return dias * self.costo_dia + self.tabla.valores(segundo)
+
+        return acumulado(salidas) - acumulado(entradas)
+
+
+def _segundo_del_dia(inicio) -> float:
+    """'HH:MM' o segundos desde la medianoche"""
+    if isinstance(inicio, str):
+        horas, minutos = inicio.split(":")
+        return int(horas) * 3600 + int(minutos) * 60
+    return float(inicio)
+
+
+# ============================================================================
+# MOTOR: UNA TARIFA POR PARQUEO
+# ============================================================================
+class MotorTarifas:
+    """Tarifa por defecto más tarifas propias de algunos parqueos (por id)"""
+
+    def __init__(self, por_defecto: Tarifa, por_parqueo=None):
+        self.por_defecto = por_defecto
+        self.por_parqueo = dict(por_parqueo or {})
+
+    def tarifa(self, parqueo_id) -> Tarifa:
+        return self.por_parqueo.get(parqueo_id, self.por_defecto)
+
+    def precio(self, parqueo_id, entrada, salida) -> float:
+        return self.tarifa(parqueo_id).precio(entrada, salida)
+
+    def precios(self, parqueo_ids, entradas, salidas):
+        """Re-cobra un historial: agrupa por parqueo y cobra cada grupo en lote.
+
+        Retorna un arreglo de NumPy si está disponible, si no una lista.
+        """
+        if _importar_numpy() is not None:
+            parqueo_ids = np.asarray(parqueo_ids)
+            entradas = np.asarray(entradas, dtype=float)
+            salidas = np.asarray(salidas, dtype=float)
+            resultado = np.zeros(len(entradas))
+            for parqueo_id in np.unique(parqueo_ids):
+                mascara = parqueo_ids == parqueo_id
+                resultado[mascara] = self.tarifa(int(parqueo_id)).precios(
+                    entradas[mascara], salidas[mascara])
+            return resultado
+
+        grupos = {}
+        for i, parqueo_id in enumerate(parqueo_ids):
+            grupos.setdefault(self.tarifa(parqueo_id), []).append(i)
+
+        resultado = [0.0] * len(entradas)
+        for tarifa, indices in grupos.items():
+            precios = tarifa.precios([entradas[i] for i in indices],
+                                     [salidas[i] for i in indices])
+            for i, precio in zip(indices, precios):
+                resultado[i] = float(precio)
+        return resultado
+
+
+def tarifa_desde_config(spec) -> Tarifa:
+    """spec: {'tipo': 'escalonada', 'tramos': [[0, 1000], [3600, 500]]}
+    o {'tipo': 'horaria', 'franjas': [['06:00', 1000], ['22:00', 300]]}"""
+    tipo = spec.get("tipo", "escalonada")
+    if tipo == "escalonada":
+        return TarifaEscalonada(spec["tramos"])
+    if tipo == "horaria":
+        return TarifaHoraria(spec["franjas"], spec.get("desfase_utc"))
+    raise ValueError(f"Tipo de tarifa desconocido: {tipo}")
+
+
+def crear_motor(config=CONFIG) -> MotorTarifas:
+    """Tarifa lineal `tarifa_por_10seg` salvo lo que diga `tarifas_parqueo`"""
+    por_defecto = TarifaEscalonada([(0, config['tarifa_por_10seg'])])
+    por_parqueo = {int(parqueo_id): tarifa_desde_config(spec)
+                   for parqueo_id, spec in config.get('tarifas_parqueo', {}).items()}
+    return MotorTarifas(por_defecto, por_parqueo)
@@ -28,19 +28,33 @@ CYAN, CYAN_HOVER = (26, 188, 156), (22, 160, 133)
 # Configuración del sistema
 CONFIG = {
     'tarifa_por_10seg': 1000,
+    # Tarifas propias por id de parqueo (ver Tarifas.tarifa_desde_config), p.ej.
+    # {2: {'tipo': 'horaria', 'franjas': [['06:00', 1000], ['22:00', 300]]}}
+    'tarifas_parqueo': {},
     'tipo_cambio': 520.0,
     'ip_parqueo1': '192.168.100.179',
     'ip_parqueo2': '172.20.10.3',
     'puerto': 8080,
+    'puerto_eventos': 8090,
+    'render_parcial': True,   # redibujar solo los paneles que cambian
+    'fondo_animado': True,    # False congela el GIF y deja que el render parcial actúe
+    'fps_reposo': 5,          # FPS sin interacción (se vuelve a FPS al primer evento; 0 = solo con eventos)
+    'fps_fondo_reposo': 0,    # FPS del GIF sin interacción; 0 lo congela hasta el próximo evento
     'auto_refresh': True,
-    'espacios_por_parqueo': 2
+    'espacios_por_parqueo': 2,
+    'verificar_contadores': False,  # recontar libres en cada consulta (pruebas)
+    'persistencia': True      # guardar eventos en RUTA_EVENTOS y restaurarlos al arrancar
 }
+# Un parqueo por IP de Pico: agregar IPs aquí para sumar parqueos
+CONFIG['parqueos'] = [CONFIG['ip_parqueo1'], CONFIG['ip_parqueo2']]
 
 
 
 # UI
 PADDING, BORDER_RADIUS = 20, 10
 RUTA_GIF = "fondo2.gif"
+RUTA_CACHE_FONDO = ".cache_fondo"   # frames del GIF ya compuestos (se regenera solo)
+RUTA_EVENTOS = "eventos_parqueo.db"  # bitácora SQLite de ocupar/liberar/aguja/LED
 
 # ==========================================
 # Logger para Comunicaciones
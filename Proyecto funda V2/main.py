@@ -1,32 +1,68 @@
 #===========================================================================
 # Zona de Importaciones Y Bibliotecas)
 #===========================================================================
+import time
+_INICIO_IMPORTS = time.perf_counter()
+import argparse
+import math
 import pygame
 import sys
-from datetime import datetime
+from functools import lru_cache
 from Variables import (
     ANCHO, ALTO, FPS,
     NEGRO, BLANCO, GRIS, GRIS_CLARO,
     VERDE, VERDE_HOVER, ROJO, ROJO_HOVER,
     AZUL, AZUL_HOVER, NARANJA, NARANJA_HOVER,
     MORADO, MORADO_HOVER, AMARILLO, CYAN, CYAN_HOVER, 
-    COLOR_TEXTO, hex_to_rgb, logger_com, CONFIG
+    COLOR_TEXTO, hex_to_rgb, CONFIG, RUTA_GIF
 )
-import requests
-from PIL import Image, ImageSequence
-import logging
-from Comunicacion import ComunicadorPico, GestorComunicaciones
+from FondoAnimado import ReproductorFondo
+from Renderizado import textos, Panel, RenderizadorPaneles, PlanificadorFrames, EVENTO_HARDWARE
+from Controlador import ControladorParqueo
+from Estadisticas import VENTANAS, ETIQUETAS
+# PIL se importa en el hilo del fondo y requests al crear los comunicadores;
+# el logging lo configura LoggerComunicador (Variables.py)
+_FIN_IMPORTS = time.perf_counter()
 # ============================================================================
-# CONFIGURACIÓN DE COMUNICACION 
+# DISTRIBUCIÓN DE PARQUEOS Y ESPACIOS EN PANTALLA
 # ============================================================================
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s',
-    handlers=[
-        logging.FileHandler('comunicacion.log'),
-        logging.StreamHandler()
-    ]
-)
+X_PANELES_SLOT = (100, 750)    # parqueos visibles a la vez (uno por slot)
+X_BOTONES_SLOT = (50, 750)
+
+@lru_cache(maxsize=None)
+def celdas_espacios(n):
+    """Rects (relativos al panel) de n espacios en la zona libre del panel"""
+    area_x, area_y, area_w, area_h = 20, 170, 560, 140
+    cols = min(n, math.ceil(math.sqrt(n * area_w / area_h)))
+    filas = math.ceil(n / cols)
+    celda_w = min(200, area_w // cols)
+    celda_h = min(100, area_h // filas)
+    caja_w = min(120, celda_w - max(2, celda_w // 10))
+    caja_h = min(80, celda_h - max(2, celda_h // 10))
+    x0 = area_x + (area_w - cols * celda_w) // 2 + (celda_w - caja_w) // 2
+    y0 = area_y + (area_h - filas * celda_h) // 2 + (celda_h - caja_h) // 2
+    return tuple(
+        pygame.Rect(x0 + (i % cols) * celda_w, y0 + (i // cols) * celda_h, caja_w, caja_h)
+        for i in range(n)
+    )
+# ============================================================================
+# PERFIL DE ARRANQUE (--profile-startup)
+# ============================================================================
+class PerfilArranque:
+    def __init__(self, inicio):
+        self.fases = []
+        self._ultimo = inicio
+
+    def marcar(self, fase, ahora=None):
+        ahora = time.perf_counter() if ahora is None else ahora
+        self.fases.append((fase, (ahora - self._ultimo) * 1000))
+        self._ultimo = ahora
+
+    def imprimir(self):
+        print("\n Perfil de arranque:")
+        for fase, ms in self.fases:
+            print(f"   {fase:<28}{ms:9.1f} ms")
+        print(f"   {'TOTAL':<28}{sum(ms for _, ms in self.fases):9.1f} ms\n")
 # ============================================================================
 # CLASE DE BUTON Y SUS CARACTERISTICAS 
 # ============================================================================
@@ -58,7 +94,7 @@ class Button:
         else:
             pygame.draw.rect(screen, GRIS_CLARO, rect_actual, 2, border_radius=10)
 
-        texto_render = font.render(self.texto, True, BLANCO)
+        texto_render = textos.render(font, self.texto, True, BLANCO)
         texto_rect = texto_render.get_rect(center=rect_actual.center)
         screen.blit(texto_render, texto_rect)
 
@@ -76,307 +112,103 @@ class Button:
                 return True
         return False
 # ============================================================================
-# CLASE ESPACIO DEL PARQUEO (OCUPAR Y lIBERAR)
-# ============================================================================
-class EspacioParqueo:
-    def __init__(self, id_espacio):
-        self.id = id_espacio
-        self.ocupado = False
-        self.hora_entrada = None
-        self.led_encendido = True
-        # Ocupar y Liberar espacio
-    def ocupar(self):
-        if not self.ocupado:
-            self.ocupado = True
-            self.hora_entrada = datetime.now()
-            self.led_encendido = False
-            return True
-        return False
-        # Liberar espacio
-    def liberar(self):
-        if self.ocupado:
-            self.ocupado = False
-            self.led_encendido = True
-            tiempo_estancia = (datetime.now() - self.hora_entrada).total_seconds()
-            self.hora_entrada = None
-            return tiempo_estancia
-        return 0
-        # Alternar estado del LED
-    def toggle_led(self):
-        self.led_encendido = not self.led_encendido
-# ============================================================================
-# CLASE PARQUEO CON SU CONFIGURACION Y CARACTERISTICAS 
-# ============================================================================
-class Parqueo:
-    def __init__(self, id_parqueo, ip_pico=None, puerto=8080):
-        self.id = id_parqueo
-        self.espacios = [EspacioParqueo(i) for i in range(2)]
-        self.aguja_abierta = False
-        self.vehiculos_totales = 0
-        self.tiempo_total_estancia = 0
-        self.ganancias_colones = 0
-        self.activo = False
-        
-        self.ip_pico = ip_pico
-        self.puerto = puerto
-        self.comunicador = ComunicadorPico(ip_pico, puerto) if ip_pico else None
-        # Espacios disponibles
-    def espacios_disponibles(self):
-        return sum(1 for e in self.espacios if not e.ocupado)
-        # Alternar aguja
-    def toggle_aguja(self):
-        self.aguja_abierta = not self.aguja_abierta
-        
-        if self.activo and self.comunicador:
-            self.comunicador.toggle_aguja()
-        
-        self.actualizar_display_remoto()
-        # Registrar salida de vehículo
-    def registrar_salida(self, tiempo_estancia):
-        self.vehiculos_totales += 1
-        self.tiempo_total_estancia += tiempo_estancia
-        costo = (tiempo_estancia / 10) * 1000
-        self.ganancias_colones += costo
-        return costo
-        # Promedio de estancia
-    def promedio_estancia(self):
-        if self.vehiculos_totales > 0:
-            return self.tiempo_total_estancia / self.vehiculos_totales
-        return 0
-    # Actualizar display remoto
-    def actualizar_display_remoto(self):
-        if self.activo and self.comunicador:
-            espacios = self.espacios_disponibles()
-            try:
-                self.comunicador.actualizar_display(espacios)
-            except Exception as e:
-                logging.warning(f"Parqueo {self.id} | Error al actualizar display: {e}")
-# ============================================================================
 # APLICACIÓN PRINCIPAL CON SUS CARACTERISTICAS Y FUNCIONES
 # ============================================================================
-class AplicacionParqueo:
-    def __init__(self):
+class AplicacionParqueo(ControladorParqueo):
+    def __init__(self, perfil=None, mostrar_perfil=False):
+        self.perfil = perfil or PerfilArranque(time.perf_counter())
+        self.perfil_pendiente = mostrar_perfil  # se imprime tras el primer frame
+
+        # Parqueos, historial y estado de comunicación (Controlador.py)
+        super().__init__()
+        self.al_despertar = PlanificadorFrames.despertar
+        self.perfil.marcar("modelo + bitácora")
+
         pygame.init()
         self.screen = pygame.display.set_mode((ANCHO, ALTO))
         pygame.display.set_caption("CEstaciona - Sistema de Parqueo Inteligente")
-        self.clock = pygame.time.Clock()
-        self.running = True
+        self.planificador = PlanificadorFrames(FPS, CONFIG['fps_reposo'])
+        self.perfil.marcar("pygame + ventana")
         
         # Fuentes
         self.font_titulo = pygame.font.Font(None, 64)
         self.font_subtitulo = pygame.font.Font(None, 40)
         self.font_normal = pygame.font.Font(None, 28)
         self.font_pequeña = pygame.font.Font(None, 22)
+        self.textos = textos  # caché de superficies de texto (LRU)
+        self.perfil.marcar("fuentes")
         
-        # Parqueos con comunicación remota
-        self.parqueos = [
-            Parqueo(1, ip_pico=CONFIG['ip_parqueo1'], puerto=CONFIG['puerto']),
-            Parqueo(2, ip_pico=CONFIG['ip_parqueo2'], puerto=CONFIG['puerto'])
-        ]
-        # Estado de la aplicación y características
+        # Pantalla actual, página de parqueos y espacio elegido en cada uno
         self.estado = 0
-        self.config = CONFIG.copy()
-        self.logger = logger_com
-        self.historial_comandos = []
-        self.max_historial = 10
-        self.comunicadores_activos = False
-        self.gestor_comunicaciones = None
+        self.pagina = 0
+        self.seleccion = [0] * len(self.parqueos)
+        self.ventana_estadisticas = "hora"
         
         # Crear botones
         self.crear_botones()
+        self.perfil.marcar("botones")
         
         # Cargar GIF de fondo
-        self.cargar_fondo_gif("fondo2.gif")
+        self.cargar_fondo_gif(RUTA_GIF)
+        self.perfil.marcar("fondo GIF")
+
+        # Paneles por pantalla (render por regiones sucias)
+        self.renderizador = RenderizadorPaneles(self.screen, self.dibujar_fondo_gif)
+        self.crear_paneles()
+        self.perfil.marcar("paneles")
         
         # Inicializar comunicadores
         self.inicializar_comunicadores()
-
-    # ========================================================================
-    # COMUNICACIÓN CON RASPBERRY PI
-    # ========================================================================
-    # Inicializar comunicadores
-    def inicializar_comunicadores(self):
-        try:
-            print("\n" + "="*60)
-            print(" INICIALIZANDO COMUNICACIÓN CON RASPBERRY PI PICO W")
-            print("="*60)
-            
-            ips = [self.config['ip_parqueo1'], self.config['ip_parqueo2']]
-            
-            self.gestor_comunicaciones = GestorComunicaciones(
-                ips=ips,
-                puerto=self.config['puerto']
-            )
-            
-            resultados = self.gestor_comunicaciones.activar_todos()
-            
-            print("\n Resultados de conexión:")
-            for parqueo_id, conectado in resultados.items():
-                ip = ips[parqueo_id]
-                estado = "CONECTADO" if conectado else "NO DISPONIBLE"
-                if conectado:
-                    print(f"   Parqueo {parqueo_id + 1} ({ip}): {estado}")
-                    self.logger.registrar_conexion_exitosa(ip, 8080)
-                    self.parqueos[parqueo_id].activo = True
-                else:
-                    print(f"  Parqueo {parqueo_id + 1} ({ip}): {estado}")
-                    self.logger.registrar_conexion_fallida(ip, 8080, "No responde")
-            
-            self.comunicadores_activos = any(resultados.values())
-            
-            if self.comunicadores_activos:
-                print("\n Sistema en MODO COMUNICACIÓN REAL")
-            else:
-                print("\n  Sistema en MODO SIMULACIÓN (sin conexión)")
-            
-            print("="*60 + "\n")
-            
-        except Exception as e:
-            print(f"\n Error al inicializar comunicadores: {e}")
-            print("  Sistema operará en MODO SIMULACIÓN\n")
-            self.logger.error(f"Inicialización: {e}")
-            self.comunicadores_activos = False
-    
-    def agregar_a_historial(self, comando_texto):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.historial_comandos.append(f"[{timestamp}] {comando_texto}")
-        
-        if len(self.historial_comandos) > self.max_historial:
-            self.historial_comandos.pop(0)
-
-    # ========================================================================
-    # COMANDOS CON COMUNICACIÓN 
-    # ========================================================================
-    
-    def toggle_led(self, parqueo_id, espacio_id):
-        print(f"\n [COMANDO] Toggle LED - Parqueo {parqueo_id + 1}, Espacio {espacio_id + 1}")
-        
-        self.parqueos[parqueo_id].espacios[espacio_id].toggle_led()
-        nuevo_estado = self.parqueos[parqueo_id].espacios[espacio_id].led_encendido
-        
-        self.agregar_a_historial(f"LED P{parqueo_id+1} E{espacio_id+1}: {'ON' if nuevo_estado else 'OFF'}")
-        
-        if self.comunicadores_activos and self.gestor_comunicaciones:
-            comunicador = self.gestor_comunicaciones.get_comunicador(parqueo_id)
-            if comunicador and comunicador.activo:
-                color = "verde" if nuevo_estado else "apagado"
-                resultado = comunicador.toggle_led(espacio_id, color)
-                
-                if resultado:
-                    print(f"   ✓ Comando enviado exitosamente")
-                    self.logger.registrar_comando("toggle_led", {"parqueo": parqueo_id, "espacio": espacio_id})
-                else:
-                    print(f"   ✗ Error al enviar comando")
-            else:
-                print(f"     Parqueo no conectado")
-        else:
-            print(f"     Modo simulación")
-    
-    def toggle_aguja(self, parqueo_id):
-        print(f"\n [COMANDO] Toggle Aguja - Parqueo {parqueo_id + 1}")
-        
-        self.parqueos[parqueo_id].toggle_aguja()
-        nuevo_estado = self.parqueos[parqueo_id].aguja_abierta
-        
-        self.agregar_a_historial(f"Aguja P{parqueo_id+1}: {'ABIERTA' if nuevo_estado else 'CERRADA'}")
-        
-        if self.comunicadores_activos and self.gestor_comunicaciones:
-            comunicador = self.gestor_comunicaciones.get_comunicador(parqueo_id)
-            if comunicador and comunicador.activo:
-                resultado = comunicador.toggle_aguja()
-                if resultado:
-                    print(f"  Comando enviado exitosamente")
-                    self.logger.registrar_comando("toggle_aguja", {"parqueo": parqueo_id})
-    
-    def ocupar_espacio(self, parqueo_id, espacio_id):
-        print(f"\n [COMANDO] Ocupar Espacio - Parqueo {parqueo_id + 1}, Espacio {espacio_id + 1}")
-        
-        resultado = self.parqueos[parqueo_id].espacios[espacio_id].ocupar()
-        
-        if resultado:
-            print(f" Espacio marcado como OCUPADO")
-            self.agregar_a_historial(f"Ocupar P{parqueo_id+1} E{espacio_id+1}")
-            
-            if self.comunicadores_activos and self.gestor_comunicaciones:
-                comunicador = self.gestor_comunicaciones.get_comunicador(parqueo_id)
-                if comunicador and comunicador.activo:
-                    resultado_pico = comunicador.ocupar_espacio(espacio_id)
-                    
-                    if resultado_pico:
-                        print(f"   ✓ Comando enviado al Pico")
-                        self.logger.registrar_comando("ocupar", {"parqueo": parqueo_id, "espacio": espacio_id})
-                        espacios_libres = self.parqueos[parqueo_id].espacios_disponibles()
-                        comunicador.actualizar_display(espacios_libres)
-    
-    def liberar_espacio(self, parqueo_id, espacio_id):
-        print(f"\n [COMANDO] Liberar Espacio - Parqueo {parqueo_id + 1}, Espacio {espacio_id + 1}")
-        
-        tiempo = self.parqueos[parqueo_id].espacios[espacio_id].liberar()
-        
-        if tiempo > 0:
-            self.parqueos[parqueo_id].registrar_salida(tiempo)
-            costo = (tiempo / 10) * 1000
-            
-            print(f"   Espacio liberado")
-            print(f"     Tiempo: {tiempo:.1f}s")
-            print(f"    Costo: ₡{costo:.0f}")
-            
-            self.agregar_a_historial(f"Liberar P{parqueo_id+1} E{espacio_id+1} - ₡{costo:.0f}")
-            
-            if self.comunicadores_activos and self.gestor_comunicaciones:
-                comunicador = self.gestor_comunicaciones.get_comunicador(parqueo_id)
-                if comunicador and comunicador.activo:
-                    resultado_pico = comunicador.liberar_espacio(espacio_id)
-                    
-                    if resultado_pico:
-                        print(f"  Comando enviado al Pico")
-                        espacios_libres = self.parqueos[parqueo_id].espacios_disponibles()
-                        comunicador.actualizar_display(espacios_libres)
+        self.perfil.marcar("activación comunicadores")
 
     # ========================================================================
     # GIF DE FONDO
     # ========================================================================
     
     def cargar_fondo_gif(self, ruta_gif):
-        try:
-            self.gif_frames = []
-            gif = Image.open(ruta_gif)
-            
-            for frame in ImageSequence.Iterator(gif):
-                frame_rgba = frame.convert("RGBA")
-                frame_resized = frame_rgba.resize((ANCHO, ALTO))
-                frame_str = frame_resized.tobytes()
-                pygame_surface = pygame.image.fromstring(frame_str, (ANCHO, ALTO), "RGBA")
-                self.gif_frames.append(pygame_surface)
-            
-            self.frame_actual = 0
-            self.gif_delay = 50
-            self.ultimo_frame_tiempo = pygame.time.get_ticks()
-            self.gif_cargado = True
-            print(f" GIF cargado: {len(self.gif_frames)} frames")
-        except Exception as e:
-            print(f" Error al cargar GIF: {e}")
-            self.gif_cargado = False
+        # El GIF se decodifica en segundo plano; hasta tener el primer
+        # frame se dibuja un color sólido
+        self.fondo = ReproductorFondo(ruta_gif, (ANCHO, ALTO))
+        self.fondo.iniciar()
+        self.gif_cargado = True
+        self.fondo_listo = False
 
-    def actualizar_fondo_gif(self):
+    def actualizar_fondo_gif(self) -> bool:
+        """Retorna True si el fondo cambió y hay que repintar la pantalla completa"""
         if not self.gif_cargado:
-            return
-        
-        tiempo_actual = pygame.time.get_ticks()
-        if tiempo_actual - self.ultimo_frame_tiempo > self.gif_delay:
-            self.frame_actual = (self.frame_actual + 1) % len(self.gif_frames)
-            self.ultimo_frame_tiempo = tiempo_actual
+            return False
+
+        cambio = self.fondo.listo != self.fondo_listo
+        self.fondo_listo = self.fondo.listo
+        delay = self.delay_fondo()
+        if delay is not None:
+            cambio = self.fondo.actualizar(pygame.time.get_ticks(), delay) or cambio
+        return cambio
+
+    def delay_fondo(self):
+        """ms entre frames del GIF, o None si el fondo está quieto.
+
+        Cada frame nuevo obliga a repintar la pantalla completa; en reposo
+        el GIF baja a `fps_fondo_reposo` (0 = congelado) para que el loop
+        duerma y el render parcial se encargue de los cambios.
+        """
+        if not self.config['fondo_animado']:
+            return None
+        if self.planificador.en_reposo:
+            fps = self.config['fps_fondo_reposo']
+            return 1000 // fps if fps > 0 else None
+        return self.fondo.delay_ms
+
+    def ms_para_fondo(self):
+        """Cuánto puede dormir el loop sin atrasar la animación del fondo"""
+        delay = self.delay_fondo() if self.gif_cargado else None
+        if delay is None:
+            return None
+        return self.fondo.ms_para_siguiente(pygame.time.get_ticks(), delay)
 
     def dibujar_fondo_gif(self):
-        if self.gif_cargado and self.gif_frames:
-            fondo = self.gif_frames[self.frame_actual].copy()
-            fondo.set_alpha(200)
-            self.screen.blit(fondo, (0, 0))
-            
-            overlay = pygame.Surface((ANCHO, ALTO))
-            overlay.set_alpha(120)
-            overlay.fill(NEGRO)
-            self.screen.blit(overlay, (0, 0))
+        if self.gif_cargado:
+            self.fondo.dibujar(self.screen)
         else:
             self.screen.fill(NEGRO)
 
@@ -429,102 +261,46 @@ class AplicacionParqueo:
             NARANJA, NARANJA_HOVER, lambda: self.cambiar_estado(3)
         )
         
-        # Botones de control 
-        p1_x_start = 50
-        p1_y_start = 580
+        # Botones de control: una fila por parqueo visible que actúa sobre
+        # el espacio seleccionado (clic en el espacio o < / >)
         btn_w = 110
         btn_h = 45
         spacing_x = 125
         spacing_y = 55
-        
-        # Parqueo 1
-        self.btn_led1_esp1 = Button(
-            p1_x_start, p1_y_start,
-            btn_w, btn_h, "LED 1", VERDE, VERDE_HOVER,
-            lambda: self.toggle_led(0, 0)
-        )
-        
-        self.btn_ocupar1_esp1 = Button(
-            p1_x_start + spacing_x, p1_y_start,
-            btn_w, btn_h, "Ocupar 1", ROJO, ROJO_HOVER,
-            lambda: self.ocupar_espacio(0, 0)
-        )
-        
-        self.btn_liberar1_esp1 = Button(
-            p1_x_start + spacing_x * 2, p1_y_start,
-            btn_w, btn_h, "Liberar 1", AZUL, AZUL_HOVER,
-            lambda: self.liberar_espacio(0, 0)
-        )
-        
-        self.btn_led1_esp2 = Button(
-            p1_x_start, p1_y_start + spacing_y,
-            btn_w, btn_h, "LED 2", VERDE, VERDE_HOVER,
-            lambda: self.toggle_led(0, 1)
-        )
-        
-        self.btn_ocupar1_esp2 = Button(
-            p1_x_start + spacing_x, p1_y_start + spacing_y,
-            btn_w, btn_h, "Ocupar 2", ROJO, ROJO_HOVER,
-            lambda: self.ocupar_espacio(0, 1)
-        )
-        
-        self.btn_liberar1_esp2 = Button(
-            p1_x_start + spacing_x * 2, p1_y_start + spacing_y,
-            btn_w, btn_h, "Liberar 2", AZUL, AZUL_HOVER,
-            lambda: self.liberar_espacio(0, 1)
-        )
-        
-        self.btn_aguja1 = Button(
-            p1_x_start + spacing_x * 3, p1_y_start + spacing_y // 2,
-            btn_w, btn_h, "Aguja", NARANJA, NARANJA_HOVER,
-            lambda: self.toggle_aguja(0)
-        )
-        
-        # Parqueo 2
-        p2_x_start = 750
-        p2_y_start = 580
-        
-        self.btn_led2_esp1 = Button(
-            p2_x_start, p2_y_start,
-            btn_w, btn_h, "LED 1", VERDE, VERDE_HOVER,
-            lambda: self.toggle_led(1, 0)
-        )
-        
-        self.btn_ocupar2_esp1 = Button(
-            p2_x_start + spacing_x, p2_y_start,
-            btn_w, btn_h, "Ocupar 1", ROJO, ROJO_HOVER,
-            lambda: self.ocupar_espacio(1, 0)
-        )
-        
-        self.btn_liberar2_esp1 = Button(
-            p2_x_start + spacing_x * 2, p2_y_start,
-            btn_w, btn_h, "Liberar 1", AZUL, AZUL_HOVER,
-            lambda: self.liberar_espacio(1, 0)
-        )
-        
-        self.btn_led2_esp2 = Button(
-            p2_x_start, p2_y_start + spacing_y,
-            btn_w, btn_h, "LED 2", VERDE, VERDE_HOVER,
-            lambda: self.toggle_led(1, 1)
-        )
-        
-        self.btn_ocupar2_esp2 = Button(
-            p2_x_start + spacing_x, p2_y_start + spacing_y,
-            btn_w, btn_h, "Ocupar 2", ROJO, ROJO_HOVER,
-            lambda: self.ocupar_espacio(1, 1)
-        )
-        
-        self.btn_liberar2_esp2 = Button(
-            p2_x_start + spacing_x * 2, p2_y_start + spacing_y,
-            btn_w, btn_h, "Liberar 2", AZUL, AZUL_HOVER,
-            lambda: self.liberar_espacio(1, 1)
-        )
-        
-        self.btn_aguja2 = Button(
-            p2_x_start + spacing_x * 3, p2_y_start + spacing_y // 2,
-            btn_w, btn_h, "Aguja", NARANJA, NARANJA_HOVER,
-            lambda: self.toggle_aguja(1)
-        )
+        self.botones_slot = []
+        for slot, x_start in enumerate(X_BOTONES_SLOT):
+            y_start = 580
+            fila = [
+                ("LED", VERDE, VERDE_HOVER,
+                 lambda pid: self.toggle_led(pid, self.seleccion[pid])),
+                ("Ocupar", ROJO, ROJO_HOVER,
+                 lambda pid: self.ocupar_espacio(pid, self.seleccion[pid])),
+                ("Liberar", AZUL, AZUL_HOVER,
+                 lambda pid: self.liberar_espacio(pid, self.seleccion[pid])),
+                ("Aguja", NARANJA, NARANJA_HOVER, self.toggle_aguja),
+            ]
+            botones = [
+                Button(x_start + spacing_x * k, y_start, btn_w, btn_h, texto,
+                       color, color_hover, self.accion_slot(slot, accion))
+                for k, (texto, color, color_hover, accion) in enumerate(fila)
+            ]
+            botones += [
+                Button(x_start, y_start + spacing_y, btn_w, btn_h, "< Espacio",
+                       GRIS, GRIS_CLARO, self.accion_slot(slot, lambda pid: self.mover_seleccion(pid, -1))),
+                Button(x_start + spacing_x, y_start + spacing_y, btn_w, btn_h, "Espacio >",
+                       GRIS, GRIS_CLARO, self.accion_slot(slot, lambda pid: self.mover_seleccion(pid, 1))),
+            ]
+            self.botones_slot.append(botones)
+
+        # Páginas de parqueos (solo si no caben todos en pantalla)
+        self.botones_pagina = []
+        if len(self.parqueos) > len(X_PANELES_SLOT):
+            self.botones_pagina = [
+                Button(ANCHO // 2 - 330, 25, 50, 45, "<", GRIS, GRIS_CLARO,
+                       lambda: self.cambiar_pagina(-1)),
+                Button(ANCHO // 2 + 280, 25, 50, 45, ">", GRIS, GRIS_CLARO,
+                       lambda: self.cambiar_pagina(1)),
+            ]
         
         self.btn_actualizar_tc = Button(
             ANCHO - 300, ALTO - 100, 250, 50,
@@ -532,6 +308,12 @@ class AplicacionParqueo:
             self.actualizar_tipo_cambio
         )
         
+        self.btn_ventana = Button(
+            ANCHO - 570, ALTO - 100, 250, 50,
+            ETIQUETAS[self.ventana_estadisticas], MORADO, MORADO_HOVER,
+            self.cambiar_ventana
+        )
+        
         # Agrupar botones
         self.botones_menu = [
             self.btn_menu_iniciar, 
@@ -541,54 +323,143 @@ class AplicacionParqueo:
             self.btn_salir
         ]
         # Agrupar botones de control
-        self.botones_control = [
-            self.btn_led1_esp1, self.btn_ocupar1_esp1, self.btn_liberar1_esp1,
-            self.btn_led1_esp2, self.btn_ocupar1_esp2, self.btn_liberar1_esp2,
-            self.btn_aguja1,
-            self.btn_led2_esp1, self.btn_ocupar2_esp1, self.btn_liberar2_esp1,
-            self.btn_led2_esp2, self.btn_ocupar2_esp2, self.btn_liberar2_esp2,
-            self.btn_aguja2
-        ]
+        self.botones_control = [btn for fila in self.botones_slot for btn in fila]
+        self.botones_control += self.botones_pagina
+
+    def accion_slot(self, slot, accion):
+        """Acción de botón que se aplica al parqueo mostrado en `slot`"""
+        def ejecutar():
+            parqueo_id = self.parqueo_en_slot(slot)
+            if parqueo_id is not None:
+                accion(parqueo_id)
+        return ejecutar
     
     # ========================================================================
-    # MÉTODOS DE UTILIDAD y CAMBIO DE ESTADO y ACTUALIZACIÓN TIPO CAMBIO 
+    # PANELES (QUÉ SE REDIBUJA Y CUÁNDO)
+    # ========================================================================
+
+    def panel_boton(self, btn, font):
+        # El rect incluye la sombra desplazada 4px
+        return Panel(
+            btn.rect.union(btn.rect.move(4, 4)),
+            lambda: btn.draw(self.screen, font),
+            lambda: (btn.hover, btn.click_effect),
+        )
+
+    def panel_parqueo(self, slot):
+        x, y = X_PANELES_SLOT[slot], 120
+
+        def dibujar():
+            parqueo_id = self.parqueo_en_slot(slot)
+            if parqueo_id is not None:
+                self.draw_parqueo(self.parqueos[parqueo_id], x, y, self.seleccion[parqueo_id])
+
+        def firma():
+            parqueo_id = self.parqueo_en_slot(slot)
+            if parqueo_id is None:
+                return None
+            return parqueo_id, self.seleccion[parqueo_id], self.parqueos[parqueo_id].firma()
+
+        return Panel((x, y, 600, 400), dibujar, firma)
+
+    def panel_boton_slot(self, btn, slot):
+        # Los botones de un slot vacío (última página impar) no se dibujan
+        def dibujar():
+            if self.parqueo_en_slot(slot) is not None:
+                btn.draw(self.screen, self.font_pequeña)
+
+        return Panel(
+            btn.rect.union(btn.rect.move(4, 4)), dibujar,
+            lambda: (self.pagina, btn.hover, btn.click_effect),
+        )
+
+    def crear_paneles(self):
+        pantalla = self.screen.get_rect()
+        volver = self.panel_boton(self.btn_volver, self.font_normal)
+
+        self.paneles = {
+            0: [Panel(pantalla, self.draw_menu_principal)]
+               + [self.panel_boton(btn, self.font_subtitulo) for btn in self.botones_menu],
+            1: [Panel(pantalla, self.draw_control, lambda: self.pagina)]
+               + [self.panel_parqueo(slot) for slot in range(len(X_PANELES_SLOT))]
+               + [self.panel_boton_slot(btn, slot)
+                  for slot, fila in enumerate(self.botones_slot) for btn in fila]
+               + [self.panel_boton(btn, self.font_normal) for btn in self.botones_pagina]
+               + [self.panel_boton(self.btn_config_rapida, self.font_normal),
+                  Panel((10, ALTO - 200, 300, 180), self.draw_monitor_comunicacion,
+                        self.firma_monitor),
+                  Panel((ANCHO - 420, ALTO - 350, 400, 330), self.draw_historial_comandos,
+                        lambda: tuple(self.historial_comandos)),
+                  volver],
+            2: [Panel((100, 120, 1200, 700), self.draw_estadisticas, self.firma_estadisticas),
+                self.panel_boton(self.btn_actualizar_tc, self.font_normal),
+                Panel(self.btn_ventana.rect.union(self.btn_ventana.rect.move(4, 4)),
+                      lambda: self.btn_ventana.draw(self.screen, self.font_normal),
+                      lambda: (self.btn_ventana.hover, self.btn_ventana.click_effect,
+                               self.btn_ventana.texto))]
+               + [self.panel_boton(btn, self.font_normal) for btn in self.botones_pagina]
+               + [volver],
+            3: [Panel(pantalla, self.draw_configuracion, lambda: tuple(self.config.values())),
+                volver],
+            4: [Panel(pantalla, self.draw_about), volver],
+        }
+
+    def firma_monitor(self):
+        if not self.comunicadores_activos or not self.gestor_comunicaciones:
+            return None
+        return self.pagina, tuple(
+            (com.conectado, com.get_estado_conexion())
+            for com in self.gestor_comunicaciones.comunicadores
+        )
+
+    def firma_estadisticas(self):
+        # Todo cambio pasa por el agregador; la cubeta actual marca cuándo caduca algo
+        ventana = self.agregador.sistema.ventanas[self.ventana_estadisticas]
+        return (self.pagina, self.config['tipo_cambio'], self.ventana_estadisticas,
+                self.agregador.version, ventana.indice(time.time()))
+
+    # ========================================================================
+    # MÉTODOS DE UTILIDAD y CAMBIO DE ESTADO
     # ========================================================================
     
     def cambiar_estado(self, nuevo_estado):
         self.estado = nuevo_estado
 
-    def quit(self):
-        self.running = False
-    
-    def actualizar_tipo_cambio(self):
-        print("\n[TC] Actualizando tipo de cambio...")
-        try:
-            resp = requests.get('https://api.exchangerate.host/latest?base=USD&symbols=CRC', timeout=6)
-            if resp.status_code == 200:
-                j = resp.json()
-                if 'rates' in j and 'CRC' in j['rates']:
-                    rate = float(j['rates']['CRC'])
-                    self.config['tipo_cambio'] = rate
-                    print(f" Tipo de cambio actualizado: ₡{rate}")
-                    self.agregar_a_historial(f"TC actualizado: ₡{rate:.2f}")
-                    return
-        except:
-            pass
+    def parqueos_visibles(self):
+        """Índices de los parqueos de la página actual"""
+        inicio = self.pagina * len(X_PANELES_SLOT)
+        return list(range(inicio, min(inicio + len(X_PANELES_SLOT), len(self.parqueos))))
 
-        try:
-            response = requests.get('https://api.hacienda.go.cr/indicadores/tc/dolar', timeout=6)
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict) and 'venta' in data:
-                    self.config['tipo_cambio'] = float(data['venta'])
-                    print(f"  Tipo de cambio actualizado: ₡{self.config['tipo_cambio']}")
-                    self.agregar_a_historial(f"TC actualizado: ₡{self.config['tipo_cambio']:.2f}")
-                    return
-        except Exception as e:
-            print(f"   Error: {e}")
+    def parqueo_en_slot(self, slot):
+        parqueo_id = self.pagina * len(X_PANELES_SLOT) + slot
+        return parqueo_id if parqueo_id < len(self.parqueos) else None
+
+    def cambiar_pagina(self, delta):
+        paginas = math.ceil(len(self.parqueos) / len(X_PANELES_SLOT))
+        self.pagina = (self.pagina + delta) % paginas
+
+    def cambiar_ventana(self):
+        nombres = list(VENTANAS)
+        self.ventana_estadisticas = nombres[(nombres.index(self.ventana_estadisticas) + 1) % len(nombres)]
+        self.btn_ventana.texto = ETIQUETAS[self.ventana_estadisticas]
+
+    def mover_seleccion(self, parqueo_id, delta):
+        total = self.parqueos[parqueo_id].num_espacios
+        self.seleccion[parqueo_id] = (self.seleccion[parqueo_id] + delta) % total
+
+    def seleccionar_espacio(self, pos):
+        """Clic sobre un espacio del panel: lo deja seleccionado"""
+        for slot, x in enumerate(X_PANELES_SLOT):
+            parqueo_id = self.parqueo_en_slot(slot)
+            if parqueo_id is None:
+                continue
+            relativo = (pos[0] - x, pos[1] - 120)
+            for i, celda in enumerate(celdas_espacios(self.parqueos[parqueo_id].num_espacios)):
+                if celda.collidepoint(relativo):
+                    self.seleccion[parqueo_id] = i
+                    return True
+        return False
 
-        print(f"  No se pudo actualizar, usando: ₡{self.config['tipo_cambio']}")
-    
     # ========================================================================
     # MONITORES Y DEBUG UI
     # ========================================================================
@@ -608,11 +479,11 @@ class AplicacionParqueo:
                          (monitor_x, monitor_y, monitor_w, monitor_h), 
                          2, border_radius=10)
         
-        titulo = self.font_pequeña.render("Monitor de Conexión", True, CYAN)
+        titulo = self.textos.render(self.font_pequeña, "Monitor de Conexión", True, CYAN)
         self.screen.blit(titulo, (monitor_x + 10, monitor_y + 10))
         
         y_pos = monitor_y + 45
-        for i in range(2):
+        for i in self.parqueos_visibles():
             if self.gestor_comunicaciones:
                 comunicador = self.gestor_comunicaciones.get_comunicador(i)
                 if comunicador:
@@ -622,13 +493,13 @@ class AplicacionParqueo:
                     pygame.draw.circle(self.screen, color, 
                                      (monitor_x + 20, y_pos + 10), 8)
                     
-                    texto = self.font_pequeña.render(
+                    texto = self.textos.render(self.font_pequeña,
                         f"Parqueo {i+1}: {estado}", 
                         True, BLANCO
                     )
                     self.screen.blit(texto, (monitor_x + 35, y_pos))
                     
-                    ip_texto = self.font_pequeña.render(
+                    ip_texto = self.textos.render(self.font_pequeña,
                         f"  {comunicador.ip}:{comunicador.puerto}", 
                         True, GRIS_CLARO
                     )
@@ -652,186 +523,208 @@ class AplicacionParqueo:
                          (panel_x, panel_y, panel_w, panel_h),
                          2, border_radius=10)
         
-        titulo = self.font_pequeña.render(" Historial de Comandos", True, MORADO)
+        titulo = self.textos.render(self.font_pequeña, " Historial de Comandos", True, MORADO)
         self.screen.blit(titulo, (panel_x + 10, panel_y + 10))
         
         y_pos = panel_y + 45
         for comando in reversed(self.historial_comandos):
-            texto = self.font_pequeña.render(comando, True, GRIS_CLARO)
+            texto = self.textos.render(self.font_pequeña, comando, True, GRIS_CLARO)
             if texto.get_width() > panel_w - 20:
                 comando = comando[:50] + "..."
-                texto = self.font_pequeña.render(comando, True, GRIS_CLARO)
+                texto = self.textos.render(self.font_pequeña, comando, True, GRIS_CLARO)
             self.screen.blit(texto, (panel_x + 10, y_pos))
             y_pos += 25
     # ========================================================================
     # DIBUJO DE PANTALLAS
     # ========================================================================
     def draw_menu_principal(self):
-        titulo = self.font_titulo.render("CEstaciona", True, BLANCO)
+        titulo = self.textos.render(self.font_titulo, "CEstaciona", True, BLANCO)
         titulo_rect = titulo.get_rect(center=(ANCHO // 2, 150))
-        titulo_shadow = self.font_titulo.render("CEstaciona", True, GRIS)
+        titulo_shadow = self.textos.render(self.font_titulo, "CEstaciona", True, GRIS)
         self.screen.blit(titulo_shadow, (titulo_rect.x + 4, titulo_rect.y + 4))
         self.screen.blit(titulo, titulo_rect)
         
-        subtitulo = self.font_normal.render("Sistema Inteligente de Parqueo", True, GRIS_CLARO)
+        subtitulo = self.textos.render(self.font_normal, "Sistema Inteligente de Parqueo", True, GRIS_CLARO)
         subtitulo_rect = subtitulo.get_rect(center=(ANCHO // 2, 210))
         self.screen.blit(subtitulo, subtitulo_rect)
         
-        for btn in self.botones_menu:
-            btn.draw(self.screen, self.font_subtitulo)
-        
-        footer = self.font_pequeña.render(
+        footer = self.textos.render(self.font_pequeña,
             "TEC - Fundamentos de Sistemas Computacionales 2025",
             True, GRIS_CLARO
         )
         self.screen.blit(footer, (ANCHO // 2 - footer.get_width() // 2, ALTO - 40))
     # Dibujo de parqueo
-    def draw_parqueo(self, parqueo, x, y):
+    def draw_parqueo(self, parqueo, x, y, seleccionado=None):
         panel_rect = pygame.Rect(x, y, 600, 400)
         pygame.draw.rect(self.screen, (40, 40, 50), panel_rect, border_radius=15)
         pygame.draw.rect(self.screen, AZUL, panel_rect, 3, border_radius=15)
         
-        titulo = self.font_subtitulo.render(f"Parqueo {parqueo.id}", True, BLANCO)
+        titulo = self.textos.render(self.font_subtitulo, f"Parqueo {parqueo.id}", True, BLANCO)
         self.screen.blit(titulo, (x + 20, y + 20))
         
         espacios_disp = parqueo.espacios_disponibles()
         color_espacios = VERDE if espacios_disp > 0 else ROJO
-        texto_espacios = self.font_titulo.render(f"{espacios_disp}/2", True, color_espacios)
-        self.screen.blit(texto_espacios, (x + 250, y + 80))
+        texto_espacios = self.textos.render(
+            self.font_titulo, f"{espacios_disp}/{parqueo.num_espacios}", True, color_espacios
+        )
+        self.screen.blit(texto_espacios, (x + 300 - texto_espacios.get_width() // 2, y + 80))
         
-        texto_label = self.font_pequeña.render("Espacios disponibles", True, GRIS_CLARO)
-        self.screen.blit(texto_label, (x + 220, y + 140))
+        texto_label = self.textos.render(self.font_pequeña, "Espacios disponibles", True, GRIS_CLARO)
+        self.screen.blit(texto_label, (x + 300 - texto_label.get_width() // 2, y + 140))
         
-        for i, espacio in enumerate(parqueo.espacios):
-            espacio_x = x + 80 + i * 200
-            espacio_y = y + 200
+        for i, celda in enumerate(celdas_espacios(parqueo.num_espacios)):
+            espacio = parqueo.espacios[i]
+            espacio_rect = celda.move(x, y)
             
             color_espacio = ROJO if espacio.ocupado else VERDE
-            espacio_rect = pygame.Rect(espacio_x, espacio_y, 120, 80)
-            pygame.draw.rect(self.screen, color_espacio, espacio_rect, border_radius=8)
-            pygame.draw.rect(self.screen, BLANCO, espacio_rect, 2, border_radius=8)
+            radio = 8 if celda.w >= 40 else 2
+            pygame.draw.rect(self.screen, color_espacio, espacio_rect, border_radius=radio)
+            borde = (AMARILLO, 3) if i == seleccionado else (BLANCO, 1 if celda.w < 40 else 2)
+            pygame.draw.rect(self.screen, borde[0], espacio_rect, borde[1], border_radius=radio)
+            
+            led_color = AMARILLO if espacio.led_encendido else GRIS
+            if celda.w < 100:
+                # Muchos espacios: solo color y punto de LED
+                if celda.w >= 12:
+                    pygame.draw.circle(self.screen, led_color, espacio_rect.center,
+                                       max(2, min(celda.w, celda.h) // 5))
+                continue
             
             estado = "OCUPADO" if espacio.ocupado else "LIBRE"
-            texto_estado = self.font_pequeña.render(estado, True, BLANCO)
-            texto_rect = texto_estado.get_rect(center=(espacio_x + 60, espacio_y + 30))
+            texto_estado = self.textos.render(self.font_pequeña, estado, True, BLANCO)
+            texto_rect = texto_estado.get_rect(center=(espacio_rect.centerx, espacio_rect.y + 30))
             self.screen.blit(texto_estado, texto_rect)
             
-            led_color = AMARILLO if espacio.led_encendido else GRIS
-            pygame.draw.circle(self.screen, led_color, (espacio_x + 60, espacio_y + 55), 12)
-            pygame.draw.circle(self.screen, BLANCO, (espacio_x + 60, espacio_y + 55), 12, 2)
+            pygame.draw.circle(self.screen, led_color, (espacio_rect.centerx, espacio_rect.y + 55), 12)
+            pygame.draw.circle(self.screen, BLANCO, (espacio_rect.centerx, espacio_rect.y + 55), 12, 2)
             
-            texto_led = self.font_pequeña.render("LED", True, BLANCO)
-            self.screen.blit(texto_led, (espacio_x + 45, espacio_y + 65))
+            texto_led = self.textos.render(self.font_pequeña, "LED", True, BLANCO)
+            self.screen.blit(texto_led, (espacio_rect.centerx - 15, espacio_rect.y + 65))
         
         aguja_color = VERDE if parqueo.aguja_abierta else ROJO
         aguja_texto = "ABIERTA" if parqueo.aguja_abierta else "CERRADA"
         pygame.draw.rect(self.screen, aguja_color, (x + 220, y + 320, 160, 50), border_radius=8)
         pygame.draw.rect(self.screen, BLANCO, (x + 220, y + 320, 160, 50), 2, border_radius=8)
-        texto_aguja = self.font_normal.render(f"Aguja: {aguja_texto}", True, BLANCO)
+        texto_aguja = self.textos.render(self.font_normal, f"Aguja: {aguja_texto}", True, BLANCO)
         self.screen.blit(texto_aguja, (x + 235, y + 333))
     # Dibujo de control
     def draw_control(self):
-        titulo = self.font_titulo.render("Control de Parqueos", True, BLANCO)
+        titulo = self.textos.render(self.font_titulo, "Control de Parqueos", True, BLANCO)
         self.screen.blit(titulo, (ANCHO // 2 - titulo.get_width() // 2, 25))
         
-        self.draw_parqueo(self.parqueos[0], 100, 120)
-        self.draw_parqueo(self.parqueos[1], 750, 120)
-        
-        for btn in self.botones_control:
-            btn.draw(self.screen, self.font_pequeña)
-        
-        instruccion = self.font_pequeña.render(
+        instruccion = self.textos.render(self.font_pequeña,
             "Controla los LEDs, agujas y espacios de forma remota",
             True, GRIS_CLARO
         )
         self.screen.blit(instruccion, (ANCHO // 2 - instruccion.get_width() // 2, 550))
-        
-        self.btn_config_rapida.draw(self.screen, self.font_normal)
-        self.draw_monitor_comunicacion()
-        self.draw_historial_comandos()
+        # Parqueos, botones, monitor e historial son paneles propios (crear_paneles)
         # Dibujo de estadísticas
     def draw_estadisticas(self):
         panel_rect = pygame.Rect(100, 120, 1200, 700)
         pygame.draw.rect(self.screen, (40, 40, 50), panel_rect, border_radius=15)
         pygame.draw.rect(self.screen, MORADO, panel_rect, 3, border_radius=15)
         
-        titulo = self.font_titulo.render("Estadísticas del Sistema", True, BLANCO)
+        titulo = self.textos.render(self.font_titulo, "Estadísticas del Sistema", True, BLANCO)
         self.screen.blit(titulo, (120, 140))
         
         y_offset = 250
         
-        for i, parqueo in enumerate(self.parqueos):
+        for i, parqueo_id in enumerate(self.parqueos_visibles()):
+            parqueo = self.parqueos[parqueo_id]
             x_base = 150 + i * 550
             
-            subtitulo = self.font_subtitulo.render(f"Parqueo {parqueo.id}", True, AZUL)
+            subtitulo = self.textos.render(self.font_subtitulo, f"Parqueo {parqueo.id}", True, AZUL)
             self.screen.blit(subtitulo, (x_base, y_offset))
             
-            texto = self.font_normal.render(
+            texto = self.textos.render(self.font_normal,
                 f"Vehículos totales: {parqueo.vehiculos_totales}",
                 True, BLANCO
             )
             self.screen.blit(texto, (x_base, y_offset + 50))
             
             promedio_min = parqueo.promedio_estancia() / 60
-            texto = self.font_normal.render(
+            texto = self.textos.render(self.font_normal,
                 f"Promedio estancia: {promedio_min:.1f} min",
                 True, BLANCO
             )
             self.screen.blit(texto, (x_base, y_offset + 90))
             
             ganancias_dolares = parqueo.ganancias_colones / self.config['tipo_cambio']
-            texto = self.font_normal.render(
+            texto = self.textos.render(self.font_normal,
                 f"Ganancias: ₡{parqueo.ganancias_colones:,.0f}",
                 True, VERDE
             )
             self.screen.blit(texto, (x_base, y_offset + 130))
-            texto = self.font_normal.render(
+            texto = self.textos.render(self.font_normal,
                 f"            ${ganancias_dolares:,.2f}",
                 True, VERDE
             )
             self.screen.blit(texto, (x_base, y_offset + 160))
+            
+            self.draw_resumen_ventana(parqueo.id, x_base, y_offset + 190)
         
         y_offset = 550
-        subtitulo = self.font_subtitulo.render("Total del Sistema", True, NARANJA)
+        subtitulo = self.textos.render(self.font_subtitulo, "Total del Sistema", True, NARANJA)
         self.screen.blit(subtitulo, (150, y_offset))
         
-        total_vehiculos = sum(p.vehiculos_totales for p in self.parqueos)
-        total_ganancias = sum(p.ganancias_colones for p in self.parqueos)
+        total_vehiculos = self.agregador.vehiculos_totales
+        total_ganancias = self.agregador.ganancias_colones
         total_ganancias_usd = total_ganancias / self.config['tipo_cambio']
-        promedio_global = sum(p.promedio_estancia() for p in self.parqueos) / 2 / 60
+        promedio_global = self.agregador.promedio_estancia() / 60
         
-        texto = self.font_normal.render(
+        texto = self.textos.render(self.font_normal,
             f"Vehículos totales: {total_vehiculos}",
             True, BLANCO
         )
         self.screen.blit(texto, (150, y_offset + 50))
         
-        texto = self.font_normal.render(
+        texto = self.textos.render(self.font_normal,
             f"Promedio estancia: {promedio_global:.1f} min",
             True, BLANCO
         )
         self.screen.blit(texto, (150, y_offset + 90))
         
-        texto = self.font_normal.render(
+        texto = self.textos.render(self.font_normal,
             f"Ganancias totales: ₡{total_ganancias:,.0f} / ${total_ganancias_usd:,.2f}",
             True, VERDE
         )
         self.screen.blit(texto, (150, y_offset + 130))
         
-        texto = self.font_pequeña.render(
+        texto = self.textos.render(self.font_pequeña,
             f"Tipo de cambio: ₡{self.config['tipo_cambio']:.2f} / $1",
             True, GRIS_CLARO
         )
         self.screen.blit(texto, (150, y_offset + 180))
         
-        self.btn_actualizar_tc.draw(self.screen, self.font_normal)
+        resumen = self.agregador.resumen(None, self.ventana_estadisticas)
+        texto = self.textos.render(self.font_pequeña,
+            f"{ETIQUETAS[self.ventana_estadisticas]}: {resumen['llegadas']} llegadas | "
+            f"ocupación {resumen['ocupacion']:.0%} | p90 estancia {resumen['p90'] / 60:.1f} min | "
+            f"₡{resumen['ingresos']:,.0f}",
+            True, GRIS_CLARO
+        )
+        self.screen.blit(texto, (150, y_offset + 210))
+        # Resumen de la ventana elegida (valores en caché del agregador)
+    def draw_resumen_ventana(self, parqueo_id, x, y):
+        resumen = self.agregador.resumen(parqueo_id, self.ventana_estadisticas)
+        lineas = [
+            (f"{ETIQUETAS[self.ventana_estadisticas]}:", AMARILLO),
+            (f"Llegadas {resumen['llegadas']} | Salidas {resumen['salidas']} | "
+             f"Ocupación {resumen['ocupacion']:.0%}", BLANCO),
+            (f"Estancia prom {resumen['promedio_estancia'] / 60:.1f} min | "
+             f"p50 {resumen['p50'] / 60:.1f} | p90 {resumen['p90'] / 60:.1f}", BLANCO),
+            (f"Ingresos ₡{resumen['ingresos']:,.0f} | Rotación {resumen['rotacion']:.1f}", VERDE),
+        ]
+        for k, (linea, color) in enumerate(lineas):
+            texto = self.textos.render(self.font_pequeña, linea, True, color)
+            self.screen.blit(texto, (x, y + k * 22))
         # Dibujo de configuración
     def draw_configuracion(self):
         panel_rect = pygame.Rect(200, 120, 1000, 700)
         pygame.draw.rect(self.screen, (40, 40, 50), panel_rect, border_radius=15)
         pygame.draw.rect(self.screen, NARANJA, panel_rect, 3, border_radius=15)
         
-        titulo = self.font_titulo.render("Configuración", True, BLANCO)
+        titulo = self.textos.render(self.font_titulo, "Configuración", True, BLANCO)
         self.screen.blit(titulo, (220, 140))
         
         y_pos = 230
@@ -842,17 +735,18 @@ class AplicacionParqueo:
         configs = [
             ("Tarifa (₡/10seg):", f"₡{self.config['tarifa_por_10seg']}"),
             ("Tipo de cambio:", f"₡{self.config['tipo_cambio']:.2f}"),
-            ("IP Parqueo 1:", self.config['ip_parqueo1']),
-            ("IP Parqueo 2:", self.config['ip_parqueo2']),
+            ("Parqueos:", f"{len(self.parqueos)} × {self.config['espacios_por_parqueo']} espacios"),
+            ("IPs:", ", ".join(self.config['parqueos'][:3])
+                     + (" …" if len(self.config['parqueos']) > 3 else "")),
             ("Puerto:", str(self.config['puerto'])),
             ("Auto-refresh:", "Activado" if self.config['auto_refresh'] else "Desactivado")
         ]
         
         for i, (label, value) in enumerate(configs):
-            texto_label = self.font_normal.render(label, True, GRIS_CLARO)
+            texto_label = self.textos.render(self.font_normal, label, True, GRIS_CLARO)
             self.screen.blit(texto_label, (x_label, y_pos + i * line_height))
             
-            texto_value = self.font_normal.render(value, True, BLANCO)
+            texto_value = self.textos.render(self.font_normal, value, True, BLANCO)
             self.screen.blit(texto_value, (x_value, y_pos + i * line_height))
         
         info_y = y_pos + len(configs) * line_height + 40
@@ -863,7 +757,7 @@ class AplicacionParqueo:
         ]
         
         for i, text in enumerate(info_text):
-            texto = self.font_pequeña.render(text, True, GRIS_CLARO)
+            texto = self.textos.render(self.font_pequeña, text, True, GRIS_CLARO)
             self.screen.blit(texto, (x_label, info_y + i * 30))
         # Dibujo de about
     def draw_about(self):
@@ -871,7 +765,7 @@ class AplicacionParqueo:
         pygame.draw.rect(self.screen, (40, 40, 50), panel_rect, border_radius=15)
         pygame.draw.rect(self.screen, MORADO, panel_rect, 3, border_radius=15)
         
-        titulo = self.font_titulo.render("Acerca de CEstaciona", True, BLANCO)
+        titulo = self.textos.render(self.font_titulo, "Acerca de CEstaciona", True, BLANCO)
         self.screen.blit(titulo, (220, 140))
         
         y_pos = 250
@@ -897,10 +791,10 @@ class AplicacionParqueo:
         
         for i, (label, value) in enumerate(info):
             if label:
-                texto_label = self.font_normal.render(label, True, CYAN)
+                texto_label = self.textos.render(self.font_normal, label, True, CYAN)
                 self.screen.blit(texto_label, (x_pos, y_pos + i * 35))
             
-            texto_value = self.font_normal.render(value, True, BLANCO)
+            texto_value = self.textos.render(self.font_normal, value, True, BLANCO)
             offset_x = 200 if label else 0
             self.screen.blit(texto_value, (x_pos + offset_x, y_pos + i * 35))
         
@@ -908,79 +802,28 @@ class AplicacionParqueo:
         pygame.draw.circle(self.screen, VERDE, (ANCHO // 2 - 30, 700), 20)
         pygame.draw.circle(self.screen, ROJO, (ANCHO // 2 + 30, 700), 20)
 
-    # ========================================================================
-    # INTEGRACIÓN CON HARDWARE (BOTONES FÍSICOS)
-    # ========================================================================
-    
-    def leer_hardware_raspberry(self):
-        """Lee el estado de los botones físicos de las Raspberry Pi Pico"""
-        if not self.comunicadores_activos or not self.gestor_comunicaciones:
-            return
-        
-        # Parqueo 1
-        com1 = self.gestor_comunicaciones.get_comunicador(0)
-        if com1 and com1.activo:
-            estado1 = com1.obtener_estado()
-            
-            if estado1:
-                btn1 = estado1.get("btn1", 0)
-                btn2 = estado1.get("btn2", 0)
-                
-                # BOTÓN 1 = OCUPAR ESPACIO + ABRIR BARRERA
-                if btn1 == 1:
-                    self.ocupar_espacio(0, 0)
-                    self.toggle_aguja(0)
-                    com1.enviar_comando("mover_servo", angulo=90)
-                    com1.enviar_comando("toggle_led", index=0)
-                
-                # BOTÓN 2 = LIBERAR ESPACIO + CERRAR BARRERA
-                if btn2 == 1:
-                    self.liberar_espacio(0, 0)
-                    self.toggle_aguja(0)
-                    com1.enviar_comando("mover_servo", angulo=0)
-                    com1.enviar_comando("toggle_led", index=1)
-                
-                # Actualizar LEDs según estado del espacio
-                espacio = self.parqueos[0].espacios[0]
-                if espacio.ocupado:
-                    com1.enviar_comando("set_led", index=0, valor=1)  # Rojo ON
-                    com1.enviar_comando("set_led", index=1, valor=0)  # Verde OFF
-                else:
-                    com1.enviar_comando("set_led", index=0, valor=0)  # Rojo OFF
-                    com1.enviar_comando("set_led", index=1, valor=1)  # Verde ON
-        
-        # Parqueo 2
-        com2 = self.gestor_comunicaciones.get_comunicador(1)
-        if com2 and com2.activo:
-            estado2 = com2.obtener_estado()
-            
-            if estado2:
-                btn1 = estado2.get("btn1", 0)
-                btn2 = estado2.get("btn2", 0)
-                
-                if btn1 == 1:
-                    self.ocupar_espacio(1, 0)
-                    com2.enviar_comando("mover_servo", angulo=90)
-                
-                if btn2 == 1:
-                    self.liberar_espacio(1, 0)
-                    com2.enviar_comando("mover_servo", angulo=0)
-    
     # ========================================================================
     # LOOP PRINCIPAL
     # ========================================================================
     def run(self):
         """Loop principal de la aplicación"""
         while self.running:
+            # 60 FPS con interacción; en reposo duerme hasta un evento, un
+            # aviso del hardware o el próximo frame del GIF
+            eventos = self.planificador.esperar_eventos(self.ms_para_fondo())
+            
             # Leer hardware de las Raspberry Pi
             self.leer_hardware_raspberry()
             
             mouse_pos = pygame.mouse.get_pos()
             
-            for event in pygame.event.get():
+            for event in eventos:
                 if event.type == pygame.QUIT:
                     self.running = False
                 
+                if event.type == EVENTO_HARDWARE:
+                    continue  # solo despierta el loop
+                
                 if self.estado == 0:  # Menú principal
                     for btn in self.botones_menu:
                         btn.handle_event(event, mouse_pos)
@@ -990,10 +833,15 @@ class AplicacionParqueo:
                     self.btn_config_rapida.handle_event(event, mouse_pos)
                     for btn in self.botones_control:
                         btn.handle_event(event, mouse_pos)
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        self.seleccionar_espacio(event.pos)
                 
                 elif self.estado == 2:  # Estadísticas
                     self.btn_volver.handle_event(event, mouse_pos)
                     self.btn_actualizar_tc.handle_event(event, mouse_pos)
+                    self.btn_ventana.handle_event(event, mouse_pos)
+                    for btn in self.botones_pagina:
+                        btn.handle_event(event, mouse_pos)
                 
                 elif self.estado == 3:  # Configuración
                     self.btn_volver.handle_event(event, mouse_pos)
@@ -1001,36 +849,32 @@ class AplicacionParqueo:
                 elif self.estado == 4:  # About
                     self.btn_volver.handle_event(event, mouse_pos)
             
-            # Actualizar y dibujar fondo GIF animado
-            self.actualizar_fondo_gif()
-            self.dibujar_fondo_gif()
-            
-            # Dibujar según el estado
-            if self.estado == 0:
-                self.draw_menu_principal()
-            
-            elif self.estado == 1:
-                self.draw_control()
-                self.btn_volver.draw(self.screen, self.font_normal)
-            
-            elif self.estado == 2:
-                self.draw_estadisticas()
-                self.btn_volver.draw(self.screen, self.font_normal)
-            
-            elif self.estado == 3:
-                self.draw_configuracion()
-                self.btn_volver.draw(self.screen, self.font_normal)
-            
-            elif self.estado == 4:
-                self.draw_about()
-                self.btn_volver.draw(self.screen, self.font_normal)
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            # Si el fondo avanzó de frame (o el render parcial está apagado)
+            # se repinta todo; si no, solo los paneles que cambiaron
+            completo = self.actualizar_fondo_gif() or not self.config['render_parcial']
+            self.renderizador.dibujar(self.estado, self.paneles[self.estado], completo)
+
+            if self.perfil_pendiente:
+                self.perfil.marcar("primer frame")
+                self.perfil.imprimir()
+                self.perfil_pendiente = False
         
         # Cerrar conexiones
-        if self.gestor_comunicaciones:
-            self.gestor_comunicaciones.desactivar_todos()
+        if self.gif_cargado:
+            self.fondo.detener()
+        self.detener_comunicaciones()
+
+        stats = self.textos.obtener_estadisticas()
+        self.logger.info(
+            f"Caché de textos: {stats['entradas']} entradas | "
+            f"aciertos {stats['aciertos']} | fallos {stats['fallos']} "
+            f"({stats['tasa_aciertos']:.1%})"
+        )
+        stats = self.planificador.obtener_estadisticas()
+        self.logger.info(
+            f"Frames: {stats['fps_efectivo']:.1f} FPS efectivos | "
+            f"{stats['cpu_ms_por_frame']:.2f} ms de CPU por frame"
+        )
         
         pygame.quit()
         return
@@ -1038,5 +882,12 @@ class AplicacionParqueo:
 # EJECUTAR APLICACIÓN
 # ============================================================================
 if __name__ == "__main__":
-    app = AplicacionParqueo()
-    app.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="CEstaciona - Sistema de Parqueo Inteligente")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="imprime el tiempo de cada fase del arranque")
+    args = parser.parse_args()
+
+    perfil = PerfilArranque(_INICIO_IMPORTS)
+    perfil.marcar("imports", _FIN_IMPORTS)
+    app = AplicacionParqueo(perfil, args.profile_startup)
+    app.run()
@@ -4,8 +4,10 @@
 
 import network
 import socket
+import select
 import ujson as json
 import time
+import random
 from machine import Pin, ADC, PWM
 from ubinascii import hexlify
 
@@ -63,20 +65,44 @@ estado = {
     "display": 2
 }
 
+# Versión del estado: sube con cada cambio para que /estado responda 304
+# (sin serializar nada) cuando el cliente ya tiene la última versión.
+version_estado = 1
+_json_estado = None   # (version, bytes) serializado en caché
+
+def marcar_cambio():
+    global version_estado
+    version_estado += 1
+
+def etag_estado():
+    return '"v{}"'.format(version_estado)
+
+def estado_serializado():
+    global _json_estado
+    if _json_estado is None or _json_estado[0] != version_estado:
+        _json_estado = (version_estado, json.dumps(estado).encode("utf-8"))
+    return _json_estado[1]
+
 # -----------------------
 # UTILIDADES
 # -----------------------
 def set_led(index, valor):
     # index 0 -> rojo, 1 -> verde
+    valor = 1 if valor else 0
     if index == 0:
-        led_red.value(1 if valor else 0)
-        estado["leds"][0] = 1 if valor else 0
+        led_red.value(valor)
     elif index == 1:
-        led_green.value(1 if valor else 0)
-        estado["leds"][1] = 1 if valor else 0
+        led_green.value(valor)
+    else:
+        return
+    if estado["leds"][index] != valor:
+        estado["leds"][index] = valor
+        marcar_cambio()
 
 def toggle_led(index, color=None):
     # color param es ignorado aquí, mantenido por compatibilidad
+    if not 0 <= index < len(estado["leds"]):
+        return False
     new = 0 if estado["leds"][index] else 1
     set_led(index, new)
     return True
@@ -88,7 +114,9 @@ def mover_servo(angulo):
     pulse_ms = 0.5 + (angulo / 180.0) * 2.0  # 0.5..2.5 ms
     duty = int((pulse_ms / 20.0) * 65535)
     servo_pwm.duty_u16(duty)
-    estado["servo"] = angulo
+    if estado["servo"] != angulo:
+        estado["servo"] = angulo
+        marcar_cambio()
     return True
 
 def leer_ldr_normalizado():
@@ -100,13 +128,30 @@ def leer_ldr_normalizado():
     # normalizar 0..1023-like
     return int((val / 65535) * 1023)
 
+LDR_INTERVALO_MS = 500   # leer el ADC como mucho cada medio segundo
+LDR_UMBRAL = 8           # variaciones menores no cuentan como cambio
+_last_time_ldr = None
+
+def actualizar_ldr():
+    global _last_time_ldr
+    now = time.ticks_ms()
+    if _last_time_ldr is not None and time.ticks_diff(now, _last_time_ldr) < LDR_INTERVALO_MS:
+        return
+    _last_time_ldr = now
+    val = leer_ldr_normalizado()
+    if abs(val - estado.get("ldr", -LDR_UMBRAL - 1)) > LDR_UMBRAL:
+        estado["ldr"] = val
+        marcar_cambio()
+
 def set_display_num(n):
     # Si n entre 0-9, muestra en el 7-seg. (Si tienes multiplex, ampliar).
     d = int(n) % 10
     pattern = SEG_DIGITS.get(d, SEG_DIGITS[0])
     for pin, val in zip(seg_pins, pattern):
         pin.value(val)
-    estado["display"] = d
+    if estado["display"] != d:
+        estado["display"] = d
+        marcar_cambio()
     return True
 
 # -----------------------
@@ -118,6 +163,50 @@ _last_time_btn1 = 0
 _last_time_btn2 = 0
 DEBOUNCE_MS = 150
 
+# -----------------------
+# EVENTOS DE BOTONES (PUSH)
+# -----------------------
+# Cada flanco de botón (ya sin rebote) se guarda con un número de secuencia,
+# se empuja por UDP a los suscriptores y queda disponible en GET /eventos.
+EVENTOS_MAX = 32
+ARRANQUE = random.getrandbits(30)   # distingue reinicios (la secuencia vuelve a 0)
+eventos = []
+_seq_evento = 0
+suscriptores = []   # [(ip, puerto)]
+_udp = None
+
+def registrar_evento(boton, valor):
+    global _seq_evento
+    _seq_evento += 1
+    ev = {"seq": _seq_evento, "arranque": ARRANQUE, "boton": boton,
+          "tipo": "presionado" if valor else "liberado", "t": time.ticks_ms()}
+    eventos.append(ev)
+    if len(eventos) > EVENTOS_MAX:
+        eventos.pop(0)
+    empujar_evento(ev)
+
+def empujar_evento(ev):
+    global _udp
+    if not suscriptores:
+        return
+    if _udp is None:
+        _udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    datos = json.dumps(ev).encode("utf-8")
+    for destino in suscriptores:
+        try:
+            _udp.sendto(datos, destino)
+        except Exception as e:
+            print("No se pudo empujar evento a", destino, e)
+
+def suscribir(ip, puerto):
+    destino = socket.getaddrinfo(ip, int(puerto))[0][-1]
+    if destino not in suscriptores:
+        suscriptores.append(destino)
+    return destino
+
+def eventos_desde(seq):
+    return [ev for ev in eventos if ev["seq"] > seq]
+
 def update_buttons():
     global _last_btn1, _last_btn2, _last_time_btn1, _last_time_btn2
     now = time.ticks_ms()
@@ -128,11 +217,15 @@ def update_buttons():
         _last_time_btn1 = now
         _last_btn1 = v1
         estado["btn1"] = 1 if v1 else 0
+        marcar_cambio()
+        registrar_evento(1, v1)
     # btn2
     if v2 != _last_btn2 and time.ticks_diff(now, _last_time_btn2) > DEBOUNCE_MS:
         _last_time_btn2 = now
         _last_btn2 = v2
         estado["btn2"] = 1 if v2 else 0
+        marcar_cambio()
+        registrar_evento(2, v2)
 
 # -----------------------
 # WIFI + HTTP SERVER
@@ -152,64 +245,269 @@ def conectar_wifi(ssid, password, wait=10):
         print("No se pudo conectar a WiFi")
     return wlan
 
+def ejecutar_accion(body_json):
+    # mapear acciones esperadas por la interfaz
+    accion = body_json.get("accion", "")
+    if accion == "ocupar":
+        espacio = int(body_json.get("espacio", 0))
+        # Simula ocupación: apaga led verde, enciende rojo
+        set_led(1, 0)
+        set_led(0, 1)
+        return (200, {"status": "ok", "mensaje": f"ocupado {espacio}"})
+    if accion == "liberar":
+        espacio = int(body_json.get("espacio", 0))
+        set_led(0, 0)
+        set_led(1, 1)
+        return (200, {"status": "ok", "mensaje": f"liberado {espacio}"})
+    if accion == "toggle_led":
+        espacio = int(body_json.get("espacio", 0))
+        color = body_json.get("color", "verde")
+        # solo hay dos LEDs (0 rojo, 1 verde), no uno por espacio
+        if not toggle_led(espacio):
+            return (400, {"status": "error", "mensaje": "led inexistente"})
+        return (200, {"status": "ok", "mensaje": "toggle_led"})
+    if accion == "set_led":
+        index = int(body_json.get("index", 0))
+        valor = int(body_json.get("valor", 0))
+        set_led(index, 1 if valor else 0)
+        return (200, {"status": "ok", "mensaje": "set_led"})
+    if accion in ("mover_servo", "mover_servo_boton"):
+        ang = int(body_json.get("angulo", 0))
+        mover_servo(ang)
+        return (200, {"status": "ok", "mensaje": f"servo {ang}"})
+    if accion == "toggle_aguja":
+        # abre/cierra aguja -> vamos a mover servo 0/90
+        nuevo = 90 if estado["servo"] == 0 else 0
+        mover_servo(nuevo)
+        return (200, {"status": "ok", "mensaje": "toggle_aguja", "servo": nuevo})
+    if accion == "actualizar_display":
+        numero = int(body_json.get("numero", 0))
+        set_display_num(numero)
+        return (200, {"status": "ok", "mensaje": "display actualizado"})
+    # comandos custom
+    return (400, {"status": "error", "mensaje": "accion desconocida"})
+
+def capturar_hardware():
+    return (estado["leds"][0], estado["leds"][1], estado["servo"], estado["display"])
+
+def restaurar_hardware(previo):
+    set_led(0, previo[0])
+    set_led(1, previo[1])
+    if estado["servo"] != previo[2]:
+        mover_servo(previo[2])
+    set_display_num(previo[3])
+
+def ejecutar_lote(acciones):
+    # Aplica todas las acciones o ninguna: ante el primer fallo se restaura
+    # el hardware al estado previo al lote.
+    previo = capturar_hardware()
+    resultados = []
+    for i, body_json in enumerate(acciones):
+        try:
+            status, resp = ejecutar_accion(body_json)
+        except Exception as e:
+            status, resp = 500, {"status": "error", "mensaje": str(e)}
+        if status != 200:
+            restaurar_hardware(previo)
+            return (status, {"status": "error", "mensaje": resp.get("mensaje"),
+                             "indice": i, "resultados": resultados})
+        resultados.append(resp)
+    return (200, {"status": "ok", "resultados": resultados})
+
 # manejador simple de requests
-def handle_request(method, path, body_json):
+def parsear_query(query):
+    params = {}
+    for par in query.split("&"):
+        if "=" in par:
+            k, v = par.split("=", 1)
+            params[k] = v
+    return params
+
+def handle_request(method, path, body_json, headers=None, query="", origen=None):
     # rutas:
-    # GET /estado -> devuelve estado JSON
+    # GET /estado -> devuelve estado JSON (304 si If-None-Match/since está al día)
+    # GET /eventos?desde=N -> eventos de botones con seq > N (recuperación)
     # POST /comando -> ejecuta comando {"accion": "...", ...}
+    # POST /comandos -> ejecuta un lote {"acciones": [...]}
     if method == "GET" and path == "/estado":
         # actualizar lectura LDR y botones antes de devolver
         update_buttons()
-        estado["ldr"] = leer_ldr_normalizado()
-        return (200, estado)
+        actualizar_ldr()
+        if headers and headers.get("if-none-match") == etag_estado():
+            return (304, None)
+        try:
+            since = int(parsear_query(query).get("since", 0))
+        except ValueError:
+            since = 0
+        if since >= version_estado:
+            return (304, None)
+        return (200, estado_serializado())
+    if method == "GET" and path == "/eventos":
+        update_buttons()
+        try:
+            desde = int(parsear_query(query).get("desde", 0))
+        except ValueError:
+            desde = 0
+        return (200, {"arranque": ARRANQUE, "seq": _seq_evento,
+                      "eventos": eventos_desde(desde)})
     if method == "POST" and path == "/comando":
         if not body_json:
             return (400, {"status": "error", "mensaje": "JSON faltante"})
-        accion = body_json.get("accion", "")
-        # mapear acciones esperadas por la interfaz
+        if body_json.get("accion") == "suscribir_eventos":
+            # {"accion": "suscribir_eventos", "puerto": P[, "ip": ...]}; por
+            # defecto se empuja a la IP que hizo la petición
+            ip = body_json.get("ip") or origen
+            if not ip or "puerto" not in body_json:
+                return (400, {"status": "error", "mensaje": "ip/puerto faltante"})
+            suscribir(ip, body_json["puerto"])
+            return (200, {"status": "ok", "mensaje": "suscrito", "seq": _seq_evento,
+                          "arranque": ARRANQUE})
         try:
-            if accion == "ocupar":
-                espacio = int(body_json.get("espacio", 0))
-                # Simula ocupación: apaga led verde, enciende rojo
-                set_led(1, 0)
-                set_led(0, 1)
-                return (200, {"status": "ok", "mensaje": f"ocupado {espacio}"})
-            if accion == "liberar":
-                espacio = int(body_json.get("espacio", 0))
-                set_led(0, 0)
-                set_led(1, 1)
-                return (200, {"status": "ok", "mensaje": f"liberado {espacio}"})
-            if accion == "toggle_led":
-                espacio = int(body_json.get("espacio", 0))
-                color = body_json.get("color", "verde")
-                # elegir index por espacio (ejemplo)
-                toggle_led(espacio)
-                return (200, {"status": "ok", "mensaje": "toggle_led"})
-            if accion == "set_led":
-                index = int(body_json.get("index", 0))
-                valor = int(body_json.get("valor", 0))
-                set_led(index, 1 if valor else 0)
-                return (200, {"status": "ok", "mensaje": "set_led"})
-            if accion in ("mover_servo", "mover_servo_boton"):
-                ang = int(body_json.get("angulo", 0))
-                mover_servo(ang)
-                return (200, {"status": "ok", "mensaje": f"servo {ang}"})
-            if accion == "toggle_aguja":
-                # abre/cierra aguja -> vamos a mover servo 0/90
-                nuevo = 90 if estado["servo"] == 0 else 0
-                mover_servo(nuevo)
-                return (200, {"status": "ok", "mensaje": "toggle_aguja", "servo": nuevo})
-            if accion == "actualizar_display":
-                numero = int(body_json.get("numero", 0))
-                set_display_num(numero)
-                return (200, {"status": "ok", "mensaje": "display actualizado"})
-            # comandos custom
-            return (400, {"status": "error", "mensaje": "accion desconocida"})
+            return ejecutar_accion(body_json)
         except Exception as e:
             return (500, {"status": "error", "mensaje": str(e)})
+    if method == "POST" and path == "/comandos":
+        # lote: {"acciones": [{"accion": ...}, ...]} aplicado todo o nada
+        if not body_json or not isinstance(body_json.get("acciones"), list):
+            return (400, {"status": "error", "mensaje": "lista de acciones faltante"})
+        return ejecutar_lote(body_json["acciones"])
 
     return (404, {"status": "error", "mensaje": "ruta no encontrada"})
 
+# -----------------------
+# HTTP KEEP-ALIVE
+# -----------------------
+KEEPALIVE_MS = 5000   # cerrar conexiones inactivas tras este tiempo
+MAX_CLIENTES = 4      # conexiones simultáneas (RAM limitada)
+MAX_PETICION = 4096   # bytes máximos de una petición
+
+RAZONES = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+def extraer_peticion(buf):
+    # Retorna ((metodo, ruta, version, headers, body), resto) o (None, buf) si está incompleta
+    fin = buf.find(b"\r\n\r\n")
+    if fin < 0:
+        return None, buf
+    lines = buf[:fin].decode("utf-8").split("\r\n")
+    parts = lines[0].split(" ")
+    headers = {}
+    for linea in lines[1:]:
+        if ":" in linea:
+            k, v = linea.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    largo = int(headers.get("content-length", "0") or 0)
+    total = fin + 4 + largo
+    if len(buf) < total:
+        return None, buf
+    if len(parts) < 2:
+        raise ValueError("linea de peticion invalida")
+    version = parts[2] if len(parts) > 2 else "HTTP/1.0"
+    body = buf[fin + 4:total].decode("utf-8")
+    return (parts[0], parts[1], version, headers, body), buf[total:]
+
+def mantener_viva(version, headers):
+    # HTTP/1.1 es keep-alive por defecto; HTTP/1.0 solo si se pide
+    conexion = headers.get("connection", "").lower()
+    if conexion == "close":
+        return False
+    if version == "HTTP/1.0":
+        return conexion == "keep-alive"
+    return True
+
+def responder(cl, status, resp_obj, mantener, extra=None):
+    # resp_obj puede venir ya serializado (bytes) o ser None (sin cuerpo)
+    if resp_obj is None:
+        resp = b""
+    elif isinstance(resp_obj, bytes):
+        resp = resp_obj
+    else:
+        resp = json.dumps(resp_obj).encode("utf-8")
+    # Estado, headers y cuerpo en un solo send: varios send() pequeños en
+    # una conexión keep-alive chocan con Nagle + ACK retardado (~40 ms)
+    lineas = [
+        "HTTP/1.1 {} {}".format(status, RAZONES.get(status, "OK")),
+        "Content-Type: application/json",
+        "Content-Length: {}".format(len(resp)),
+    ]
+    if extra:
+        for k, v in extra.items():
+            lineas.append("{}: {}".format(k, v))
+    if mantener:
+        lineas.append("Connection: keep-alive")
+        lineas.append("Keep-Alive: timeout={}".format(KEEPALIVE_MS // 1000))
+    else:
+        lineas.append("Connection: close")
+    enviar_todo(cl, ("\r\n".join(lineas) + "\r\n\r\n").encode("utf-8") + resp)
+
+def enviar_todo(cl, datos):
+    # send() puede escribir solo una parte del buffer
+    vista = memoryview(datos)
+    while vista:
+        enviados = cl.send(vista)
+        if not enviados:
+            raise OSError("conexion cerrada al enviar")
+        vista = vista[enviados:]
+
+def cerrar_cliente(cl, clientes, poller):
+    clientes.pop(cl, None)
+    try:
+        poller.unregister(cl)
+    except:
+        pass
+    try:
+        cl.close()
+    except:
+        pass
+
+def atender_cliente(cl, clientes, poller):
+    # Lee lo disponible y responde todas las peticiones completas del buffer
+    info = clientes[cl]
+    try:
+        datos = cl.recv(1024)
+    except OSError:
+        cerrar_cliente(cl, clientes, poller)
+        return
+    if not datos:
+        cerrar_cliente(cl, clientes, poller)
+        return
+    info[0] += datos
+    info[1] = time.ticks_ms()
+    try:
+        while True:
+            peticion, info[0] = extraer_peticion(info[0])
+            if peticion is None:
+                break
+            method, ruta, version, headers, body = peticion
+            partes = ruta.split("?", 1)
+            path = partes[0]
+            query = partes[1] if len(partes) > 1 else ""
+            body_json = None
+            if body:
+                try:
+                    body_json = json.loads(body)
+                except:
+                    body_json = None
+            # manejar ruta
+            status, resp_obj = handle_request(method, path, body_json, headers, query, info[2])
+            mantener = mantener_viva(version, headers)
+            extra = None
+            if path == "/estado":
+                extra = {"ETag": etag_estado(), "X-Estado-Version": version_estado}
+            responder(cl, status, resp_obj, mantener, extra)
+            if not mantener:
+                cerrar_cliente(cl, clientes, poller)
+                return
+        if len(info[0]) > MAX_PETICION:
+            responder(cl, 413, {"status": "error", "mensaje": "peticion demasiado grande"}, False)
+            cerrar_cliente(cl, clientes, poller)
+    except Exception as e:
+        try:
+            responder(cl, 500, {"status": "error", "mensaje": str(e)}, False)
+        except:
+            pass
+        cerrar_cliente(cl, clientes, poller)
+
 def start_server(port=8080):
     addr = socket.getaddrinfo("0.0.0.0", port)[0][-1]
     s = socket.socket()
@@ -217,58 +515,35 @@ def start_server(port=8080):
     s.bind(addr)
     s.listen(5)
     print("Servidor HTTP en", addr)
+    # Un solo hilo atiende varias conexiones persistentes con poll()
+    poller = select.poll()
+    poller.register(s, select.POLLIN)
+    clientes = {}  # socket -> [buffer, ultimo_uso_ms, ip_origen]
     while True:
-        cl, addr = s.accept()
-        # timeout corto
-        cl.settimeout(5)
-        try:
-            req = cl.recv(4096)
-            if not req:
-                cl.close()
-                continue
-            req_str = req.decode("utf-8")
-            # parse minimal HTTP
-            lines = req_str.split("\r\n")
-            request_line = lines[0]
-            parts = request_line.split(" ")
-            if len(parts) < 2:
-                cl.close()
-                continue
-            method = parts[0]
-            path = parts[1].split("?")[0]
-            # read body if any (simple)
-            body = ""
-            if "\r\n\r\n" in req_str:
-                body = req_str.split("\r\n\r\n", 1)[1]
-            body_json = None
-            if body:
-                try:
-                    body_json = json.loads(body)
-                except:
-                    body_json = None
-            # manejar ruta
-            status, resp_obj = handle_request(method, path, body_json)
-            resp = json.dumps(resp_obj)
-            cl.send("HTTP/1.1 {} OK\r\n".format(status))
-            cl.send("Content-Type: application/json\r\n")
-            cl.send("Content-Length: {}\r\n".format(len(resp)))
-            cl.send("Connection: close\r\n\r\n")
-            cl.send(resp)
-        except Exception as e:
-            try:
-                err = json.dumps({"status":"error","mensaje":str(e)})
-                cl.send("HTTP/1.1 500 Internal Server Error\r\n")
-                cl.send("Content-Type: application/json\r\n")
-                cl.send("Content-Length: {}\r\n".format(len(err)))
-                cl.send("\r\n")
-                cl.send(err)
-            except:
-                pass
-        finally:
-            try:
-                cl.close()
-            except:
-                pass
+        # poll corto: entre peticiones se siguen muestreando los botones
+        for evento in poller.poll(20):
+            obj = evento[0]
+            if obj is s:
+                cl, origen = s.accept()
+                if len(clientes) >= MAX_CLIENTES:
+                    cl.close()
+                    continue
+                # timeout corto: solo se lee cuando poll() indica datos
+                cl.settimeout(5)
+                poller.register(cl, select.POLLIN)
+                ip_origen = origen[0] if isinstance(origen, tuple) else None
+                clientes[cl] = [b"", time.ticks_ms(), ip_origen]
+            elif obj in clientes:
+                if evento[1] & (select.POLLHUP | select.POLLERR):
+                    cerrar_cliente(obj, clientes, poller)
+                else:
+                    atender_cliente(obj, clientes, poller)
+        update_buttons()
+        # cerrar conexiones keep-alive inactivas
+        ahora = time.ticks_ms()
+        for cl in [c for c, info in clientes.items()
+                   if time.ticks_diff(ahora, info[1]) > KEEPALIVE_MS]:
+            cerrar_cliente(cl, clientes, poller)
 
 # -----------------------
 # MAIN
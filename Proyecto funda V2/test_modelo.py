@@ -0,0 +1,101 @@
+#===========================================================================
+# Pruebas del modelo: contador incremental de libres y sus avisos
+#
+#   python -m pytest test_modelo.py
+#===========================================================================
+import random
+from Modelo import Parqueo
+from Tarifas import TarifaEscalonada
+
+
+def _parqueo(num_espacios, id_parqueo=1):
+    parqueo = Parqueo(id_parqueo, num_espacios=num_espacios,
+                      tarifa=TarifaEscalonada([(0, 1000)]))
+    parqueo.verificar = True    # cada consulta y cada aviso recuenta el bitset
+    return parqueo
+
+
+def _escuchar(parqueo):
+    avisos = []
+    parqueo.al_cambiar_libres(lambda p, libres: avisos.append(libres))
+    return avisos
+
+
+def test_ocupar_liberar_aleatorio():
+    azar = random.Random(20)
+    for num_espacios in (1, 7, 64, 200):
+        parqueo = _parqueo(num_espacios)
+        avisos = _escuchar(parqueo)
+        ocupados = set()
+        cambios = 0
+        for _ in range(3000):
+            espacio = azar.randrange(num_espacios)
+            if azar.random() < 0.5:
+                cambio = parqueo.ocupar(espacio)
+                assert cambio == (espacio not in ocupados)
+                ocupados.add(espacio)
+            else:
+                cambio = espacio in ocupados
+                parqueo.liberar(espacio)
+                ocupados.discard(espacio)
+            cambios += bool(cambio)
+            assert parqueo.espacios_disponibles() == num_espacios - len(ocupados)
+            libre = parqueo.primer_libre()
+            assert libre == min(set(range(num_espacios)) - ocupados, default=None)
+        # Un aviso por cada movimiento del conteo, con el valor nuevo
+        assert len(avisos) == cambios
+        assert avisos[-1] == parqueo.espacios_disponibles()
+
+
+def test_sin_aviso_si_el_conteo_no_cambia():
+    parqueo = _parqueo(4)
+    avisos = _escuchar(parqueo)
+    parqueo.ocupar(2)
+    parqueo.ocupar(2)           # ya ocupado
+    parqueo.liberar(0)          # ya libre
+    parqueo.toggle_led(1)
+    parqueo.toggle_aguja()
+    assert avisos == [3]
+    assert parqueo.liberar(2) >= 0
+    assert avisos == [3, 4]
+
+
+def test_aplicar_evento_mantiene_el_contador():
+    azar = random.Random(7)
+    parqueo = _parqueo(16)
+    avisos = _escuchar(parqueo)
+    ocupados = set()
+    for i in range(2000):
+        espacio = azar.randrange(20)   # algunos fuera de rango: se ignoran
+        tipo = azar.choice(("ocupar", "liberar", "led", "aguja"))
+        parqueo.aplicar_evento(tipo, espacio, float(i), valor=1.0, costo=10.0)
+        if espacio < 16:
+            if tipo == "ocupar":
+                ocupados.add(espacio)
+            elif tipo == "liberar":
+                ocupados.discard(espacio)
+        parqueo.verificar_contador()
+        assert parqueo.espacios_disponibles() == 16 - len(ocupados)
+    assert avisos == []         # la restauración no avisa a nadie
+
+
+def test_restaurar_instantanea_con_otro_tamano():
+    origen = _parqueo(10)
+    for espacio in (0, 3, 9):
+        origen.ocupar(espacio)
+    datos = origen.instantanea()
+
+    mayor = _parqueo(12)
+    mayor.restaurar_instantanea(datos)
+    mayor.verificar_contador()
+    assert mayor.espacios_disponibles() == 9
+    assert [e.ocupado for e in mayor.espacios[10:]] == [False, False]
+
+    menor = _parqueo(5)         # el espacio 9 ya no existe
+    menor.restaurar_instantanea(datos)
+    menor.verificar_contador()
+    assert menor.espacios_disponibles() == 3
+
+    avisos = _escuchar(menor)
+    menor.liberar(3)
+    assert avisos == [4]
@@ -0,0 +1,111 @@
+#===========================================================================
+# Pruebas de tarifas: sumas acumuladas, vuelta del día y cobro en lote
+#
+#   python -m pytest test_tarifas.py
+#===========================================================================
+import random
+import pytest
+import Tarifas
+from Tarifas import MotorTarifas, TablaAcumulada, TarifaEscalonada, TarifaHoraria
+
+HORA = 3600
+DIA = 86400
+BASE = 20 * DIA     # medianoche UTC; con desfase_utc=0 es la medianoche local
+
+# ₡1000/10s de 06:00 a 22:00 y ₡300/10s de 22:00 a 06:00
+FRANJAS = [("06:00", 1000), ("22:00", 300)]
+COSTO_DIA = 16 * 360 * 1000 + 8 * 360 * 300     # ₡6,624,000
+
+
+def _horaria():
+    return TarifaHoraria(FRANJAS, desfase_utc=0)
+
+
+def test_tabla_acumulada_en_los_cortes():
+    tabla = TablaAcumulada([0, 10, 30], [1.0, 2.0, 0.5])
+    assert tabla.acumulado == [0.0, 10.0, 50.0]
+    assert tabla.valor(0) == 0
+    assert tabla.valor(10) == 10        # justo en el corte: ya rige el tramo siguiente
+    assert tabla.valor(11) == 12
+    assert tabla.valor(30) == 50
+    assert tabla.valor(40) == 55        # el último tramo sigue hasta el infinito
+
+
+def test_escalonada():
+    tarifa = TarifaEscalonada([(0, 1000), (HORA, 500)])
+    assert tarifa.precio(0, 30 * 60) == 180_000
+    assert tarifa.precio(0, HORA) == 360_000
+    assert tarifa.precio(0, 2 * HORA) == 540_000
+    assert tarifa.precio(100, 100) == 0
+    assert tarifa.precio(100, 50) == 0   # salida antes de la entrada no cobra
+
+
+def test_horaria_costo_del_dia():
+    tarifa = _horaria()
+    assert tarifa.costo_dia == COSTO_DIA == 6_624_000
+    assert tarifa.precio(BASE, BASE + DIA) == COSTO_DIA
+    assert tarifa.precio(BASE + 6 * HORA, BASE + 6 * HORA + DIA) == COSTO_DIA
+
+
+def test_horaria_cambio_de_franja():
+    tarifa = _horaria()
+    # 21:00 -> 23:00: una hora de día y una de noche
+    assert tarifa.precio(BASE + 21 * HORA, BASE + 23 * HORA) == 468_000
+    # Antes de la primera franja rige la última (noche)
+    assert tarifa.precio(BASE + 2 * HORA, BASE + 3 * HORA) == 108_000
+    assert tarifa.precio(BASE + 5 * HORA, BASE + 7 * HORA) == 108_000 + 360_000
+
+
+def test_horaria_cruza_medianoche_y_varios_dias():
+    tarifa = _horaria()
+    assert tarifa.precio(BASE + 23 * HORA, BASE + DIA + HORA) == 216_000
+    entrada = BASE + 21 * HORA
+    assert tarifa.precio(entrada, entrada + 3 * DIA + 2 * HORA) == 3 * COSTO_DIA + 468_000
+    assert tarifa.precio(entrada, entrada) == 0
+
+
+def test_horaria_con_desfase():
+    # UTC-6: las 21:00 locales son las 03:00 UTC del día siguiente
+    tarifa = TarifaHoraria(FRANJAS, desfase_utc=-6 * HORA)
+    entrada = BASE + DIA + 3 * HORA
+    assert tarifa.precio(entrada, entrada + 2 * HORA) == 468_000
+
+
+def _estancias(n, semilla):
+    azar = random.Random(semilla)
+    entradas = [BASE + azar.uniform(0, 30 * DIA) for _ in range(n)]
+    salidas = [e + azar.choice((0, 10, azar.uniform(0, 4 * DIA))) for e in entradas]
+    salidas[0] = entradas[0] - 60       # salida anterior a la entrada
+    return entradas, salidas
+
+
+@pytest.mark.parametrize("tarifa", [
+    TarifaEscalonada([(0, 1000), (HORA, 500), (6 * HORA, 200)]),
+    TarifaHoraria(FRANJAS, desfase_utc=0),
+    TarifaHoraria([("00:00", 100), ("07:30", 900), ("18:00", 400)], desfase_utc=-6 * HORA),
+], ids=["escalonada", "horaria", "horaria-desfase"])
+def test_precios_en_lote_igual_a_precio(tarifa, monkeypatch):
+    entradas, salidas = _estancias(500, 3)
+    esperado = [tarifa.precio(e, s) for e, s in zip(entradas, salidas)]
+
+    # Sin NumPy se cobra estancia por estancia con bisect
+    with monkeypatch.context() as m:
+        m.setattr(Tarifas, "_importar_numpy", lambda: None)
+        assert tarifa.precios(entradas, salidas) == pytest.approx(esperado)
+
+    pytest.importorskip("numpy")
+    assert list(tarifa.precios(entradas, salidas)) == pytest.approx(esperado)
+
+
+def test_motor_agrupa_por_parqueo(monkeypatch):
+    motor = MotorTarifas(TarifaEscalonada([(0, 1000)]), {2: _horaria()})
+    entradas, salidas = _estancias(300, 5)
+    parqueos = [1 + i % 3 for i in range(len(entradas))]
+    esperado = [motor.precio(p, e, s) for p, e, s in zip(parqueos, entradas, salidas)]
+
+    with monkeypatch.context() as m:
+        m.setattr(Tarifas, "_importar_numpy", lambda: None)
+        assert motor.precios(parqueos, entradas, salidas) == pytest.approx(esperado)
+
+    pytest.importorskip("numpy")
+    assert list(motor.precios(parqueos, entradas, salidas)) == pytest.approx(esperado)